@@ -1,12 +1,46 @@
 # app.py
+import os
 from app import create_app
+from app.services.JobService import JobService
+from app.services.EmailOutboxService import EmailOutboxService
+from app.services.PasswordHasher import PasswordHasher
+from app.services.ArticleTextService import ArticleTextService
+from app.services.ArticleViewBuffer import ArticleViewBuffer
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = create_app()
+
+def start_background_services(app):
+    """
+    Start the pools, workers and schedules of the serving process (not of
+    seed.py or other scripts). The hashing and extraction pools fork their
+    workers, so they start before any other thread.
+    """
+    PasswordHasher.get_instance().start()
+    ArticleTextService.start()
+    JobService.start_workers(app)
+    EmailOutboxService.start_senders(app)
+    ArticleViewBuffer.start_flusher(app)
+    JobService.schedule_every('job_prune', int(os.environ.get('JOB_PRUNE_INTERVAL', 86400)))
+    JobService.schedule_every('change_feed_prune', int(os.environ.get('CHANGE_FEED_PRUNE_INTERVAL', 86400)))
+    JobService.schedule_every('notification_maintenance', int(os.environ.get('NOTIFICATION_MAINTENANCE_INTERVAL', 86400)))
+    JobService.schedule_every('article_text_sync', int(os.environ.get('ARTICLE_TEXT_SYNC_INTERVAL', 600)), initial_delay=60)
+    JobService.schedule_every('trending_prune', int(os.environ.get('TRENDING_PRUNE_INTERVAL', 3600)))
+    JobService.schedule_every('dashboard_stats_refresh', int(os.environ.get('DASHBOARD_STATS_INTERVAL', 60)))
+    JobService.schedule_every('rental_due_scan', int(os.environ.get('RENTAL_DUE_SCAN_INTERVAL', 3600)), initial_delay=120)
+    JobService.schedule_every('article_counter_reconcile', int(os.environ.get('ARTICLE_COUNTER_RECONCILE_INTERVAL', 86400)))
+
 
 if __name__ == '__main__':
+    # Everything lives under this guard: multiprocessing re-imports this file as
+    # __mp_main__ in pool workers, which must not build the app or start workers again
+    debug = True
+    app = create_app()
+    # With the reloader (on in debug mode) this file runs in a watcher process and
+    # again in the serving child, which Werkzeug marks with WERKZEUG_RUN_MAIN
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services(app)
     # Run the Flask app on port 5050
-    app.run(host='0.0.0.0', port=5050, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5050, debug=debug)
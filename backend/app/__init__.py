@@ -14,6 +14,11 @@ from app.controllers.chatbot_controller import chatbot_controller
 from app.controllers.article_controller import article_controller
 from app.controllers.email_controller import email_controller
 from app.controllers.notification_controller import notification_controller
+from app.controllers.job_controller import job_controller
+from app.services.ChangeFeedService import ChangeFeedService
+from app.services.EmailProviderRegistry import EmailProviderRegistry
+from app.services.UserStatsCache import UserStatsCache
+from app.services.UserCache import UserCache
 from dotenv import load_dotenv
 import os
 import logging
@@ -31,16 +36,25 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY')
+    # EventSource cannot send headers, so /notifications/stream alone also reads ?token=
+    app.config['JWT_TOKEN_LOCATION'] = ['headers']
+    app.config['JWT_QUERY_STRING_NAME'] = 'token'
 
     logger.debug("Initializing extensions")
     db.init_app(app)
     Bcrypt(app)
     JWTManager(app)
     Migrate(app, db)
+    ChangeFeedService.init_app(app)
+    EmailProviderRegistry.init_app(app)
+    UserStatsCache.init_app(app)
+    UserCache.init_app(app)
 
 
     # Enable CORS for all routes
-    CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}})  
+    # pdf.js needs the range headers exposed to fetch /proxy-pdf lazily
+    CORS(app, resources={r"/*": {"origins": "http://localhost:5173"}},
+         expose_headers=['Accept-Ranges', 'Content-Range', 'Content-Length', 'ETag'])
     
     logger.debug("Registering blueprints")
     app.register_blueprint(book_controller)
@@ -53,6 +67,7 @@ def create_app():
     app.register_blueprint(article_controller)
     app.register_blueprint(email_controller, url_prefix='/email')
     app.register_blueprint(notification_controller)
+    app.register_blueprint(job_controller, url_prefix='/admin')
 
     logger.debug("App creation complete")
     return app
\ No newline at end of file
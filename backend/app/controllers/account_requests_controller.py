@@ -1,17 +1,13 @@
 # backend/app/controllers/account_requests_controller.py
 
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import get_jwt_identity, jwt_required
+from app.services.AuthService import admin_required
 from app.services.UserService import UserService
 import logging
-from app.services.EmailService import EmailService
+from app.services.EmailOutboxService import EmailOutboxService
 from app.model.AccountRequest import AccountRequest
 from app.model.User import User
 
-# Initialize EmailService
-email_service = EmailService()
-
-
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
@@ -19,7 +15,7 @@ logger = logging.getLogger(__name__)
 account_requests_bp = Blueprint('account_requests', __name__)
 
 @account_requests_bp.route('/account-requests', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_account_requests():
     try:
         logger.debug("Fetching account requests")
@@ -56,7 +52,7 @@ def get_account_requests():
 
 
 @account_requests_bp.route('/account-requests/<int:request_id>/approve', methods=['POST'])
-@jwt_required()
+@admin_required
 def approve_account_request(request_id):
     try:
         logger.debug("Approving account request %s", request_id)
@@ -68,8 +64,8 @@ def approve_account_request(request_id):
         
         # Send email notification
         # -----------------------------------------------------------------------------------------
-        # Direct EmailService call:
-        result = email_service.send_email(
+        # Queue the email on the outbox:
+        result = EmailOutboxService.enqueue(
             user.email, 
             'account_approved', 
             {'userName': user.name, 'action': 'approve'}
@@ -89,7 +85,7 @@ def approve_account_request(request_id):
 
 
 @account_requests_bp.route('/account-requests/<int:request_id>/reject', methods=['POST'])
-@jwt_required()
+@admin_required
 def reject_account_request(request_id):
     try:
         logger.debug("Rejecting account request %s", request_id)
@@ -105,8 +101,8 @@ def reject_account_request(request_id):
         
         # Send email notification
         # -----------------------------------------------------------------------------------------
-        # Direct EmailService call:
-        result = email_service.send_email(
+        # Queue the email on the outbox:
+        result = EmailOutboxService.enqueue(
             account_request.email,
             'account_action', 
             {'userName': account_request.name, 'action': 'reject'}
@@ -123,7 +119,7 @@ def reject_account_request(request_id):
 
     
 @account_requests_bp.route('/account-requests/<int:request_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_account_request(request_id):
     try:
         logger.debug("Deleting account request %s", request_id)
@@ -139,8 +135,8 @@ def delete_account_request(request_id):
         
         # Send email notification
         # -----------------------------------------------------------------------------------------
-        # Direct EmailService call:
-        result = email_service.send_email(
+        # Queue the email on the outbox:
+        result = EmailOutboxService.enqueue(
             account_request.email,
             'account_action', 
             {'userName': account_request.name, 'action': 'delete'}
@@ -155,7 +151,7 @@ def delete_account_request(request_id):
         return jsonify({'message': 'Server error'}), 500
 
 @account_requests_bp.route('/account-requests/<int:request_id>/set-pending', methods=['POST'])
-@jwt_required()
+@admin_required
 def set_pending_account_request(request_id):
     try:
         logger.debug("Setting account request %s to pending", request_id)
@@ -171,7 +167,7 @@ def set_pending_account_request(request_id):
             # Get the user associated with the email in the account request
             user = User.query.filter_by(email=account_request.email).first()
             if user:
-                result = email_service.send_email(
+                result = EmailOutboxService.enqueue(
                     user.email,
                     'account_action',
                     {'userName': user.name, 'action': 'set-pending'}
@@ -1,16 +1,22 @@
-from flask import Blueprint, Response, abort, jsonify, request
+import os
+from flask import Blueprint, abort, jsonify, request, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import requests
 from app.db import db
-from app.model.ArticleView import ArticleView
 from app.model.ArticleLike import ArticleLike
 from app.model.ArticleBookmark import ArticleBookmark
 from app.model.ArticleAuthor import ArticleAuthor
 from app.model.Article import Article
 from app.model.ArticleMeta import ArticleMeta
+from app.services.PdfCache import PdfCache
+from app.services.ArticleTextService import ArticleTextService
+from app.services.JobService import JobService
+from app.services.ArticleViewBuffer import ArticleViewBuffer
+from app.services.ArticleReactionService import ArticleReactionService
 from app.model.Article import Article
 
 from math import ceil
+from urllib.parse import urlparse
 from datetime import datetime
 from slugify import slugify
 import logging
@@ -22,6 +28,16 @@ logger = logging.getLogger(__name__)
 
 article_controller = Blueprint('article_controller', __name__)
 
+# ?sort= keys for GET /articles; prefix with '-' for descending
+ARTICLE_SORT_COLUMNS = {
+    'read_time': ArticleMeta.read_time,
+    'page_count': ArticleMeta.page_count,
+    'word_count': ArticleMeta.word_count,
+    'views': ArticleMeta.views,
+    'likes': ArticleMeta.likes_count,
+    'created_at': Article.created_at,
+}
+
 @article_controller.route('/articles', methods=['GET'])
 @jwt_required()
 def get_articles():
@@ -37,17 +53,41 @@ def get_articles():
     .subquery()
     )
 
-    query = Article.query.join(subquery, Article.id == subquery.c.id).join(ArticleAuthor)
-    query = query.order_by(db.func.random())
-
-
-    # Search filter (by title, author name, or summary)
+    sort = request.args.get('sort', '')
+    if sort and sort.lstrip('-') not in ARTICLE_SORT_COLUMNS:
+        return jsonify({'error': f"Invalid sort; use one of {', '.join(sorted(ARTICLE_SORT_COLUMNS))}, optionally prefixed with '-'"}), 400
+
+    query = Article.query.join(subquery, Article.id == subquery.c.id).join(ArticleAuthor).join(ArticleMeta)
+    if sort:
+        column = ARTICLE_SORT_COLUMNS[sort.lstrip('-')]
+        # Articles whose stats haven't been computed yet sort last either way
+        query = query.order_by(column.is_(None), column.desc() if sort.startswith('-') else column.asc(), Article.id)
+    else:
+        query = query.order_by(db.func.random())
+
+    # Length filters (read time in minutes, page count)
+    min_read_time = request.args.get('min_read_time', type=int)
+    max_read_time = request.args.get('max_read_time', type=int)
+    min_pages = request.args.get('min_pages', type=int)
+    max_pages = request.args.get('max_pages', type=int)
+    if min_read_time is not None:
+        query = query.filter(ArticleMeta.read_time >= min_read_time)
+    if max_read_time is not None:
+        query = query.filter(ArticleMeta.read_time <= max_read_time)
+    if min_pages is not None:
+        query = query.filter(ArticleMeta.page_count >= min_pages)
+    if max_pages is not None:
+        query = query.filter(ArticleMeta.page_count <= max_pages)
+
+
+    # Search filter (by title, author name, summary, or the text extracted from the PDF)
     if search:
         query = query.filter(
             db.or_(
                 Article.title.ilike(f'%{search}%'),
                 ArticleAuthor.name.ilike(f'%{search}%'),
                 Article.summary.ilike(f'%{search}%'),
+                Article.id.in_(ArticleTextService.matching_article_ids(search)),
             )
         )
 
@@ -79,15 +119,8 @@ def get_article_by_slug(slug):
     # Fetch the article by slug
     article = Article.query.filter_by(slug=slug).first()
     if article:
-        # Check if the user has already viewed this article
-        existing_view = ArticleView.query.filter_by(user_id=user_id, article_meta_id=article.meta.id).first()
-        if not existing_view:
-            # Record the view and increment the views count
-            view = ArticleView(user_id=user_id, article_meta_id=article.meta.id)
-            article.meta.views += 1
-            db.session.add(view)
-            db.session.commit()
-            
+        # Counted in memory and written in batches by ArticleViewBuffer
+        ArticleViewBuffer.record(user_id, article.meta.id)
         return jsonify(article.to_dict()), 200
     
     
@@ -134,6 +167,9 @@ def create_article():
     db.session.add(meta)
     db.session.commit()
 
+    # Prefetch the PDF and index its text in the background
+    JobService.enqueue('article_text_sync', {'article_ids': [article.id]})
+
     return jsonify(article.to_dict()), 201
 
 @article_controller.route('/articles/<string:slug>', methods=['PUT'])
@@ -147,6 +183,8 @@ def update_article(slug):
     if not data:
         return jsonify({"error": "No data provided"}), 400
 
+    pdf_changed = "pdf_url" in data and data["pdf_url"] != article.pdf_url
+
     # Update fields
     for key in ["title", "pdf_url", "category", "summary", "tags", "cover_image_url"]:
         if key in data:
@@ -173,6 +211,9 @@ def update_article(slug):
     article.updated_at = datetime.utcnow()
     db.session.commit()
 
+    if pdf_changed:
+        JobService.enqueue('article_text_sync', {'article_ids': [article.id]})
+
     return jsonify(article.to_dict()), 200
 
 @article_controller.route('/articles/<string:slug>', methods=['DELETE'])
@@ -228,47 +269,37 @@ def get_related_articles(id):
 
     return jsonify({"relatedArticles": related_articles}), 200
 
-@article_controller.route('/articles/<int:id>/like', methods=['POST'])
+# Responses for the like/bookmark endpoints: (active key, counter key, message when set, message when unset)
+REACTION_RESPONSES = {
+    'like': ('liked', 'likes', 'Article liked', 'Article unliked'),
+    'bookmark': ('bookmarked', 'bookmarks', 'Article bookmarked', 'Article unbookmarked'),
+}
+
+def _reaction(kind, id, method):
+    if db.session.query(Article.id).filter_by(id=id).scalar() is None:
+        abort(404)
+    user_id = get_jwt_identity()
+    if method == 'PUT':
+        _, count = ArticleReactionService.add(kind, user_id, id)
+        active = True
+    elif method == 'DELETE':
+        _, count = ArticleReactionService.remove(kind, user_id, id)
+        active = False
+    else:
+        # POST keeps the old toggle behaviour for existing clients
+        active, count = ArticleReactionService.toggle(kind, user_id, id)
+    active_key, count_key, set_message, unset_message = REACTION_RESPONSES[kind]
+    return jsonify({'message': set_message if active else unset_message, active_key: active, count_key: count}), 200
+
+@article_controller.route('/articles/<int:id>/like', methods=['PUT', 'DELETE', 'POST'])
 @jwt_required()
 def like_article(id):
-    user_id = get_jwt_identity()
-    article = Article.query.get_or_404(id)
+    return _reaction('like', id, request.method)
 
-    # Check if already liked
-    existing_like = ArticleLike.query.filter_by(user_id=user_id, article_id=id).first()
-    if existing_like:
-        db.session.delete(existing_like)
-        article.meta.likes_count = max(0, article.meta.likes_count - 1)
-        db.session.commit()
-        return jsonify({'message': 'Article unliked', 'likes': article.meta.likes_count}), 200
-
-    # Add like
-    like = ArticleLike(user_id=user_id, article_id=id)
-    article.meta.likes_count += 1
-    db.session.add(like)
-    db.session.commit()
-    return jsonify({'message': 'Article liked', 'likes': article.meta.likes_count}), 200
-
-@article_controller.route('/articles/<int:id>/bookmark', methods=['POST'])
+@article_controller.route('/articles/<int:id>/bookmark', methods=['PUT', 'DELETE', 'POST'])
 @jwt_required()
 def bookmark_article(id):
-    user_id = get_jwt_identity()
-    article = Article.query.get_or_404(id)
-
-    # Check if already bookmarked
-    existing_bookmark = ArticleBookmark.query.filter_by(user_id=user_id, article_id=id).first()
-    if existing_bookmark:
-        db.session.delete(existing_bookmark)
-        article.meta.bookmarks_count = max(0, article.meta.bookmarks_count - 1)
-        db.session.commit()
-        return jsonify({'message': 'Article unbookmarked', 'bookmarks': article.meta.bookmarks_count}), 200
-
-    # Add bookmark
-    bookmark = ArticleBookmark(user_id=user_id, article_id=id)
-    article.meta.bookmarks_count += 1
-    db.session.add(bookmark)
-    db.session.commit()
-    return jsonify({'message': 'Article bookmarked', 'bookmarks': article.meta.bookmarks_count}), 200
+    return _reaction('bookmark', id, request.method)
 
 @article_controller.route('/user/likes', methods=['GET'])
 @jwt_required()
@@ -287,26 +318,51 @@ def get_user_bookmarks():
     return jsonify({'bookmarkedArticleIds': bookmarked_article_ids}), 200
 
 
-# Proxy endpoint to fetch PDFs from external URLs
+# Proxy endpoint to serve external PDFs from the local PDF cache
 @article_controller.route('/proxy-pdf', methods=['GET'])
+@jwt_required()
 def proxy_pdf():
+    """
+    Serve an external PDF through PdfCache.
+    Cache hits are sent straight from disk with Content-Length, Range
+    (206) and If-Modified-Since / If-None-Match (304) support, so pdf.js
+    can load pages lazily.
+    """
     pdf_url = request.args.get('url')
     logger.debug(f"Received request for PDF URL: {pdf_url}")
     if not pdf_url:
         logger.error("PDF URL is missing")
         abort(400, description="PDF URL is required")
 
-    try:
-        logger.debug(f"Fetching PDF from {pdf_url}")
-        response = requests.get(pdf_url, stream=True)
-        response.raise_for_status()
-        logger.debug(f"PDF fetched successfully, status code: {response.status_code}")
-
-        def generate():
-            for chunk in response.iter_content(chunk_size=8192):
-                yield chunk
-
-        return Response(generate(), content_type='application/pdf')
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Failed to fetch PDF: {str(e)}")
-        abort(500, description=f"Failed to fetch PDF: {str(e)}")
\ No newline at end of file
+    # Only articles' own PDFs (or configured hosts) go through the cache, so the proxy
+    # can't be used to reach arbitrary hosts or to push real PDFs out of the cache
+    allowed_hosts = {host.strip().lower() for host in os.environ.get('PDF_PROXY_ALLOWED_HOSTS', '').split(',') if host.strip()}
+    if (urlparse(pdf_url).hostname or '').lower() not in allowed_hosts and \
+            not db.session.query(Article.query.filter(Article.pdf_url == pdf_url).exists()).scalar():
+        abort(403, description="Only article PDFs can be proxied")
+
+    for attempt in range(2):
+        try:
+            pdf = PdfCache.get_instance().get(pdf_url)
+        except ValueError as e:
+            abort(400, description=str(e))
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch PDF: {str(e)}")
+            abort(502, description=f"Failed to fetch PDF: {str(e)}")
+
+        try:
+            response = send_file(
+                pdf.path,
+                mimetype='application/pdf',
+                conditional=True,
+                etag=pdf.digest,
+                last_modified=pdf.last_modified,
+                max_age=int(os.environ.get('PDF_CLIENT_MAX_AGE', 86400))
+            )
+            break
+        except FileNotFoundError:
+            # Evicted between the lookup and opening it; the next lookup downloads it again
+            if attempt:
+                raise
+    response.headers['Content-Disposition'] = 'inline'
+    return response
@@ -2,28 +2,30 @@
 
 import os
 from flask import Blueprint, request, jsonify
-from flask_bcrypt import Bcrypt
 from app.db import db
 from app.model.User import User
 from app.model.AccountRequest import AccountRequest
 from app.services.UserService import UserService
 from app.services.NotificationService import NotificationService
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from app.services.AuthService import AuthService
+from app.services.PasswordHasher import PasswordHasher
+from app.services.RateLimitService import RateLimitExceeded
+from flask_jwt_extended import jwt_required, get_jwt_identity
 import logging
-from app.services.EmailService import EmailService
-
-# Initialize EmailService
-email_service = EmailService()
+from app.services.EmailOutboxService import EmailOutboxService
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Initialize Bcrypt
-bcrypt = Bcrypt()
-
 auth_bp = Blueprint('auth', __name__)
 
+def _busy_response(error):
+    """503 for requests shed by a saturated PasswordHasher pool."""
+    response = jsonify({'message': str(error), 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     try:
@@ -46,7 +48,7 @@ def login():
         if not user or not user.check_password(password):
             logger.warning("Invalid credentials for email: %s", email)
             return jsonify({'message': 'Invalid email or password'}), 401
-        access_token = create_access_token(identity=str(user.id))
+        access_token = AuthService.create_token(user)
         logger.debug("Generated token for user %s: %s", user.id, access_token)
         
         is_first_login = user.login_count == 0
@@ -67,6 +69,8 @@ def login():
             'access_token': access_token,
             'user': {'id': user.id, 'name': user.name, 'email': user.email, 'role': user.role}
         }), 200
+    except RateLimitExceeded as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error("Login error: %s", str(e))
         return jsonify({'message': 'Server error during login'}), 500
@@ -90,29 +94,25 @@ def register():
             logger.warning("Email already registered or requested: %s", email)
             return jsonify({'message': 'Email already registered or requested'}), 400
 
-        # Hash the password using Bcrypt
-        hashed_password = bcrypt.generate_password_hash(password).decode('utf-8')
+        # Hash the password on the bcrypt worker pool
+        hashed_password = PasswordHasher.get_instance().hash(password)
         account_request = UserService.create_account_request(name, email, hashed_password)
         if not account_request:
             return jsonify({'message': 'Email already requested'}), 400
         
-        # Find all admin users
-        admin_users = User.query.filter_by(role='admin').all()
-        
-        # Create notification for each admin
-        for admin in admin_users:
-            # Create a notification for the admin
-            NotificationService.create_notification(
-                user_id=admin.id,
-                type='info',
-                message=f'New user registration: {name} ({email}) is waiting for approval.'
-            )
+        # Notify every admin with a single INSERT ... SELECT
+        NotificationService.fan_out(
+            'info',
+            f'New user registration: {name} ({email}) is waiting for approval.',
+            role='admin',
+            broadcast=False
+        )
             
             
 
         # Send registration email using service token
         # -----------------------------------------------------------------------------------------
-        result = email_service.send_email(
+        result = EmailOutboxService.enqueue(
             email, 
             'registration', 
             {'userName': name, 'action': 'register'}
@@ -126,6 +126,8 @@ def register():
             'message': 'Account request submitted. Awaiting admin approval.',
             'request_id': account_request.id
         }), 201
+    except RateLimitExceeded as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error("Register error: %s", str(e))
         return jsonify({'message': 'Server error during registration'}), 500
@@ -1,10 +1,13 @@
 import os
 from flask import Blueprint, request, jsonify
 from app.services.ChatBotService import ChatBotService
+from app.services.RateLimitService import RateLimitService, RateLimitExceeded
+from app.services.JobService import JobService
 from flask_jwt_extended import jwt_required, get_jwt_identity
 import logging
 import traceback
 import json
+import hashlib
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -12,6 +15,121 @@ logger = logging.getLogger(__name__)
 
 chatbot_controller = Blueprint('chatbot_controller', __name__)
 
+def _generate_reply(user_id, thread_id, message, language):
+    """Run the chatbot graph for one message and persist the exchange."""
+    try:
+        chatbot_service = ChatBotService()
+        response_json = chatbot_service.chat_with_user(
+            message, 
+            thread_id,
+            user_id=user_id
+        )
+        try:
+            response_data = json.loads(response_json)
+        except Exception as e:
+            logger.error(f"Error parsing ChatBot response: {str(e)}")
+            response_data = {
+                "answer": "Sorry, I couldn't process your request properly.",
+                "follow_up_question": "Can I help you with something else?",
+                "recommended_books": None,
+                "recommended_articles": None
+            }
+        answer = response_data.get("answer", "")
+        follow_up_question = response_data.get("follow_up_question", "")
+        recommended_books = response_data.get("recommended_books", [])
+        recommended_articles = response_data.get("recommended_articles", [])
+        combined_response = answer
+
+        if recommended_books is None:
+            recommended_books = []
+        if recommended_articles is None:
+            recommended_articles = []
+
+        # DEBUG: Log the number of books and articles received
+        logger.debug(f"Received {len(recommended_books)} books and {len(recommended_articles)} articles from chat_with_user")
+
+        # DEBUG: Log book data before formatting
+        if recommended_books:
+            for i, book in enumerate(recommended_books):
+                logger.debug(f"Book {i} data before formatting: {json.dumps(book)}")
+
+        # DEBUG: Log article data before formatting
+        if recommended_articles:
+            for i, article in enumerate(recommended_articles):
+                logger.debug(f"Article {i} data before formatting: {json.dumps(article)}")
+
+        if recommended_books:
+            formatted_book_recommendations = []
+            for book in recommended_books:
+                formatted_book = {
+                    'id': book.get('id', 0),
+                    'title': book.get('title', ''),
+                    'author': book.get('author', ''),
+                    'category': book.get('category', ''),
+                    'rating': float(book.get('rating', 0)),
+                    'cover_url': book.get('cover_url', ''),
+                    'reason': ''
+                }
+                # DEBUG: Log formatted book
+                logger.debug(f"Formatted book: id={formatted_book['id']}, title={formatted_book['title']}")
+                formatted_book_recommendations.append(formatted_book)
+            recommended_books = formatted_book_recommendations
+
+        if recommended_articles:
+            formatted_article_recommendations = []
+            for article in recommended_articles:
+                formatted_article = {
+                    'id': article.get('id', 0),
+                    'slug': article.get('slug', ''),
+                    'title': article.get('title', ''),
+                    'author': article.get('author', ''),
+                    'category': article.get('category', ''),
+                    'summary': article.get('summary', ''),
+                    'pdf_url': article.get('pdf_url', ''),
+                    'cover_image_url': article.get('cover_image_url', 'https://placehold.co/600x300'),
+                    'read_time': int(article.get('read_time', 5)),
+                    'views': int(article.get('views', 0)),
+                    'likes': int(article.get('likes', 0)),
+                    'reason': ''
+                }
+                # DEBUG: Log formatted article
+                logger.debug(f"Formatted article: pdf_url={formatted_article['pdf_url']}, cover_image_url={formatted_article['cover_image_url']}")
+                formatted_article_recommendations.append(formatted_article)
+            recommended_articles = formatted_article_recommendations
+
+        # Save the chat message with the original data
+        chatbot_service._save_chat_message(
+            user_id=user_id,
+            message=message,
+            response=combined_response,
+            language=language,
+            book_recommendations=recommended_books,
+            article_recommendations=recommended_articles,
+            follow_up_question=follow_up_question
+        )
+
+        # DEBUG: Log the final response shape
+        logger.debug(f"Final response contains {len(recommended_books)} books and {len(recommended_articles)} articles")
+
+        return {
+            'response': combined_response,
+            'language': language,
+            'follow_up_question': follow_up_question,
+            'recommended_books': recommended_books,
+            'recommended_articles': recommended_articles
+        }
+    except Exception as e:
+        logger.error(f"Error processing chatbot message: {str(e)}")
+        logger.error(traceback.format_exc())
+        fallback_response = "I'm experiencing some technical difficulties at the moment. Please try again later."
+        return {
+            'response': fallback_response,
+            'language': language,
+            'follow_up_question': "",
+            'recommended_books': [],
+            'recommended_articles': []
+        }
+
 @chatbot_controller.route('/message', methods=['POST'])
 @jwt_required()
 def process_message():
@@ -28,119 +146,23 @@ def process_message():
         message = data.get('message')
         language = data.get('language', 'en')
         logger.debug(f"Processing chatbot message: {message[:50]}... in {language}")
+        thread_id = f"user_{user_id}"
+        # Identical messages already in flight on this thread share one graph run
+        coalesce_key = f"{thread_id}:" + hashlib.sha256(f"{language}:{message}".encode('utf-8')).hexdigest()
         try:
-            thread_id = f"user_{user_id}"
-            chatbot_service = ChatBotService()
-            response_json = chatbot_service.chat_with_user(
-                message, 
-                thread_id,
-                user_id=user_id
-            )
-            try:
-                response_data = json.loads(response_json)
-            except Exception as e:
-                logger.error(f"Error parsing ChatBot response: {str(e)}")
-                response_data = {
-                    "answer": "Sorry, I couldn't process your request properly.",
-                    "follow_up_question": "Can I help you with something else?",
-                    "recommended_books": None,
-                    "recommended_articles": None
-                }
-            answer = response_data.get("answer", "")
-            follow_up_question = response_data.get("follow_up_question", "")
-            recommended_books = response_data.get("recommended_books", [])
-            recommended_articles = response_data.get("recommended_articles", [])
-            combined_response = answer
-
-            if recommended_books is None:
-                recommended_books = []
-            if recommended_articles is None:
-                recommended_articles = []
-
-            # DEBUG: Log the number of books and articles received
-            logger.debug(f"Received {len(recommended_books)} books and {len(recommended_articles)} articles from chat_with_user")
-
-            # DEBUG: Log book data before formatting
-            if recommended_books:
-                for i, book in enumerate(recommended_books):
-                    logger.debug(f"Book {i} data before formatting: {json.dumps(book)}")
-
-            # DEBUG: Log article data before formatting
-            if recommended_articles:
-                for i, article in enumerate(recommended_articles):
-                    logger.debug(f"Article {i} data before formatting: {json.dumps(article)}")
-
-            if recommended_books:
-                formatted_book_recommendations = []
-                for book in recommended_books:
-                    formatted_book = {
-                        'id': book.get('id', 0),
-                        'title': book.get('title', ''),
-                        'author': book.get('author', ''),
-                        'category': book.get('category', ''),
-                        'rating': float(book.get('rating', 0)),
-                        'cover_url': book.get('cover_url', ''),
-                        'reason': ''
-                    }
-                    # DEBUG: Log formatted book
-                    logger.debug(f"Formatted book: id={formatted_book['id']}, title={formatted_book['title']}")
-                    formatted_book_recommendations.append(formatted_book)
-                recommended_books = formatted_book_recommendations
-
-            if recommended_articles:
-                formatted_article_recommendations = []
-                for article in recommended_articles:
-                    formatted_article = {
-                        'id': article.get('id', 0),
-                        'slug': article.get('slug', ''),
-                        'title': article.get('title', ''),
-                        'author': article.get('author', ''),
-                        'category': article.get('category', ''),
-                        'summary': article.get('summary', ''),
-                        'pdf_url': article.get('pdf_url', ''),
-                        'cover_image_url': article.get('cover_image_url', 'https://placehold.co/600x300'),
-                        'read_time': int(article.get('read_time', 5)),
-                        'views': int(article.get('views', 0)),
-                        'likes': int(article.get('likes', 0)),
-                        'reason': ''
-                    }
-                    # DEBUG: Log formatted article
-                    logger.debug(f"Formatted article: pdf_url={formatted_article['pdf_url']}, cover_image_url={formatted_article['cover_image_url']}")
-                    formatted_article_recommendations.append(formatted_article)
-                recommended_articles = formatted_article_recommendations
-
-            # Save the chat message with the original data
-            chatbot_service._save_chat_message(
-                user_id=user_id,
-                message=message,
-                response=combined_response,
-                language=language,
-                book_recommendations=recommended_books,
-                article_recommendations=recommended_articles,
-                follow_up_question=follow_up_question
+            response_data, shared = RateLimitService.get_instance().run(
+                str(user_id),
+                lambda: _generate_reply(user_id, thread_id, message, language),
+                coalesce_key=coalesce_key
             )
-
-            # DEBUG: Log the final response shape
-            logger.debug(f"Final response contains {len(recommended_books)} books and {len(recommended_articles)} articles")
-
-            return jsonify({
-                'response': combined_response,
-                'language': language,
-                'follow_up_question': follow_up_question,
-                'recommended_books': recommended_books,
-                'recommended_articles': recommended_articles
-            }), 200
-        except Exception as e:
-            logger.error(f"Error processing chatbot message: {str(e)}")
-            logger.error(traceback.format_exc())
-            fallback_response = "I'm experiencing some technical difficulties at the moment. Please try again later."
-            return jsonify({
-                'response': fallback_response,
-                'language': language,
-                'follow_up_question': "",
-                'recommended_books': [],
-                'recommended_articles': []
-            }), 200
+        except RateLimitExceeded as e:
+            logger.warning(f"Shedding chatbot message for user {user_id}: {str(e)}")
+            response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+        if shared:
+            logger.debug(f"Coalesced duplicate chatbot message for user {user_id}")
+        return jsonify(response_data), 200
     except Exception as e:
         logger.error(f"Critical error in process_message: {str(e)}")
         return jsonify({'error': 'Server error processing message'}), 500
@@ -148,10 +170,20 @@ def process_message():
 @chatbot_controller.route('/history', methods=['GET'])
 @jwt_required()
 def get_chat_history():
+    """
+    Get the current user's chat history, newest first.
+    Query params:
+        - limit (default=20, max=100): Number of messages per page
+        - cursor (optional): next_cursor from the previous page
+    """
     try:
         user_id = get_jwt_identity()
-        history = ChatBotService.get_user_chat_history(user_id)
-        return jsonify({'chat_history': history}), 200
+        limit = min(max(request.args.get('limit', default=20, type=int), 1), 100)
+        cursor = request.args.get('cursor')
+        result = ChatBotService.get_user_chat_history(user_id, limit=limit, cursor=cursor)
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logger.error(f"Error fetching chat history: {str(e)}")
         return jsonify({'error': 'Server error fetching chat history'}), 500
@@ -174,12 +206,13 @@ def clear_chat_history():
 @chatbot_controller.route('/refresh-vector-store', methods=['POST'])
 @jwt_required()
 def refresh_vector_store():
+    """
+    Queue a background rebuild of the vector store.
+    Poll /admin/jobs/<job_id> for its status.
+    """
     try:
-        success = ChatBotService().refresh_vector_store()
-        if success:
-            return jsonify({"message": "Vector store refreshed successfully."}), 200
-        else:
-            return jsonify({"message": "Vector store refresh not available."}), 404
+        job = JobService.enqueue('refresh_vector_store', created_by=int(get_jwt_identity()))
+        return jsonify({"message": "Vector store refresh queued.", "job": job.to_dict()}), 202
     except Exception as e:
         logger.error(f"Error refreshing vector store: {str(e)}")
         logger.error(traceback.format_exc())
@@ -207,7 +240,8 @@ def health_check():
             'checks': {
                 'vector_store': vector_store_ok,
                 'graph': graph_ok
-            }
+            },
+            'index_sync': chatbot_service.chatbot.index_sync_metrics()
         }), 200
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
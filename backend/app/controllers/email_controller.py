@@ -1,15 +1,13 @@
 # backend/app/controllers/email_controller.py
 
 from flask import Blueprint, request, jsonify
-from app.services.EmailService import EmailService
+from app.services.EmailOutboxService import EmailOutboxService
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.model.User import User
 from app.services.RentalRequestService import RentalRequestService
 from app.model.AccountRequest import AccountRequest
 
 email_controller = Blueprint('email', __name__)
-# Create an instance of EmailService
-email_service = EmailService()
 
 @email_controller.route('/send-registration-email', methods=['POST'])
 def send_registration_email():
@@ -19,12 +17,12 @@ def send_registration_email():
     action = data.get('action')  # e.g., 'register', 'approve'
     if not email or not name or not action:
         return jsonify({'message': 'Email and name are required'}), 400
-    result = email_service.send_email(
+    result = EmailOutboxService.enqueue(
         email, 
         'registration', 
         {'userName': name, 'action': action}
     )
-    return jsonify(result), 200 if result['success'] else 500
+    return jsonify(result), 202 if result['success'] else 500
 
 @email_controller.route('/send-account-approval-email', methods=['POST'])
 @jwt_required()
@@ -40,8 +38,8 @@ def send_account_approval_email():
     user = User.query.filter_by(email=email).first()
     if not user:
         return jsonify({'message': 'User not found'}), 404
-    result = email_service.send_email(email, 'account_approved', {'userName': name, 'action': action})
-    return jsonify(result), 200 if result['success'] else 500
+    result = EmailOutboxService.enqueue(email, 'account_approved', {'userName': name, 'action': action})
+    return jsonify(result), 202 if result['success'] else 500
 
 @email_controller.route('/send-rental-email', methods=['POST'])
 @jwt_required()
@@ -59,8 +57,8 @@ def send_rental_email():
     params = {'userName': user.name, 'bookTitle': book_title, 'action': rental_type}
     if due_date:
         params['dueDate'] = f"<strong>Due date:</strong> {due_date}"
-    result = email_service.send_email(user.email, 'rental', params)
-    return jsonify(result), 200 if result['success'] else 500
+    result = EmailOutboxService.enqueue(user.email, 'rental', params)
+    return jsonify(result), 202 if result['success'] else 500
 
 @email_controller.route('/send-request-action-email', methods=['POST'])
 @jwt_required()
@@ -83,8 +81,8 @@ def send_request_action_email():
         'bookTitle': rental_request.get('book', {}).get('title', 'Unknown'),  # Updated reference
         'action': action
     }
-    result = email_service.send_email(user.email, 'request_action', params)
-    return jsonify(result), 200 if result['success'] else 500
+    result = EmailOutboxService.enqueue(user.email, 'request_action', params)
+    return jsonify(result), 202 if result['success'] else 500
 
 
 @email_controller.route('/send-account-request-action-email', methods=['POST'])
@@ -104,5 +102,5 @@ def send_account_request_action_email():
     if not user:
         return jsonify({'message': 'User not found'}), 404
     params = {'userName': user.name, 'action': action}
-    result = email_service.send_email(user.email, 'account_action', params)
-    return jsonify(result), 200 if result['success'] else 500
\ No newline at end of file
+    result = EmailOutboxService.enqueue(user.email, 'account_action', params)
+    return jsonify(result), 202 if result['success'] else 500
\ No newline at end of file
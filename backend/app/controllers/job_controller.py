@@ -0,0 +1,134 @@
+# backend/app/controllers/job_controller.py
+
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import get_jwt_identity
+from app.services.AuthService import admin_required
+from app.services.JobService import JobService
+from app.services.EmailOutboxService import EmailOutboxService
+from app.services.PasswordHasher import PasswordHasher
+from app.services.PdfCache import PdfCache
+from app.services.ArticleTextService import ArticleTextService
+from app.services.DashboardStatsService import DashboardStatsService
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+job_controller = Blueprint('job_controller', __name__)
+
+@job_controller.route('/jobs', methods=['POST'])
+@admin_required
+def create_job():
+    """
+    Enqueue a background job (admin only).
+    Body: { "type": str, "payload": dict (optional) }
+    """
+    try:
+        data = request.get_json()
+        if not data or 'type' not in data:
+            return jsonify({'error': 'type is required'}), 400
+
+        job = JobService.enqueue(data['type'], data.get('payload'), created_by=int(get_jwt_identity()))
+        return jsonify(job.to_dict()), 202
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Error enqueuing job: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/jobs', methods=['GET'])
+@admin_required
+def get_jobs():
+    """
+    List background jobs (admin only).
+    Query params: page (default=1), per_page (default=10), status, type
+    """
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = min(max(int(request.args.get('per_page', 10)), 1), 100)
+        result = JobService.get_jobs(page, per_page, request.args.get('status'), request.args.get('type'))
+        result['types'] = JobService.registered_types()
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Error fetching jobs: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/jobs/<int:job_id>', methods=['GET'])
+@admin_required
+def get_job(job_id):
+    """
+    Get the status of a background job (admin only).
+    """
+    try:
+        job = JobService.get_job(job_id)
+        return jsonify(job.to_dict()), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        logger.error("Error fetching job: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/email-outbox', methods=['GET'])
+@admin_required
+def get_email_outbox_stats():
+    """
+    Get email outbox counts by status (admin only).
+    """
+    try:
+        return jsonify(EmailOutboxService.get_stats()), 200
+    except Exception as e:
+        logger.error("Error fetching email outbox stats: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/password-hasher', methods=['GET'])
+@admin_required
+def get_password_hasher_stats():
+    """
+    Get this worker's password hashing pool depth and latency (admin only).
+    """
+    try:
+        return jsonify(PasswordHasher.get_instance().get_stats()), 200
+    except Exception as e:
+        logger.error("Error fetching password hasher stats: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/pdf-cache', methods=['GET'])
+@admin_required
+def get_pdf_cache_stats():
+    """
+    Get the size of the PDF proxy's disk cache (admin only).
+    """
+    try:
+        return jsonify(PdfCache.get_instance().get_stats()), 200
+    except Exception as e:
+        logger.error("Error fetching PDF cache stats: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/article-texts', methods=['GET'])
+@admin_required
+def get_article_text_stats():
+    """
+    Get article PDF text extraction progress (admin only).
+    """
+    try:
+        return jsonify(ArticleTextService.get_stats()), 200
+    except Exception as e:
+        logger.error("Error fetching article text stats: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
+@job_controller.route('/stats', methods=['GET'])
+@admin_required
+def get_dashboard_stats():
+    """
+    Get the admin dashboard figures from the materialized metrics tables (admin only).
+    Query params: days (length of the daily series, default 30)
+    """
+    try:
+        days = request.args.get('days', 30, type=int)
+        return jsonify(DashboardStatsService.get_stats(days)), 200
+    except Exception as e:
+        logger.error("Error fetching dashboard stats: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
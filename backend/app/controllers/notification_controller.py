@@ -1,7 +1,17 @@
-from flask import Blueprint, jsonify, request
+import os
+import json
+import time
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.db import db
 from app.services.NotificationService import NotificationService
-from app.model.User import User
+from app.services.NotificationStream import NotificationStream
+from app.services.AuthService import AuthService, admin_required
+
+# Seconds between keep-alive comments, and before a stream is closed so the
+# client reconnects (with Last-Event-ID) and frees the worker thread
+STREAM_HEARTBEAT = float(os.environ.get('NOTIFICATION_STREAM_HEARTBEAT', 15))
+STREAM_MAX_SECONDS = float(os.environ.get('NOTIFICATION_STREAM_MAX_SECONDS', 300))
 
 notification_controller = Blueprint('notification_controller', __name__)
 
@@ -18,12 +28,12 @@ def get_notifications():
     limit = request.args.get('limit', type=int)
     unread_only = request.args.get('unread_only', 'false').lower() == 'true'
     
-    notifications = NotificationService.get_user_notifications(
+    notifications = NotificationService.get_user_feed(
         user_id=user_id, 
         limit=limit,
         unread_only=unread_only
     )
-    return jsonify([notification.to_dict() for notification in notifications]), 200
+    return jsonify(notifications), 200
 
 @notification_controller.route('/notifications/unread-count', methods=['GET'])
 @jwt_required()
@@ -32,10 +42,71 @@ def get_unread_count():
     Get count of unread notifications for the current user.
     """
     user_id = get_jwt_identity()
-    notifications = NotificationService.get_user_notifications(user_id, unread_only=True)
-    unread_count = len(notifications)
+    unread_count = NotificationService.count_unread(user_id)
     return jsonify({'unread_count': unread_count}), 200
 
+def _sse(event_type, data, event_id=None):
+    lines = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{lines}event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+@notification_controller.route('/notifications/stream', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_notifications():
+    """
+    Server-sent events for the current user's notifications.
+    EventSource cannot set headers, so the JWT may be passed as ?token=.
+    Events: notification, unread_count and sync (refetch everything).
+    Reconnects send Last-Event-ID and are replayed the events they missed.
+    """
+    user = AuthService.current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
+
+    stream = NotificationStream.get_instance()
+    channels = stream.channels_for(user)
+    subscription = stream.subscribe(channels)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or ''
+    resume_from = int(last_event_id) if last_event_id.isdigit() else None
+    missed = stream.replay(channels, resume_from) if resume_from is not None else []
+    unread_count = NotificationService.count_unread(user.id)
+    # The generator never touches the database; give the pooled connection back
+    # instead of holding it for the life of the stream
+    db.session.remove()
+
+    def generate():
+        sent_up_to = resume_from if resume_from is not None and missed is not None else 0
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        try:
+            yield "retry: 5000\n\n"
+            if missed is None:
+                yield _sse('sync', {})
+            for event_id, _, event_type, data in missed or []:
+                sent_up_to = event_id
+                yield _sse(event_type, data, event_id)
+            yield _sse('unread_count', {'unread_count': unread_count})
+
+            while time.monotonic() < deadline:
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield _sse('sync', {})
+                event = subscription.get(timeout=STREAM_HEARTBEAT)
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                event_id, _, event_type, data = event
+                if event_id <= sent_up_to:
+                    continue  # already replayed
+                sent_up_to = event_id
+                yield _sse(event_type, data, event_id)
+        finally:
+            stream.unsubscribe(subscription)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @notification_controller.route('/notifications/<int:notification_id>/read', methods=['PUT'])
 @jwt_required()
 def mark_as_read(notification_id):
@@ -47,6 +118,17 @@ def mark_as_read(notification_id):
         return jsonify(notification.to_dict()), 200
     return jsonify({'error': 'Notification not found'}), 404
 
+@notification_controller.route('/notifications/broadcast-<int:broadcast_id>/read', methods=['PUT'])
+@jwt_required()
+def mark_broadcast_as_read(broadcast_id):
+    """
+    Mark a broadcast as read for the current user.
+    """
+    broadcast = NotificationService.mark_broadcast_read(get_jwt_identity(), broadcast_id)
+    if broadcast:
+        return jsonify(broadcast.to_dict(read=True)), 200
+    return jsonify({'error': 'Notification not found'}), 404
+
 @notification_controller.route('/notifications/mark-all-read', methods=['PUT'])
 @jwt_required()
 def mark_all_as_read():
@@ -68,41 +150,43 @@ def delete_notification(notification_id):
         return jsonify({'message': 'Notification deleted'}), 200
     return jsonify({'error': 'Notification not found'}), 404
 
-@notification_controller.route('/admin/notifications', methods=['POST'])
+@notification_controller.route('/notifications/broadcast-<int:broadcast_id>', methods=['DELETE'])
 @jwt_required()
+def dismiss_broadcast(broadcast_id):
+    """
+    Hide a broadcast from the current user's notifications.
+    """
+    broadcast = NotificationService.mark_broadcast_read(get_jwt_identity(), broadcast_id, dismiss=True)
+    if broadcast:
+        return jsonify({'message': 'Notification deleted'}), 200
+    return jsonify({'error': 'Notification not found'}), 404
+
+@notification_controller.route('/admin/notifications', methods=['POST'])
+@admin_required
 def create_system_notification():
     """
-    Create a system notification for all users or specific users.
-    Body: { "message": str, "user_ids": list[int] (optional) }
+    Create a system notification for all users, one role or specific users.
+    Body: { "message": str, "user_ids": list[int] (optional), "role": str (optional),
+            "broadcast": bool (optional, defaults to true for large audiences) }
     """
-    # Check if admin
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-        
     data = request.get_json()
     if not data or 'message' not in data:
         return jsonify({'error': 'Message is required'}), 400
-        
-    if 'user_ids' in data and isinstance(data['user_ids'], list):
-        # Send to specific users
-        for uid in data['user_ids']:
-            NotificationService.create_notification(
-                user_id=uid,
-                type='info',
-                message=data['message']
-            )
-        return jsonify({'message': f'Notification sent to {len(data["user_ids"])} users'}), 200
-    else:
-        # Send to all users
-        users = User.query.all()
-        for user in users:
-            NotificationService.create_notification(
-                user_id=user.id,
-                type='info',
-                message=data['message']
-            )
-        return jsonify({'message': f'Notification sent to all users ({len(users)})'}), 200
-
 
+    try:
+        if 'user_ids' in data and isinstance(data['user_ids'], list):
+            # Send to specific users
+            result = NotificationService.fan_out('info', data['message'], user_ids=data['user_ids'])
+            return jsonify({'message': f'Notification sent to {result["recipients"]} users', **result}), 200
+        else:
+            # Send to all users (or one role)
+            result = NotificationService.fan_out(
+                'info',
+                data['message'],
+                role=data.get('role'),
+                broadcast=data.get('broadcast'),
+                created_by=int(get_jwt_identity())
+            )
+            return jsonify({'message': f'Notification sent to all users ({result["recipients"]})', **result}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
@@ -3,6 +3,7 @@
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.AuthService import AuthService, admin_required
 from app.services.RentalService import RentalService
 from app.services.NotificationService import NotificationService
 from app.model.User import User
@@ -10,12 +11,7 @@ from app.model.Rental import Rental
 from sqlalchemy.exc import IntegrityError
 import logging
 import requests
-from app.services.EmailService import EmailService
-
-
-# Initialize EmailService
-email_service = EmailService()
-
+from app.services.EmailOutboxService import EmailOutboxService
 
 # configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -24,26 +20,15 @@ logger = logging.getLogger(__name__)
 
 
 rental_controller = Blueprint('rental_controller', __name__)
-def check_admin():
-    """Helper to verify if the current user is an admin."""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user or user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    return None
 
 @rental_controller.route('/rentals', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_rental():
     """
     Create a new rental (admin only).
     Body: { "user_id": int, "book_id": int }
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-
         data = request.get_json()
         if not data or 'user_id' not in data or 'book_id' not in data:
             return jsonify({'error': 'user_id and book_id are required'}), 400
@@ -52,7 +37,7 @@ def create_rental():
         
         # Send email notification
         # -----------------------------------------------------------------------------------------
-        # Direct EmailService call:
+        # Queue the email on the outbox:
         user = User.query.get(data['user_id'])  # Get the user who is renting
         if user:
             params = {
@@ -63,7 +48,7 @@ def create_rental():
             if rental.returned_at:
                 params['dueDate'] = f"<strong>Due date:</strong> {rental.returned_at.strftime('%Y-%m-%d %H:%M:%S')}"
             
-            result = email_service.send_email(
+            result = EmailOutboxService.enqueue(
                 user.email,
                 'rental', 
                 params
@@ -82,7 +67,7 @@ def create_rental():
 
 
 @rental_controller.route('/rentals', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_rentals():
     """
     Get all rentals with pagination and filters (admin only).
@@ -95,11 +80,6 @@ def get_all_rentals():
         JSON response with rentals, total count, and total pages
     """
     try:
-        # Check if user is admin
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-
         # Extract query parameters
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
@@ -132,8 +112,7 @@ def get_rental(rental_id):
         rental = RentalService.get_rental_by_id(rental_id)
         
         # Allow access if user owns the rental or is admin
-        user = User.query.get(user_id)
-        if rental.user_id != user_id and user.role != 'admin':
+        if rental.user_id != int(user_id) and not AuthService.is_admin():
             return jsonify({'error': 'Unauthorized access'}), 403
             
         return jsonify(rental.to_dict()), 200
@@ -143,17 +122,13 @@ def get_rental(rental_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_controller.route('/rentals/<int:rental_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_rental(rental_id):
     """
     Update a rental's details (admin only).
-    Body: { "user_id": int, "book_id": int, "rented_at": str, "returned_at": str|null }
+    Body: { "user_id": int, "book_id": int, "rented_at": str, "due_at": str, "returned_at": str|null }
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
@@ -168,16 +143,12 @@ def update_rental(rental_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_controller.route('/rentals/<int:rental_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_rental(rental_id):
     """
     Delete a rental (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-
         result = RentalService.delete_rental(rental_id)
         return jsonify(result), 200
     except ValueError as e:
@@ -186,43 +157,33 @@ def delete_rental(rental_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_controller.route('/rentals/bulk', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def bulk_delete_rentals():
     """
     Delete multiple rentals (admin only).
     Body: { "rental_ids": [int] }
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-
         data = request.get_json()
         if not data or 'rental_ids' not in data or not isinstance(data['rental_ids'], list):
             return jsonify({'error': 'rental_ids array is required'}), 400
 
         result = RentalService.bulk_delete_rentals(data['rental_ids'])
-        
+        notifications = result.pop('notifications')
+
         # Send email notification
         # -----------------------------------------------------------------------------------------
-        # Send emails for each rental being deleted
-        for rental_id in data['rental_ids']:
-            rental = Rental.query.get(rental_id)
-            if rental and rental.book and rental.book.title:
-                # Get the user who rented the book
-                user = User.query.get(rental.user_id)
-                if user:
-                    result = email_service.send_email(
-                        user.email,
-                        'rental',
-                        {
-                            'userName': user.name,
-                            'bookTitle': rental.book.title,
-                            'action': 'delete'
-                        }
-                    )
-                    if not result['success']:
-                        logger.error("Failed to send delete rental email for rental ID %s: %s", rental_id, result['message'])
+        # Details were captured before deletion; the emails are queued with one INSERT
+        if notifications:
+            EmailOutboxService.enqueue_many([{
+                'to_email': notice['email'],
+                'notification_type': 'rental',
+                'params': {
+                    'userName': notice['name'],
+                    'bookTitle': notice['book_title'],
+                    'action': 'delete'
+                }
+            } for notice in notifications])
         # -----------------------------------------------------------------------------------------
         return jsonify(result), 200
     except ValueError as e:
@@ -231,32 +192,24 @@ def bulk_delete_rentals():
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_controller.route('/rentals/active', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_active_rentals():
     """
     Get all active (unreturned) rentals (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-        
         rentals = RentalService.get_active_rentals()
         return jsonify({'rentals': rentals}), 200
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_controller.route('/rentals/<int:rental_id>/return', methods=['PUT'])
-@jwt_required()
+@admin_required
 def return_rental(rental_id):
     """
     Mark a rental as returned (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-        
         rental = RentalService.return_book(rental_id)
         if not rental:
             return jsonify({'error': 'Rental not found'}), 404
@@ -274,7 +227,7 @@ def return_rental(rental_id):
         # Get the user who rented the book
         user = User.query.get(rental.user_id)
         if user:
-            result = email_service.send_email(
+            result = EmailOutboxService.enqueue(
                 user.email,
                 'rental',
                 {
@@ -3,17 +3,13 @@
 
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.AuthService import AuthService, admin_required
 import requests
 from app.model.User import User
 from app.services.RentalRequestService import RentalRequestService
 from app.services.NotificationService import NotificationService
 import logging
-from app.services.EmailService import EmailService
-
-
-# Initialize EmailService
-email_service = EmailService()
-
+from app.services.EmailOutboxService import EmailOutboxService
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -21,14 +17,6 @@ logger = logging.getLogger(__name__)
 
 
 rental_request_controller = Blueprint('rental_request_controller', __name__)
-def check_admin():
-    """Helper to verify if the current user is an admin."""
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    if not user or user.role != 'admin':
-        logger.warning("Admin access required: %s", user_id)
-        return jsonify({'error': 'Admin access required'}), 403
-    return None
 
 @rental_request_controller.route('/rental_requests', methods=['POST'])
 @jwt_required()
@@ -57,22 +45,19 @@ def create_rental_request():
             message=f'Your request to borrow "{rental_request["book"]["title"]}" has been submitted.'
         )
         
-        # Add notification for admins
-        admin_users = User.query.filter_by(role='admin').all()
+        # Notify every admin with a single INSERT ... SELECT
         user = User.query.get(user_id)
-        
-        for admin in admin_users:
-            # Create a notification for each admin
-            NotificationService.create_notification(
-                user_id=admin.id,
-                type='info',
-                message=f'New borrow request: {user.name} requested "{rental_request["book"]["title"]}".'
-            )
+        NotificationService.fan_out(
+            'info',
+            f'New borrow request: {user.name} requested "{rental_request["book"]["title"]}".',
+            role='admin',
+            broadcast=False
+        )
         
         
         # Send email notification to user
         # -----------------------------------------------------------------------------------------
-        # Direct EmailService call:
+        # Queue the email on the outbox:
         user = User.query.get(user_id)
         if user:
             params = {
@@ -83,7 +68,7 @@ def create_rental_request():
             if 'due_date' in rental_request and rental_request['due_date']:
                 params['dueDate'] = f"<strong>Due date:</strong> {rental_request['due_date']}"
             
-            result = email_service.send_email(
+            result = EmailOutboxService.enqueue(
                 user.email,
                 'rental', 
                 params
@@ -98,23 +83,19 @@ def create_rental_request():
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_request_controller.route('/rental_requests/pending', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_pending_requests():
     """
     Get all pending rental requests (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-        
         requests = RentalRequestService.get_pending_requests()
         return jsonify({'requests': requests}), 200
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_request_controller.route('/rental_requests', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_requests():
     """
     Get all rental requests with pagination and filters (admin only).
@@ -127,11 +108,6 @@ def get_all_requests():
         JSON response with rental requests, total count, and total pages
     """
     try:
-        # Check if user is admin
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-
         # Extract query parameters
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
@@ -183,8 +159,7 @@ def get_rental_request(request_id):
         request_data = RentalRequestService.get_request_by_id(request_id)
         
         # Allow access if user owns the request or is admin
-        user = User.query.get(user_id)
-        if request_data['user_id'] != user_id and user.role != 'admin':
+        if request_data['user_id'] != int(user_id) and not AuthService.is_admin():
             return jsonify({'error': 'Unauthorized access'}), 403
             
         return jsonify(request_data), 200
@@ -194,16 +169,12 @@ def get_rental_request(request_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_request_controller.route('/rental_requests/<int:request_id>/approve', methods=['PUT'])
-@jwt_required()
+@admin_required
 def approve_rental_request(request_id):
     """
     Approve a rental request, create a rental, and update book (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-        
         request_data = RentalRequestService.approve_request(request_id)
         
         if not request_data:
@@ -222,7 +193,7 @@ def approve_rental_request(request_id):
         # Get the user from the request data
         user = User.query.get(request_data['user_id'])
         if user:
-            result = email_service.send_email(
+            result = EmailOutboxService.enqueue(
                 user.email,
                 'request_action',
                 {
@@ -241,17 +212,36 @@ def approve_rental_request(request_id):
     except Exception as e:
         return jsonify({'error': 'Internal server error'}), 500
 
+@rental_request_controller.route('/rental_requests/batch', methods=['PUT'])
+@admin_required
+def batch_process_rental_requests():
+    """
+    Approve or reject many rental requests at once (admin only).
+    Body: { "request_ids": [int], "action": "approve" | "reject" }
+    Notifications and emails are sent in the background.
+    """
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('request_ids'), list) or 'action' not in data:
+            return jsonify({'error': 'request_ids array and action are required'}), 400
+        if len(data['request_ids']) > 1000:
+            return jsonify({'error': 'At most 1000 requests can be processed at once'}), 400
+
+        result = RentalRequestService.batch_process(data['request_ids'], data['action'])
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error("Error batch processing rental requests: %s", str(e))
+        return jsonify({'error': 'Internal server error'}), 500
+
 @rental_request_controller.route('/rental_requests/<int:request_id>/reject', methods=['PUT'])
-@jwt_required()
+@admin_required
 def reject_rental_request(request_id):
     """
     Reject a rental request (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-        
         request_data = RentalRequestService.reject_request(request_id)
         
         if not request_data:
@@ -270,7 +260,7 @@ def reject_rental_request(request_id):
         # Get the user from the request data
         user = User.query.get(request_data['user_id'])
         if user:
-            result = email_service.send_email(
+            result = EmailOutboxService.enqueue(
                 user.email,
                 'request_action',
                 {
@@ -309,7 +299,7 @@ def cancel_rental_request(request_id):
             # Get the user
             user = User.query.get(user_id)
             if user:
-                result = email_service.send_email(
+                result = EmailOutboxService.enqueue(
                     user.email,
                     'request_action',
                     {
@@ -329,16 +319,12 @@ def cancel_rental_request(request_id):
         return jsonify({'error': 'Internal server error'}), 500
 
 @rental_request_controller.route('/rental_requests/requested_books', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_requested_books():
     """
     Get all books with pending rental requests (admin only).
     """
     try:
-        admin_check = check_admin()
-        if admin_check:
-            return admin_check
-        
         books = RentalRequestService.get_all_requested_books()
         return jsonify({'books': books}), 200
     except Exception as e:
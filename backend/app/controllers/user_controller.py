@@ -1,12 +1,13 @@
 from flask import Blueprint, request, jsonify
 from app.services.UserService import UserService
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.model.User import User
+from app.services.AuthService import AuthService, admin_required
+from app.serializers.UserSerializer import UserSerializer
 
 user_controller = Blueprint('user_controller', __name__)
 
 @user_controller.route('/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_users():
     # Get pagination parameters
     page = request.args.get('page', default=1, type=int)
@@ -14,27 +15,30 @@ def get_all_users():
     search = request.args.get('search', default='', type=str)
     role = request.args.get('role', default=None, type=str)
     
+    # Response shape: a named view, optionally narrowed with ?fields=a,b,c
+    try:
+        fields = UserSerializer.select_fields(
+            request.args.get('view', default='admin-row', type=str),
+            UserSerializer.parse_fields(request.args.get('fields'))
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     # Limit per_page to reasonable values
     per_page = min(max(per_page, 1), 50)  # Between 1 and 50
     
-    # Check if user is admin before returning all users
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or current_user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
     # Get paginated users from service
     users, total_count, total_pages = UserService.get_paginated_users(
         page=page, 
         per_page=per_page,
         search=search,
-        role=role
+        role=role,
+        fields=fields
     )
     
     # Return paginated response
     return jsonify({
-        'users': [user.to_dict() for user in users],
+        'users': UserSerializer.dump_many(users, fields),
         'total_count': total_count,
         'total_pages': total_pages,
         'page': page,
@@ -44,21 +48,21 @@ def get_all_users():
 @user_controller.route('/users/<int:user_id>', methods=['GET'])
 @jwt_required()
 def get_user_by_id(user_id):
-    user = UserService.get_user_by_id(user_id)
+    try:
+        fields = UserSerializer.select_fields(
+            request.args.get('view', default='detail', type=str),
+            UserSerializer.parse_fields(request.args.get('fields'))
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    user = UserService.get_user_by_id(user_id, fields=fields)
     if not user:
         return jsonify({'error': 'User not found'}), 404
-    return jsonify(user.to_dict()), 200
+    return jsonify(UserSerializer.dump(user, fields)), 200
 
 @user_controller.route('/users', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_user():
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or current_user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
     data = request.get_json()
     name = data.get('name')
     email = data.get('email')
@@ -78,20 +82,20 @@ def create_user():
 @jwt_required()
 def update_user(user_id):
     # Check if user is admin or updating themselves
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    current_user = AuthService.current_user()
+    is_admin = AuthService.is_admin()
     
-    if not current_user or (current_user.role != 'admin' and current_user.id != user_id):
+    if not current_user or (not is_admin and current_user.id != user_id):
         return jsonify({'error': 'Unauthorized access'}), 403
     
     data = request.get_json()
     
     # If not admin, cannot change role
-    if current_user.role != 'admin' and data.get('role'):
+    if not is_admin and data.get('role'):
         return jsonify({'error': 'Cannot change role'}), 403
     
     # Only admins can change another user's role to admin
-    if current_user.role != 'admin' and data.get('role') == 'admin':
+    if not is_admin and data.get('role') == 'admin':
         return jsonify({'error': 'Cannot assign admin role'}), 403
     
     user = UserService.update_user(
@@ -107,15 +111,8 @@ def update_user(user_id):
     return jsonify(user.to_dict()), 200
 
 @user_controller.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_user(user_id):
-    # Check if user is admin
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-    
-    if not current_user or current_user.role != 'admin':
-        return jsonify({'error': 'Admin access required'}), 403
-    
     # Prevent deleting admin users
     user = UserService.get_user_by_id(user_id)
     if not user:
@@ -125,7 +122,7 @@ def delete_user(user_id):
         return jsonify({'error': 'Admin users cannot be deleted'}), 403
     
     # Prevent deleting yourself
-    if user_id == current_user_id:
+    if user_id == int(get_jwt_identity()):
         return jsonify({'error': 'Cannot delete your own account'}), 403
         
     success = UserService.delete_user(user_id)
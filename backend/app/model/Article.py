@@ -11,7 +11,7 @@ class Article(db.Model):
     category = db.Column(db.String(50), nullable=False)
     author_id = db.Column(db.Integer, db.ForeignKey('article_authors.id'), nullable=False)
     summary = db.Column(db.Text, nullable=False)
-    pdf_url = db.Column(db.String(255), nullable=False)  # Replaced content with pdf_url
+    pdf_url = db.Column(db.String(255), nullable=False, index=True)  # Replaced content with pdf_url
     tags = db.Column(db.JSON, nullable=False, default=[])
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=True)
@@ -20,6 +20,9 @@ class Article(db.Model):
     meta = db.relationship('ArticleMeta', back_populates='article', uselist=False, cascade="all, delete-orphan")
     likes = db.relationship('ArticleLike', back_populates='article', cascade="all, delete-orphan")
     bookmarks = db.relationship('ArticleBookmark', back_populates='article', cascade="all, delete-orphan")
+    text = db.relationship('ArticleText', back_populates='article', uselist=False, cascade="all, delete-orphan")
+    text_chunks = db.relationship('ArticleTextChunk', back_populates='article', cascade="all, delete-orphan",
+                                  order_by='ArticleTextChunk.chunk_index')
     
     def __repr__(self):
         return f"<Article {self.title}>"
@@ -6,10 +6,15 @@ class ArticleMeta(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     article_id = db.Column(db.Integer, db.ForeignKey('articles.id'), nullable=False, unique=True)
-    read_time = db.Column(db.Integer, nullable=False, default=5)  # in minutes
+    read_time = db.Column(db.Integer, nullable=False, default=5, index=True)  # in minutes
     views = db.Column(db.Integer, nullable=False, default=0)  # Integer column for view count
     likes_count = db.Column(db.Integer, nullable=False, default=0)
     bookmarks_count = db.Column(db.Integer, nullable=False, default=0)
+    # Computed from the extracted PDF text by ArticleTextService.update_reading_stats
+    page_count = db.Column(db.Integer, nullable=True, index=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    stats_source_url = db.Column(db.String(255), nullable=True)  # pdf_url the stats were computed from
+    stats_computed_at = db.Column(db.DateTime, nullable=True)
 
     article = db.relationship('Article', back_populates='meta', uselist=False)
     view_records = db.relationship('ArticleView', back_populates='article_meta', cascade="all, delete-orphan")  # Renamed relationship
@@ -22,5 +27,7 @@ class ArticleMeta(db.Model):
             'readTime': self.read_time,
             'views': self.views,
             'likes': self.likes_count,
-            'bookmarks': self.bookmarks_count
+            'bookmarks': self.bookmarks_count,
+            'pageCount': self.page_count,
+            'wordCount': self.word_count
     }        
\ No newline at end of file
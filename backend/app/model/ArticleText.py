@@ -0,0 +1,43 @@
+from app.db import db
+from datetime import datetime
+
+class ArticleText(db.Model):
+    """Text extraction state for an article's PDF, maintained by ArticleTextService"""
+    __tablename__ = 'article_texts'
+    __table_args__ = (
+        db.Index('ix_article_texts_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id'), primary_key=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processing, extracted, failed
+    source_url = db.Column(db.String(255), nullable=True)  # pdf_url the text was extracted from
+    content_digest = db.Column(db.String(64), nullable=True)  # SHA-256 of the PDF in PdfCache
+    page_count = db.Column(db.Integer, nullable=True)
+    char_count = db.Column(db.Integer, nullable=True)
+    word_count = db.Column(db.Integer, nullable=True)
+    chunk_count = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    extracted_at = db.Column(db.DateTime, nullable=True)
+
+    article = db.relationship('Article', back_populates='text')
+
+    def __repr__(self):
+        return f"<ArticleText article_id={self.article_id} ({self.status})>"
+
+    def to_dict(self):
+        return {
+            'article_id': self.article_id,
+            'status': self.status,
+            'source_url': self.source_url,
+            'page_count': self.page_count,
+            'char_count': self.char_count,
+            'word_count': self.word_count,
+            'chunk_count': self.chunk_count,
+            'attempts': self.attempts,
+            'last_error': self.last_error,
+            'updated_at': self.updated_at.isoformat() + 'Z' if self.updated_at else None,
+            'extracted_at': self.extracted_at.isoformat() + 'Z' if self.extracted_at else None
+        }
@@ -0,0 +1,30 @@
+from app.db import db
+from sqlalchemy import DDL, event
+
+class ArticleTextChunk(db.Model):
+    """A passage of an article's extracted PDF text, used for full-text and semantic search"""
+    __tablename__ = 'article_text_chunks'
+    __table_args__ = (
+        db.Index('ix_article_text_chunks_article_chunk', 'article_id', 'chunk_index', unique=True),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id'), nullable=False)
+    chunk_index = db.Column(db.Integer, nullable=False)
+    page_start = db.Column(db.Integer, nullable=False)  # 1-based
+    page_end = db.Column(db.Integer, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+
+    article = db.relationship('Article', back_populates='text_chunks')
+
+    def __repr__(self):
+        return f"<ArticleTextChunk article_id={self.article_id} #{self.chunk_index}>"
+
+
+# PostgreSQL gets a GIN index for to_tsvector matching; other databases fall back to LIKE
+event.listen(
+    ArticleTextChunk.__table__,
+    'after_create',
+    DDL("CREATE INDEX ix_article_text_chunks_fts ON article_text_chunks "
+        "USING gin (to_tsvector('english', content))").execute_if(dialect='postgresql')
+)
@@ -3,6 +3,9 @@ from datetime import datetime
 
 class ArticleView(db.Model):
     __tablename__ = 'article_views'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'article_meta_id', name='uq_article_views_user_meta'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, nullable=False)
@@ -0,0 +1,31 @@
+from app.db import db
+from datetime import datetime, timezone
+
+class Broadcast(db.Model):
+    """A notification shared by a whole audience; per-user state lives in BroadcastReceipt"""
+    __tablename__ = 'broadcasts'
+    __table_args__ = (
+        db.Index('ix_broadcasts_role_created', 'audience_role', 'created_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    type = db.Column(db.String(50), nullable=False)
+    message = db.Column(db.String(500), nullable=False)
+    audience_role = db.Column(db.String(10), nullable=True)  # None means every user
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Broadcast {self.id} to {self.audience_role or 'all'}>"
+
+    def to_dict(self, read=False):
+        """Serialize in the same shape as Notification.to_dict for a given reader."""
+        created_at_utc = self.created_at.replace(tzinfo=timezone.utc)
+        return {
+            'id': f"broadcast-{self.id}",
+            'type': self.type,
+            'message': self.message,
+            'read': read,
+            'broadcast': True,
+            'created_at': created_at_utc.isoformat()
+        }
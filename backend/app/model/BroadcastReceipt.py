@@ -0,0 +1,14 @@
+from app.db import db
+from datetime import datetime
+
+class BroadcastReceipt(db.Model):
+    """Per-user read/dismissed state for a Broadcast; absent means unread"""
+    __tablename__ = 'broadcast_receipts'
+
+    broadcast_id = db.Column(db.Integer, db.ForeignKey('broadcasts.id', ondelete='CASCADE'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    read_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    dismissed = db.Column(db.Boolean, nullable=False, default=False)
+
+    def __repr__(self):
+        return f"<BroadcastReceipt broadcast={self.broadcast_id} user={self.user_id}>"
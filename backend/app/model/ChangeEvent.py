@@ -0,0 +1,24 @@
+from app.db import db
+from datetime import datetime
+
+class ChangeEvent(db.Model):
+    """Transactional outbox row describing a write to an indexed entity"""
+    __tablename__ = 'change_events'
+
+    id = db.Column(db.Integer, primary_key=True)  # Monotonic position in the change stream
+    entity_type = db.Column(db.String(30), nullable=False)  # book, article
+    entity_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)  # upsert, delete
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChangeEvent {self.id} {self.op} {self.entity_type}:{self.entity_id}>"
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'op': self.op,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
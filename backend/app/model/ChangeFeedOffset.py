@@ -0,0 +1,13 @@
+from app.db import db
+from datetime import datetime
+
+class ChangeFeedOffset(db.Model):
+    """Last change_events ID processed by a durable change feed consumer"""
+    __tablename__ = 'change_feed_offsets'
+
+    consumer = db.Column(db.String(50), primary_key=True)
+    last_event_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChangeFeedOffset {self.consumer}={self.last_event_id}>"
@@ -0,0 +1,24 @@
+from app.db import db
+from datetime import datetime
+
+class ChatFeedback(db.Model):
+    """Feedback submitted about chatbot interactions"""
+    __tablename__ = "chat_feedback"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    message = db.Column(db.Text, nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChatFeedback id={self.id} user_id={self.user_id} rating={self.rating}>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "message": self.message,
+            "rating": self.rating,
+            "created_at": self.created_at.isoformat() if self.created_at else None
+        }
@@ -12,6 +12,10 @@ logger = logging.getLogger(__name__)
 class ChatMessage(db.Model):
     """Model for storing chat messages with book and article recommendations"""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        # Backs the keyset-paginated history query (newest first per user)
+        db.Index("ix_chat_messages_user_created", "user_id", "created_at"),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -19,8 +23,8 @@ class ChatMessage(db.Model):
     response = db.Column(db.Text, nullable=False)
     language = db.Column(db.String(2), default="en")
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    book_recommendations = db.Column(db.Text, nullable=True)  # Store as JSON string
-    article_recommendations = db.Column(db.Text, nullable=True)  # Store as JSON string
+    book_recommendations = db.Column(db.JSON, nullable=True)
+    article_recommendations = db.Column(db.JSON, nullable=True)
     follow_up_question = db.Column(db.Text, nullable=True)
     
     # Add relationship to User for easier querying
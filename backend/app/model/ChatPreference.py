@@ -0,0 +1,20 @@
+from app.db import db
+from datetime import datetime
+
+class ChatPreference(db.Model):
+    """Recommendation preferences a user set through the chatbot (one row per user)"""
+    __tablename__ = "chat_preferences"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), primary_key=True)
+    preferences = db.Column(db.JSON, nullable=False, default=dict)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ChatPreference user_id={self.user_id}>"
+
+    def to_dict(self):
+        return {
+            "user_id": self.user_id,
+            "preferences": self.preferences or {},
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
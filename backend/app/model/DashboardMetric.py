@@ -0,0 +1,14 @@
+from app.db import db
+from datetime import datetime
+
+class DashboardMetric(db.Model):
+    """A materialized admin dashboard figure, maintained by DashboardStatsService"""
+    __tablename__ = 'dashboard_metrics'
+
+    metric = db.Column(db.String(50), primary_key=True)  # e.g. rentals, rental_requests, top_categories
+    dimension = db.Column(db.String(100), primary_key=True, default='')  # e.g. active, pending, a category name
+    value = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DashboardMetric {self.metric}[{self.dimension}]={self.value}>"
@@ -0,0 +1,14 @@
+from app.db import db
+from datetime import datetime
+
+class DashboardMetricBucket(db.Model):
+    """Daily count of an admin dashboard time series, maintained by DashboardStatsService"""
+    __tablename__ = 'dashboard_metric_buckets'
+
+    metric = db.Column(db.String(50), primary_key=True)  # rental_requests, rentals, returns, new_users
+    day = db.Column(db.Date, primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<DashboardMetricBucket {self.metric} {self.day}={self.value}>"
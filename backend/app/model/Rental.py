@@ -3,12 +3,17 @@ from app.db import db
 
 class Rental(db.Model):
     __tablename__ = 'rentals'
+    __table_args__ = (
+        # Active rentals (returned_at IS NULL) ordered by due date, for the due-date scanner
+        db.Index('ix_rentals_returned_due', 'returned_at', 'due_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'))
-    rented_at = db.Column(db.DateTime, default=datetime.utcnow)
+    rented_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     returned_at = db.Column(db.DateTime, nullable=True)
+    due_at = db.Column(db.DateTime, nullable=True)
 
     user = db.relationship('User', back_populates='rentals')
     book = db.relationship('Book', back_populates='rentals')
@@ -23,6 +28,7 @@ class Rental(db.Model):
             'book_id': self.book_id,
             'rented_at': self.rented_at.strftime('%Y-%m-%d %H:%M:%S') if self.rented_at else None,
             'returned_at': self.returned_at.strftime('%Y-%m-%d %H:%M:%S') if self.returned_at else None,
+            'due_at': self.due_at.strftime('%Y-%m-%d %H:%M:%S') if self.due_at else None,
             'user': {
                 'id': self.user.id if self.user else None,
                 'name': self.user.name if self.user else None,
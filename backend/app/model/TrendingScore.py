@@ -0,0 +1,20 @@
+from app.db import db
+from datetime import datetime
+
+class TrendingScore(db.Model):
+    """Exponentially decayed activity score for a book or article, maintained by TrendingService"""
+    __tablename__ = 'trending_scores'
+    __table_args__ = (
+        db.Index('ix_trending_scores_rank', 'item_type', 'period', 'score'),
+    )
+
+    item_type = db.Column(db.String(20), primary_key=True)  # book, article
+    item_id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(10), primary_key=True)  # hour, day, week (the score's half-life)
+    # Natural log of the forward-decayed score, so rows rank by it directly
+    score = db.Column(db.Float, nullable=False)
+    events = db.Column(db.Integer, nullable=False, default=0)
+    last_event_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<TrendingScore {self.item_type} {self.item_id} ({self.period})>"
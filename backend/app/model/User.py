@@ -1,8 +1,7 @@
 from app.db import db
-from flask_bcrypt import Bcrypt
+from sqlalchemy.orm import query_expression
 from datetime import datetime
-
-bcrypt = Bcrypt()
+from app.services.PasswordHasher import PasswordHasher
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -11,8 +10,10 @@ class User(db.Model):
     email = db.Column(db.String(120), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
     role = db.Column(db.String(10), default='user')
-    date_joined = db.Column(db.DateTime, default=datetime.utcnow)  # Added date_joined field
+    date_joined = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # Added date_joined field
     login_count = db.Column(db.Integer, default=0)
+    # Denormalized count of unread personal notifications, kept in step by NotificationService
+    unread_notifications = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     rentals = db.relationship('Rental', back_populates='user')
     rental_requests = db.relationship('RentalRequest', back_populates='user')
     chat_messages = db.relationship("ChatMessage", back_populates="user")
@@ -20,27 +21,31 @@ class User(db.Model):
     bookmarked_articles = db.relationship('ArticleBookmark', back_populates='user', cascade="all, delete-orphan")
     notifications = db.relationship('Notification', back_populates='user', cascade='all, delete-orphan')
 
+    # Aggregates filled in per query by UserSerializer (with_expression); None when not requested
+    active_rentals_count = query_expression()
+    total_rentals_count = query_expression()
+    pending_requests_count = query_expression()
+
     def set_password(self, password):
-        """Hash and set the user's password."""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        """Hash and set the user's password (on the PasswordHasher pool)."""
+        self.password_hash = PasswordHasher.get_instance().hash(password)
 
     def check_password(self, password):
-        """Verify the provided password against the stored hash."""
-        return bcrypt.check_password_hash(self.password_hash, password)
+        """
+        Verify the provided password against the stored hash, upgrading the
+        hash in place (uncommitted) if it was made at an outdated cost.
+        """
+        hasher = PasswordHasher.get_instance()
+        if not hasher.verify(self.password_hash, password):
+            return False
+        if hasher.needs_rehash(self.password_hash):
+            self.password_hash = hasher.hash(password)
+        return True
 
     def __repr__(self):
         return f"<User {self.name} ({self.email})>"
 
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'email': self.email,
-            'role': self.role,
-            'date_joined': self.date_joined.strftime("%Y-%m-%d %H:%M:%S") if self.date_joined else None,
-            'rentals': [rental.to_dict() for rental in self.rentals],
-            'rental_requests': [request.to_dict() for request in self.rental_requests],
-            'liked_articles': [article.to_dict() for article in self.liked_articles],
-            'bookmarked_articles': [article.to_dict() for article in self.bookmarked_articles],
-            'notifications': [notification.to_dict() for notification in self.notifications]
-        }
\ No newline at end of file
+    def to_dict(self, view='detail'):
+        """Serialize through UserSerializer; prefer the serializer directly for lists."""
+        from app.serializers.UserSerializer import UserSerializer
+        return UserSerializer.dump(self, UserSerializer.select_fields(view))
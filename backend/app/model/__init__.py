@@ -12,4 +12,18 @@ from .ArticleMeta import ArticleMeta
 from .ArticleView import ArticleView
 from .AccountRequest import AccountRequest
 from .Notification import Notification
-from .ChatMessage import ChatMessage
\ No newline at end of file
+from .ChatMessage import ChatMessage
+from .ChatFeedback import ChatFeedback
+from .ChatPreference import ChatPreference
+from .Job import Job
+from .ChangeEvent import ChangeEvent
+from .ChangeFeedOffset import ChangeFeedOffset
+from .EmailOutbox import EmailOutbox
+from .Broadcast import Broadcast
+from .BroadcastReceipt import BroadcastReceipt
+from .NotificationArchive import NotificationArchive
+from .ArticleText import ArticleText
+from .ArticleTextChunk import ArticleTextChunk
+from .TrendingScore import TrendingScore
+from .DashboardMetric import DashboardMetric
+from .DashboardMetricBucket import DashboardMetricBucket
@@ -0,0 +1,87 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+class Field:
+    """
+    One output field: the columns it needs, the loader options that fetch
+    its relations or expressions, and how to emit it.
+
+    Args:
+        dump (callable): obj -> JSON-serializable value
+        columns (tuple): Model column attributes to load (used for load_only)
+        options (tuple): Zero-argument callables returning loader options
+    """
+
+    def __init__(self, dump, columns=(), options=()):
+        self.dump = dump
+        self.columns = tuple(columns)
+        self.options = tuple(options)
+
+    @classmethod
+    def column(cls, attribute, format=None):
+        """A plain column, optionally passed through ``format`` when not None."""
+        name = attribute.key
+        if format is None:
+            return cls(lambda obj: getattr(obj, name), columns=(attribute,))
+        return cls(lambda obj: format(getattr(obj, name)) if getattr(obj, name) is not None else None,
+                   columns=(attribute,))
+
+
+class Serializer:
+    """
+    Declarative, view-based serialization.
+
+    Subclasses list their fields once and name the field sets (views) that
+    endpoints return. A caller picks a view and may narrow it with a
+    ``?fields=`` sparse fieldset; the resulting field list drives both the
+    query's eager-loading plan (``plan``) and the output (``dump``), so
+    list endpoints only load and emit what they display.
+    """
+    model = None
+    fields = {}
+    views = {}
+
+    @staticmethod
+    def parse_fields(value):
+        """Parse a ``?fields=a,b,c`` argument; None when absent."""
+        if not value:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    @classmethod
+    def select_fields(cls, view, requested=None):
+        """
+        Resolve the fields to emit for ``view``, narrowed to ``requested``.
+
+        Raises:
+            ValueError: If the view is unknown or a requested field is not part of it
+        """
+        if view not in cls.views:
+            raise ValueError(f"Unknown view '{view}'. Available views: {', '.join(cls.views)}")
+        allowed = cls.views[view]
+        if not requested:
+            return list(allowed)
+        unknown = [name for name in requested if name not in allowed]
+        if unknown:
+            raise ValueError(f"Unknown field(s) for the {view} view: {', '.join(unknown)}")
+        return [name for name in allowed if name in requested]
+
+    @classmethod
+    def plan(cls, query, fields):
+        """Restrict ``query`` to the columns and relations ``fields`` need."""
+        columns, options = [], []
+        for name in fields:
+            field = cls.fields[name]
+            columns.extend(column for column in field.columns if column not in columns)
+            options.extend(option() for option in field.options)
+        primary_key = [getattr(cls.model, column.key) for column in inspect(cls.model).primary_key]
+        return query.options(load_only(*primary_key, *columns), *options)
+
+    @classmethod
+    def dump(cls, obj, fields):
+        return {name: cls.fields[name].dump(obj) for name in fields}
+
+    @classmethod
+    def dump_many(cls, objs, fields):
+        return [cls.dump(obj, fields) for obj in objs]
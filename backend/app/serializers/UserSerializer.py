@@ -0,0 +1,59 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload, with_expression
+from app.model.User import User
+from app.model.Rental import Rental
+from app.model.RentalRequest import RentalRequest
+from app.model.Book import Book
+from app.serializers.Serializer import Field, Serializer
+
+
+def _count(model, *criteria):
+    return select(func.count(model.id)).where(model.user_id == User.id, *criteria).correlate(User).scalar_subquery()
+
+
+def _count_field(attribute, expression):
+    return Field(lambda obj: getattr(obj, attribute.key) or 0,
+                 options=(lambda: with_expression(attribute, expression()),))
+
+
+def _book_loader(relationship, model):
+    return lambda: selectinload(relationship).selectinload(model.book).options(
+        selectinload(Book.authors), selectinload(Book.categories))
+
+
+class UserSerializer(Serializer):
+    """
+    Views:
+        summary: identity only, for pickers and embedded references
+        admin-row: one row of the admin users table, with rental counts
+            computed in SQL instead of loading the rentals
+        detail: a single user with their rentals, requests and article interactions
+    """
+    model = User
+    fields = {
+        'id': Field.column(User.id),
+        'name': Field.column(User.name),
+        'email': Field.column(User.email),
+        'role': Field.column(User.role),
+        'date_joined': Field.column(User.date_joined, lambda value: value.strftime("%Y-%m-%d %H:%M:%S")),
+        'login_count': Field.column(User.login_count),
+        'active_rentals': _count_field(User.active_rentals_count, lambda: _count(Rental, Rental.returned_at.is_(None))),
+        'total_rentals': _count_field(User.total_rentals_count, lambda: _count(Rental)),
+        'pending_requests': _count_field(User.pending_requests_count,
+                                         lambda: _count(RentalRequest, RentalRequest.status == 'pending')),
+        'rentals': Field(lambda obj: [rental.to_dict() for rental in obj.rentals],
+                         options=(_book_loader(User.rentals, Rental),)),
+        'rental_requests': Field(lambda obj: [request.to_dict() for request in obj.rental_requests],
+                                 options=(_book_loader(User.rental_requests, RentalRequest),)),
+        'liked_articles': Field(lambda obj: [like.to_dict() for like in obj.liked_articles],
+                                options=(lambda: selectinload(User.liked_articles),)),
+        'bookmarked_articles': Field(lambda obj: [bookmark.to_dict() for bookmark in obj.bookmarked_articles],
+                                     options=(lambda: selectinload(User.bookmarked_articles),)),
+    }
+    views = {
+        'summary': ('id', 'name', 'email', 'role'),
+        'admin-row': ('id', 'name', 'email', 'role', 'date_joined', 'login_count',
+                      'active_rentals', 'total_rentals', 'pending_requests'),
+        'detail': ('id', 'name', 'email', 'role', 'date_joined', 'login_count', 'rentals', 'rental_requests',
+                   'liked_articles', 'bookmarked_articles'),
+    }
@@ -0,0 +1,2 @@
+from .Serializer import Serializer, Field
+from .UserSerializer import UserSerializer
@@ -0,0 +1,189 @@
+import logging
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from app.db import db
+from app.model.ArticleLike import ArticleLike
+from app.model.ArticleBookmark import ArticleBookmark
+from app.model.ArticleMeta import ArticleMeta
+from app.services.JobService import JobService
+from app.services.UserStatsCache import UserStatsCache
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# reaction kind -> (link model, article_meta counter column)
+REACTIONS = {
+    'like': (ArticleLike, 'likes_count'),
+    'bookmark': (ArticleBookmark, 'bookmarks_count'),
+}
+
+
+class ArticleReactionService:
+    """
+    Likes and bookmarks with idempotent set/unset semantics.
+
+    The link row is written with an insert that ignores duplicates and
+    removed with a plain DELETE, so repeated or concurrent requests never
+    raise and only the request that actually changed a row moves the
+    counter, via ``SET x = x + :delta`` in the database rather than a
+    read-modify-write in Python. Counters are written with Core statements
+    so a like doesn't push the article through the search change feed;
+    ``reconcile_counters`` recomputes them from the link tables to repair
+    any drift.
+    """
+
+    @staticmethod
+    def _resolve(kind):
+        if kind not in REACTIONS:
+            raise ValueError(f"Unknown reaction: {kind}")
+        model, counter = REACTIONS[kind]
+        return model.__table__, ArticleMeta.__table__.c[counter]
+
+    @staticmethod
+    def _insert_ignore(table, values):
+        """Insert a row unless it already exists; returns whether it was inserted."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            statement = postgresql.insert(table).values(**values).on_conflict_do_nothing()
+        elif dialect == 'sqlite':
+            statement = sqlite.insert(table).values(**values).on_conflict_do_nothing()
+        elif dialect == 'mysql':
+            statement = insert(table).values(**values).prefix_with('IGNORE')
+        else:
+            # No insert-ignore syntax: let the primary key reject a duplicate inside a savepoint
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(table).values(**values))
+                return True
+            except IntegrityError:
+                return False
+        return db.session.execute(statement).rowcount == 1
+
+    @staticmethod
+    def _bump(counter, article_id, delta):
+        """Apply ``delta`` to an article's counter in SQL and return the new value."""
+        table = counter.table
+        statement = table.update().where(table.c.article_id == article_id)
+        if delta < 0:
+            statement = statement.where(counter > 0)
+        db.session.execute(statement.values({counter: counter + delta}))
+        return db.session.execute(select(counter).where(table.c.article_id == article_id)).scalar() or 0
+
+    @classmethod
+    def add(cls, kind, user_id, article_id):
+        """
+        Like or bookmark an article; does nothing if it already is.
+
+        Args:
+            kind (str): 'like' or 'bookmark'
+            user_id (int): ID of the user
+            article_id (int): ID of an existing article
+
+        Returns:
+            tuple: (changed, count) - whether a row was added, and the article's counter
+
+        Raises:
+            ValueError: If kind is unknown
+        """
+        table, counter = cls._resolve(kind)
+        user_id, article_id = int(user_id), int(article_id)
+        try:
+            changed = cls._insert_ignore(table, {'user_id': user_id, 'article_id': article_id})
+            if changed:
+                count = cls._bump(counter, article_id, 1)
+            else:
+                count = db.session.execute(
+                    select(counter).where(counter.table.c.article_id == article_id)).scalar() or 0
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if changed:
+            # Core statements bypass UserStatsCache's session hooks
+            UserStatsCache.invalidate(user_id)
+        return changed, count
+
+    @classmethod
+    def remove(cls, kind, user_id, article_id):
+        """
+        Remove a like or bookmark; does nothing if there is none.
+
+        Args:
+            kind (str): 'like' or 'bookmark'
+            user_id (int): ID of the user
+            article_id (int): ID of the article
+
+        Returns:
+            tuple: (changed, count) - whether a row was removed, and the article's counter
+
+        Raises:
+            ValueError: If kind is unknown
+        """
+        table, counter = cls._resolve(kind)
+        user_id, article_id = int(user_id), int(article_id)
+        statement = delete(table).where(table.c.user_id == user_id, table.c.article_id == article_id)
+        try:
+            if db.session.get_bind().dialect.delete_returning:
+                changed = db.session.execute(statement.returning(table.c.user_id)).first() is not None
+            else:
+                # MySQL has no DELETE ... RETURNING; the affected row count says the same
+                changed = db.session.execute(statement).rowcount == 1
+            if changed:
+                count = cls._bump(counter, article_id, -1)
+            else:
+                count = db.session.execute(
+                    select(counter).where(counter.table.c.article_id == article_id)).scalar() or 0
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        if changed:
+            UserStatsCache.invalidate(user_id)
+        return changed, count
+
+    @classmethod
+    def toggle(cls, kind, user_id, article_id):
+        """
+        Remove the reaction if present, add it otherwise.
+
+        Returns:
+            tuple: (active, count) - whether the reaction is now set, and the article's counter
+        """
+        changed, count = cls.remove(kind, user_id, article_id)
+        if changed:
+            return False, count
+        _, count = cls.add(kind, user_id, article_id)
+        return True, count
+
+    @staticmethod
+    def reconcile_counters():
+        """
+        Recompute likes_count and bookmarks_count from the link tables,
+        touching only the rows that drifted.
+
+        Returns:
+            dict: Number of corrected articles per counter
+        """
+        table = ArticleMeta.__table__
+        corrected = {}
+        for model, counter_name in REACTIONS.values():
+            counter = table.c[counter_name]
+            actual = select(func.count()).select_from(model.__table__).where(
+                model.__table__.c.article_id == table.c.article_id
+            ).scalar_subquery()
+            result = db.session.execute(table.update().where(counter != actual).values({counter: actual}))
+            corrected[counter_name] = result.rowcount
+        db.session.commit()
+        logger.info(f"Reconciled article reaction counters: {corrected}")
+        return corrected
+
+
+@JobService.handler('article_counter_reconcile')
+def article_counter_reconcile_job(payload):
+    """
+    Repair drift in article like/bookmark counters.
+    Payload: {}
+    """
+    return ArticleReactionService.reconcile_counters()
@@ -0,0 +1,393 @@
+import os
+import threading
+import traceback
+import logging
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from math import ceil
+from sqlalchemy import and_, bindparam, func, or_, select, update
+from app.db import db
+from app.model.Article import Article
+from app.model.ArticleMeta import ArticleMeta
+from app.model.ArticleText import ArticleText
+from app.model.ArticleTextChunk import ArticleTextChunk
+from app.services.JobService import JobService
+from app.services.PdfCache import PdfCache
+from app.services.PasswordHasher import pool_context
+from app.services.ChangeFeedService import ChangeFeedService
+
+try:
+    import pypdf
+except ImportError:  # Text extraction is optional; PDFs are still prefetched
+    pypdf = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.environ.get('ARTICLE_TEXT_CHUNK_SIZE', 1000))
+CHUNK_OVERLAP = int(os.environ.get('ARTICLE_TEXT_CHUNK_OVERLAP', 200))
+MAX_PAGES = int(os.environ.get('ARTICLE_TEXT_MAX_PAGES', 200))
+MAX_ATTEMPTS = int(os.environ.get('ARTICLE_TEXT_MAX_ATTEMPTS', 5))
+RETRY_BASE_DELAY = float(os.environ.get('ARTICLE_TEXT_RETRY_BASE_DELAY', 300))
+STALE_AFTER = float(os.environ.get('ARTICLE_TEXT_STALE_AFTER', 1800))
+# Seconds one PDF may take to extract before its worker is killed
+EXTRACT_TIMEOUT = float(os.environ.get('ARTICLE_TEXT_TIMEOUT', 120))
+
+
+def _extract_pages(path, max_pages):
+    """
+    Runs in the extraction pool.
+
+    Returns:
+        tuple: (total page count, word count of the extracted pages, text of each extracted page)
+    """
+    reader = pypdf.PdfReader(path)
+    pages = []
+    for page in reader.pages[:max_pages]:
+        try:
+            pages.append(page.extract_text() or '')
+        except Exception:
+            # One unreadable page shouldn't lose the whole paper
+            pages.append('')
+    return len(reader.pages), sum(len(text.split()) for text in pages), pages
+
+
+def chunk_pages(pages, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """
+    Split page texts into overlapping passages of about ``chunk_size`` characters.
+
+    Returns:
+        list: (page_start, page_end, text) tuples with 1-based page numbers
+    """
+    words = [(word, number) for number, text in enumerate(pages, start=1) for word in text.split()]
+    chunks = []
+    start = 0
+    while start < len(words):
+        end, length = start, 0
+        while end < len(words) and (end == start or length + len(words[end][0]) + 1 <= chunk_size):
+            length += len(words[end][0]) + 1
+            end += 1
+        chunk = words[start:end]
+        chunks.append((chunk[0][1], chunk[-1][1], " ".join(word for word, _ in chunk)))
+        if end >= len(words):
+            break
+        # Step back so consecutive chunks share about ``overlap`` characters
+        next_start, carried = end, 0
+        while next_start - 1 > start and carried < overlap:
+            next_start -= 1
+            carried += len(words[next_start][0]) + 1
+        start = next_start
+    return chunks
+
+
+class ArticleTextService:
+    """
+    Background pipeline that makes the text inside article PDFs searchable.
+
+    A scheduled ``article_text_sync`` job picks articles whose PDF has not
+    been processed (or whose pdf_url changed, or whose last attempt failed
+    and is due for a retry), prefetches the PDF into PdfCache, extracts the
+    text page by page on a small process pool and stores it as overlapping
+    chunks in ``article_text_chunks``. Those chunks back full-text article
+    search and are added to the chatbot's vector store through the change
+    feed. Per-article progress lives in ``article_texts``. Extraction needs
+    the optional ``pypdf`` package; without it PDFs are only prefetched.
+    """
+    _executor = None
+    _rebuilt = False  # Pools after the first must not be forked (see pool_context)
+    _lock = threading.Lock()
+
+    @classmethod
+    def start(cls):
+        """
+        Start the extraction processes now rather than on first use.
+
+        Like PasswordHasher.start, call this before other threads exist:
+        the workers are forked where the platform allows it.
+        """
+        if pypdf is None:
+            logger.warning("pypdf is not installed: article PDFs will only be prefetched, so full-text "
+                           "search, chatbot passages and reading stats stay empty")
+            return
+        cls._get_executor().submit(int).result()
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    context = pool_context(cls._rebuilt, __name__)
+                    workers = int(os.environ.get('ARTICLE_TEXT_WORKERS', 1))
+                    cls._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+                    logger.debug(f"Started article text extraction pool with {workers} workers")
+        return cls._executor
+
+    @classmethod
+    def _reset_executor(cls, executor, kill=False):
+        with cls._lock:
+            if cls._executor is executor:
+                cls._executor = None
+                cls._rebuilt = True
+        if kill:
+            # A stuck worker never finishes on its own; shutdown() would leave it running
+            for process in list((executor._processes or {}).values()):
+                process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _extract(cls, path):
+        # A worker killed mid-extraction (OOM, segfault on a hostile PDF) breaks the whole
+        # pool; start a fresh one and give the article one more try before failing it
+        for attempt in range(2):
+            executor = cls._get_executor()
+            try:
+                return executor.submit(_extract_pages, path, MAX_PAGES).result(timeout=EXTRACT_TIMEOUT)
+            except TimeoutError:
+                # pypdf can loop forever on a malformed PDF; don't let it hold the job worker
+                cls._reset_executor(executor, kill=True)
+                raise TimeoutError(f"Text extraction took longer than {EXTRACT_TIMEOUT:g}s")
+            except BrokenProcessPool:
+                cls._reset_executor(executor)
+                logger.warning(f"Article text extraction pool broke on {path}; restarted it")
+                if attempt:
+                    raise
+
+    @staticmethod
+    def _due_filter(now):
+        text = ArticleText
+        return or_(
+            text.article_id.is_(None),
+            text.source_url != Article.pdf_url,
+            and_(text.status.in_(('pending', 'failed')), text.attempts < MAX_ATTEMPTS, text.next_attempt_at <= now),
+            and_(text.status == 'processing', text.updated_at < now - timedelta(seconds=STALE_AFTER))
+        )
+
+    @classmethod
+    def sync(cls, article_ids=None, force=False, batch_size=None):
+        """
+        Prefetch and extract every article that needs it, in ID order.
+
+        Args:
+            article_ids (list, optional): Only consider these articles
+            force (bool): Reprocess even articles that are up to date
+            batch_size (int, optional): Articles read per query
+
+        Returns:
+            dict: Counts of extracted, unchanged, prefetched and failed articles
+        """
+        batch_size = batch_size or int(os.environ.get('ARTICLE_TEXT_BATCH', 20))
+        counts = {'extracted': 0, 'unchanged': 0, 'prefetched': 0, 'failed': 0}
+        last_id = 0
+        while True:
+            query = db.session.query(Article.id).outerjoin(ArticleText, ArticleText.article_id == Article.id) \
+                .filter(Article.id > last_id)
+            if article_ids is not None:
+                query = query.filter(Article.id.in_(article_ids))
+            if not force:
+                query = query.filter(cls._due_filter(datetime.utcnow()))
+            ids = [row.id for row in query.order_by(Article.id).limit(batch_size).all()]
+            db.session.commit()
+            if not ids:
+                break
+            for article_id in ids:
+                counts[cls.process_article(article_id, force=force)] += 1
+            last_id = ids[-1]
+        return counts
+
+    @classmethod
+    def process_article(cls, article_id, force=False):
+        """
+        Prefetch one article's PDF and (re)build its text chunks.
+
+        Returns:
+            str: 'extracted', 'unchanged', 'prefetched' or 'failed'
+        """
+        article = Article.query.get(article_id)
+        if not article:
+            return 'failed'
+        state = ArticleText.query.get(article_id) or ArticleText(article_id=article_id, attempts=0)
+        previous_digest = state.content_digest if state.status == 'extracted' and state.source_url == article.pdf_url else None
+        state.status = 'processing'
+        state.source_url = article.pdf_url
+        state.attempts = (state.attempts or 0) + 1
+        state.updated_at = datetime.utcnow()
+        db.session.add(state)
+        db.session.commit()
+
+        try:
+            pdf = PdfCache.get_instance().get(article.pdf_url)
+            if pypdf is None:
+                state.status = 'pending'
+                state.content_digest = None
+                state.last_error = "pypdf is not installed"
+                # Retry rarely; installing pypdf and forcing a sync picks these up at once
+                state.next_attempt_at = datetime.utcnow() + timedelta(days=1)
+                state.attempts = 0
+                state.updated_at = datetime.utcnow()
+                db.session.commit()
+                return 'prefetched'
+
+            if previous_digest == pdf.digest and not force:
+                state.status = 'extracted'
+                state.attempts = 0
+                state.updated_at = datetime.utcnow()
+                db.session.commit()
+                return 'unchanged'
+
+            page_count, word_count, pages = cls._extract(pdf.path)
+            chunks = chunk_pages(pages)
+
+            ArticleTextChunk.query.filter_by(article_id=article_id).delete(synchronize_session=False)
+            if chunks:
+                db.session.execute(ArticleTextChunk.__table__.insert(), [{
+                    'article_id': article_id,
+                    'chunk_index': index,
+                    'page_start': page_start,
+                    'page_end': page_end,
+                    'content': content
+                } for index, (page_start, page_end, content) in enumerate(chunks)])
+            now = datetime.utcnow()
+            state.status = 'extracted'
+            state.content_digest = pdf.digest
+            state.page_count = page_count
+            state.char_count = sum(len(page) for page in pages)
+            # Papers longer than ARTICLE_TEXT_MAX_PAGES are extrapolated from the pages read
+            state.word_count = round(word_count * page_count / len(pages)) if pages else 0
+            state.chunk_count = len(chunks)
+            state.attempts = 0
+            state.last_error = None
+            state.updated_at = state.extracted_at = now
+            # Chunks are written with Core, so tell the vector store about the article explicitly
+            ChangeFeedService.record('article', [article_id])
+            db.session.commit()
+            logger.info(f"Extracted {len(chunks)} text chunks from {len(pages)} of {page_count} pages of article {article_id}")
+            return 'extracted'
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Text extraction failed for article {article_id}: {str(e)}")
+            logger.debug(traceback.format_exc())
+            state = ArticleText.query.get(article_id)
+            state.status = 'failed'
+            state.last_error = str(e)[:2000]
+            if isinstance(e, TimeoutError):
+                # A PDF that hangs the extractor will hang it again; only a new pdf_url or force retries it
+                state.attempts = max(state.attempts, MAX_ATTEMPTS)
+            state.next_attempt_at = datetime.utcnow() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (state.attempts - 1))
+            state.updated_at = datetime.utcnow()
+            db.session.commit()
+            return 'failed'
+
+    @staticmethod
+    def update_reading_stats(article_ids=None, force=False, batch_size=None):
+        """
+        Copy page and word counts from the extracted text onto ArticleMeta
+        and derive read_time from them (ARTICLE_READING_WPM words per minute).
+
+        Only articles whose text was extracted since their stats were last
+        computed, or whose pdf_url changed, are updated unless ``force`` is set.
+        Articles without extracted text keep their current read_time.
+
+        Returns:
+            int: Number of articles updated
+        """
+        batch_size = batch_size or int(os.environ.get('ARTICLE_STATS_BATCH', 500))
+        words_per_minute = max(int(os.environ.get('ARTICLE_READING_WPM', 200)), 1)
+        update_meta = update(ArticleMeta.__table__).where(ArticleMeta.__table__.c.id == bindparam('meta_id')).values(
+            page_count=bindparam('page_count'),
+            word_count=bindparam('word_count'),
+            read_time=bindparam('read_time'),
+            stats_source_url=bindparam('source_url'),
+            stats_computed_at=bindparam('computed_at')
+        )
+        updated = 0
+        last_id = 0
+        while True:
+            query = db.session.query(Article.id, ArticleMeta.id.label('meta_id'), ArticleText.page_count,
+                                     ArticleText.word_count, ArticleText.source_url) \
+                .join(ArticleMeta, ArticleMeta.article_id == Article.id) \
+                .join(ArticleText, ArticleText.article_id == Article.id) \
+                .filter(Article.id > last_id, ArticleText.status == 'extracted',
+                        ArticleText.source_url == Article.pdf_url, ArticleText.word_count.isnot(None))
+            if article_ids is not None:
+                query = query.filter(Article.id.in_(article_ids))
+            if not force:
+                query = query.filter(or_(
+                    ArticleMeta.stats_source_url.is_(None),
+                    ArticleMeta.stats_source_url != Article.pdf_url,
+                    ArticleMeta.stats_computed_at < ArticleText.extracted_at
+                ))
+            rows = query.order_by(Article.id).limit(batch_size).all()
+            if not rows:
+                db.session.commit()
+                break
+            now = datetime.utcnow()
+            db.session.execute(update_meta, [{
+                'meta_id': row.meta_id,
+                'page_count': row.page_count,
+                'word_count': row.word_count,
+                'read_time': max(1, ceil(row.word_count / words_per_minute)),
+                'source_url': row.source_url,
+                'computed_at': now
+            } for row in rows])
+            db.session.commit()
+            updated += len(rows)
+            last_id = rows[-1].id
+        if updated:
+            logger.info(f"Updated reading stats for {updated} articles")
+        return updated
+
+    @staticmethod
+    def matching_article_ids(search):
+        """
+        Select the IDs of articles whose extracted text matches ``search``.
+
+        PostgreSQL uses the GIN-indexed tsvector; other databases use LIKE.
+
+        Returns:
+            Select: A subquery suitable for ``Article.id.in_(...)``
+        """
+        if db.session.get_bind().dialect.name == 'postgresql':
+            condition = func.to_tsvector('english', ArticleTextChunk.content).op('@@')(
+                func.plainto_tsquery('english', search))
+        else:
+            condition = ArticleTextChunk.content.ilike(f'%{search}%')
+        return select(ArticleTextChunk.article_id).where(condition).distinct()
+
+    @staticmethod
+    def get_stats():
+        """
+        Count articles by extraction status.
+
+        Returns:
+            dict: status -> count, plus articles not yet seen and total chunks
+        """
+        counts = dict(db.session.query(ArticleText.status, func.count(ArticleText.article_id))
+                      .group_by(ArticleText.status).all())
+        stats = {status: counts.get(status, 0) for status in ('pending', 'processing', 'extracted', 'failed')}
+        stats['unprocessed'] = db.session.query(func.count(Article.id)).outerjoin(
+            ArticleText, ArticleText.article_id == Article.id).filter(ArticleText.article_id.is_(None)).scalar()
+        stats['chunks'] = db.session.query(func.count(ArticleTextChunk.id)).scalar()
+        stats['extraction_available'] = pypdf is not None
+        return stats
+
+
+@JobService.handler('article_text_sync')
+def article_text_sync_job(payload):
+    """
+    Prefetch article PDFs and extract their text.
+    Payload: { "article_ids": list[int] (optional), "force": bool (optional) }
+    """
+    result = ArticleTextService.sync(payload.get('article_ids'), bool(payload.get('force')))
+    result['stats_updated'] = ArticleTextService.update_reading_stats(payload.get('article_ids'))
+    return result
+
+
+@JobService.handler('article_reading_stats')
+def article_reading_stats_job(payload):
+    """
+    Recompute page count, word count and read time from extracted article text.
+    Payload: { "article_ids": list[int] (optional), "force": bool (optional) }
+    """
+    return {'updated': ArticleTextService.update_reading_stats(payload.get('article_ids'), bool(payload.get('force')))}
@@ -0,0 +1,169 @@
+import os
+import atexit
+import threading
+import traceback
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
+from app.db import db
+from app.model.ArticleMeta import ArticleMeta
+from app.model.ArticleView import ArticleView
+from app.services.TrendingService import TrendingService
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class ArticleViewBuffer:
+    """
+    Write-behind article view counting.
+
+    ``record`` only touches memory: a view is dropped if the same user
+    opened the same article recently (an exact LRU set of
+    VIEW_DEDUPE_CACHE_SIZE pairs), otherwise it joins the pending buffer.
+    A flusher thread drains the buffer every VIEW_FLUSH_INTERVAL seconds
+    (sooner once VIEW_BUFFER_MAX views are pending). Each flush skips pairs
+    already in ``article_views``, inserts the new ones, and adds the
+    per-article totals to ``article_meta.views`` in a single UPDATE and to
+    the trending scores, all in one transaction. Views still buffered when a
+    process dies are lost, which is an acceptable trade for a counter.
+    """
+    _pending = {}  # (user_id, article_meta_id) -> viewed_at
+    _recent = OrderedDict()  # pairs already pending or flushed, for dedupe
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _flusher = None
+    _app = None
+
+    @staticmethod
+    def _config(name, default, cast=int):
+        return cast(os.environ.get(name, default))
+
+    @classmethod
+    def start_flusher(cls, app):
+        """Start the flusher thread for this process (idempotent)."""
+        with cls._lock:
+            if cls._flusher is not None:
+                return
+            cls._app = app
+            cls._flusher = threading.Thread(target=cls._flush_loop, name="article-view-flusher", daemon=True)
+            cls._flusher.start()
+        atexit.register(cls._flush_at_exit)
+        logger.debug("Started article view flusher")
+
+    @classmethod
+    def record(cls, user_id, article_meta_id):
+        """
+        Count a view without touching the database.
+
+        Returns:
+            bool: False if the view was a recent repeat and was ignored
+        """
+        key = (int(user_id), int(article_meta_id))
+        with cls._lock:
+            if key in cls._recent:
+                cls._recent.move_to_end(key)
+                return False
+            cls._recent[key] = True
+            if len(cls._recent) > cls._config('VIEW_DEDUPE_CACHE_SIZE', 100000):
+                cls._recent.popitem(last=False)
+            cls._pending[key] = datetime.utcnow()
+            pending = len(cls._pending)
+
+        if cls._flusher is None:
+            from flask import current_app
+            cls.start_flusher(current_app._get_current_object())
+        if pending >= cls._config('VIEW_BUFFER_MAX', 10000):
+            cls._wakeup.set()
+        return True
+
+    @classmethod
+    def flush(cls):
+        """
+        Write buffered views in the current app context.
+
+        Returns:
+            int: Number of new views counted
+        """
+        with cls._flush_lock:
+            with cls._lock:
+                batch, cls._pending = cls._pending, {}
+            if not batch:
+                return 0
+            try:
+                counts = cls._write(batch)
+            except Exception:
+                db.session.rollback()
+                # Put the views back so the next flush retries them
+                with cls._lock:
+                    for key, viewed_at in batch.items():
+                        cls._pending.setdefault(key, viewed_at)
+                raise
+        return sum(counts.values())
+
+    @classmethod
+    def _write(cls, batch):
+        meta_ids = {meta_id for _, meta_id in batch}
+        user_ids = {user_id for user_id, _ in batch}
+        existing = set(db.session.query(ArticleView.user_id, ArticleView.article_meta_id).filter(
+            ArticleView.article_meta_id.in_(meta_ids), ArticleView.user_id.in_(user_ids)).all())
+        article_ids = dict(db.session.query(ArticleMeta.id, ArticleMeta.article_id).filter(ArticleMeta.id.in_(meta_ids)).all())
+        new_views = [{'user_id': user_id, 'article_meta_id': meta_id, 'viewed_at': viewed_at}
+                     for (user_id, meta_id), viewed_at in batch.items()
+                     if (user_id, meta_id) not in existing and meta_id in article_ids]
+        if not new_views:
+            db.session.commit()
+            return {}
+
+        try:
+            with db.session.begin_nested():
+                db.session.execute(ArticleView.__table__.insert(), new_views)
+        except IntegrityError:
+            # Another process flushed some of the same pairs; insert the rest one by one
+            inserted = []
+            for view in new_views:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(ArticleView.__table__.insert(), [view])
+                    inserted.append(view)
+                except IntegrityError:
+                    continue
+            new_views = inserted
+
+        counts = {}
+        for view in new_views:
+            counts[view['article_meta_id']] = counts.get(view['article_meta_id'], 0) + 1
+        if counts:
+            # Core UPDATE on purpose: view counts alone shouldn't feed the search change feed
+            table = ArticleMeta.__table__
+            db.session.execute(table.update().where(table.c.id.in_(list(counts))).values(
+                views=table.c.views + case(counts, value=table.c.id, else_=0)))
+            TrendingService.record('article', {article_ids[meta_id]: count for meta_id, count in counts.items()})
+        db.session.commit()
+        logger.debug(f"Flushed {len(new_views)} article views across {len(counts)} articles")
+        return counts
+
+    @classmethod
+    def _flush_loop(cls):
+        interval = cls._config('VIEW_FLUSH_INTERVAL', 5, float)
+        while True:
+            cls._wakeup.wait(timeout=interval)
+            cls._wakeup.clear()
+            try:
+                with cls._app.app_context():
+                    cls.flush()
+            except Exception as e:
+                logger.error(f"Article view flush failed: {str(e)}")
+                logger.error(traceback.format_exc())
+
+    @classmethod
+    def _flush_at_exit(cls):
+        try:
+            with cls._app.app_context():
+                cls.flush()
+        except Exception as e:
+            logger.error(f"Final article view flush failed: {str(e)}")
@@ -0,0 +1,66 @@
+import logging
+from functools import wraps
+from flask import jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, verify_jwt_in_request
+from app.services.UserCache import UserCache
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class AuthService:
+    """
+    Token issuing and request-level authorization.
+
+    Access tokens carry the user's role as a signed ``role`` claim, so
+    requests from non-admins are rejected without touching the database.
+    A token claiming ``admin`` is still confirmed against UserCache, so a
+    demoted or deleted admin loses access within USER_CACHE_TTL seconds
+    instead of keeping it until the token expires.
+    """
+
+    @staticmethod
+    def create_token(user):
+        """
+        Issue an access token for ``user`` with its role embedded.
+
+        Args:
+            user (User): The authenticated user
+
+        Returns:
+            str: Encoded JWT
+        """
+        return create_access_token(identity=str(user.id), additional_claims={'role': user.role})
+
+    @staticmethod
+    def current_user():
+        """
+        The current request's user as a cached snapshot (id, name, email, role).
+
+        Returns:
+            CachedUser: The user, or None if it no longer exists
+        """
+        return UserCache.get(get_jwt_identity())
+
+    @classmethod
+    def is_admin(cls):
+        """Whether the current request's token belongs to an admin."""
+        claimed_role = get_jwt().get('role')
+        if claimed_role is not None and claimed_role != 'admin':
+            return False
+        # Tokens issued before the claim existed fall through to the lookup too
+        user = cls.current_user()
+        return user is not None and user.role == 'admin'
+
+
+def admin_required(fn):
+    """Require a valid JWT belonging to an admin; responds 403 otherwise."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        verify_jwt_in_request()
+        if not AuthService.is_admin():
+            logger.warning("Admin access denied for user %s", get_jwt_identity())
+            return jsonify({'error': 'Admin access required'}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -4,6 +4,7 @@ from app.model.Book import Book
 from app.model.Author import Author
 from app.model.Category import Category
 from app.model.association_tables import book_author_association, book_category_association
+from app.services.JobService import JobService
 from sqlalchemy.orm import joinedload
 from sqlalchemy.exc import IntegrityError
 from typing import List, Dict, Any, Optional
@@ -323,3 +324,10 @@ class BookService:
         :return: Total number of books
         """
         return Book.query.count()
+
+
+@JobService.handler('bulk_import_books')
+def bulk_import_books_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Import a list of books (payload: {"books": [...]}) in the background."""
+    books = BookService.bulk_create_books(payload.get('books', []))
+    return {'created': len(books), 'book_ids': [book.id for book in books]}
@@ -0,0 +1,262 @@
+import os
+import time
+import threading
+import traceback
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, List, Optional
+from sqlalchemy import event, func, or_, select
+from sqlalchemy.orm import Session
+from app.db import db
+from app.model.Book import Book
+from app.model.Article import Article
+from app.model.ArticleMeta import ArticleMeta
+from app.model.ChangeEvent import ChangeEvent
+from app.model.ChangeFeedOffset import ChangeFeedOffset
+from app.services.JobService import JobService
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Model -> (entity type in the feed, column holding that entity's ID)
+TRACKED_MODELS = {
+    Book: ("book", Book.id),
+    Article: ("article", Article.id),
+    ArticleMeta: ("article", ArticleMeta.article_id),
+}
+
+
+class ChangeFeedService:
+    """
+    Transactional outbox for Book/Article/ArticleMeta writes.
+
+    Every flush that touches a tracked model inserts ``change_events`` rows
+    on the same connection, so the events commit or roll back with the
+    data. ORM bulk ``update()``/``delete()`` statements are captured too by
+    selecting the affected IDs before they run. Consumers tail the table by
+    ID (see ChangeFeedConsumer), which gives every index one ordered stream
+    regardless of which process made the write.
+    """
+    _installed = False
+
+    @classmethod
+    def init_app(cls, app):
+        if cls._installed:
+            return
+        event.listen(Session, "after_flush", cls._record_flush)
+        event.listen(Session, "do_orm_execute", cls._record_bulk_statement)
+        cls._installed = True
+
+    @staticmethod
+    def current_position() -> int:
+        """ID of the newest change event (0 when the feed is empty)."""
+        return db.session.query(func.max(ChangeEvent.id)).scalar() or 0
+
+    @staticmethod
+    def can_resume_from(position: int) -> bool:
+        """
+        Whether every event after ``position`` is still in the feed.
+
+        A consumer that keeps its position outside ChangeFeedOffset (so prune
+        can't see it) must rebuild instead of resuming when this is False.
+        """
+        oldest = db.session.query(func.min(ChangeEvent.id)).scalar()
+        return oldest is None or oldest <= position + 1
+
+    @staticmethod
+    def prune(retention_days=None) -> int:
+        """
+        Delete change events every consumer is done with.
+
+        An event goes once it is older than CHANGE_FEED_RETENTION_DAYS (running
+        in-memory consumers are never that far behind; restarted ones check
+        ``can_resume_from``) and at or below every durable
+        consumer's offset. The newest event is always kept, so consumers never
+        see the table shrink below their position and mistake it for a reset.
+
+        Returns:
+            int: Number of events deleted
+        """
+        retention_days = float(retention_days if retention_days is not None
+                               else os.environ.get('CHANGE_FEED_RETENTION_DAYS', 7))
+        newest = ChangeFeedService.current_position()
+        query = ChangeEvent.query.filter(
+            ChangeEvent.id < newest,
+            ChangeEvent.created_at < datetime.utcnow() - timedelta(days=retention_days))
+        min_offset = db.session.query(func.min(ChangeFeedOffset.last_event_id)).scalar()
+        if min_offset is not None:
+            query = query.filter(ChangeEvent.id <= min_offset)
+        deleted = query.delete(synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Pruned {deleted} change events")
+        return deleted
+
+    @staticmethod
+    def record(entity_type: str, entity_ids: Iterable[int], op: str = "upsert") -> None:
+        """
+        Record changes made outside the ORM (e.g. raw SQL) in the current transaction.
+
+        Args:
+            entity_type (str): "book" or "article"
+            entity_ids (iterable): IDs of the changed entities
+            op (str): "upsert" or "delete"
+        """
+        rows = [{"entity_type": entity_type, "entity_id": entity_id, "op": op, "created_at": datetime.utcnow()}
+                for entity_id in set(entity_ids)]
+        if rows:
+            db.session.execute(ChangeEvent.__table__.insert(), rows)
+
+    @staticmethod
+    def _entity_key(obj):
+        for model, (entity_type, _) in TRACKED_MODELS.items():
+            if isinstance(obj, model):
+                entity_id = obj.article_id if isinstance(obj, ArticleMeta) else obj.id
+                return (entity_type, entity_id) if entity_id is not None else None
+        return None
+
+    @classmethod
+    def _record_flush(cls, session, flush_context):
+        changes = {}
+        for obj in session.new.union(session.dirty):
+            key = cls._entity_key(obj)
+            if key:
+                changes.setdefault(key, "upsert")
+        for obj in session.deleted:
+            key = cls._entity_key(obj)
+            if key and not isinstance(obj, ArticleMeta):
+                changes[key] = "delete"
+        if not changes:
+            return
+        now = datetime.utcnow()
+        session.connection().execute(ChangeEvent.__table__.insert(), [
+            {"entity_type": entity_type, "entity_id": entity_id, "op": op, "created_at": now}
+            for (entity_type, entity_id), op in sorted(changes.items())
+        ])
+
+    @classmethod
+    def _record_bulk_statement(cls, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        tracked = TRACKED_MODELS.get(mapper.class_) if mapper is not None else None
+        if not tracked:
+            return
+        entity_type, id_column = tracked
+        id_query = select(id_column)
+        whereclause = orm_execute_state.statement.whereclause
+        if whereclause is not None:
+            id_query = id_query.where(whereclause)
+        session = orm_execute_state.session
+        entity_ids = session.execute(id_query).scalars().all()
+        op = "delete" if orm_execute_state.is_delete and mapper.class_ is not ArticleMeta else "upsert"
+        now = datetime.utcnow()
+        rows = [{"entity_type": entity_type, "entity_id": entity_id, "op": op, "created_at": now}
+                for entity_id in sorted(set(entity_ids)) if entity_id is not None]
+        if rows:
+            session.connection().execute(ChangeEvent.__table__.insert(), rows)
+
+
+@JobService.handler('change_feed_prune')
+def change_feed_prune_job(payload):
+    """
+    Delete change events that every consumer has processed.
+    Payload: { "retention_days": float (optional) }
+    """
+    return {'deleted': ChangeFeedService.prune(payload.get('retention_days'))}
+
+
+class ChangeFeedConsumer:
+    """
+    Background thread tailing ``change_events`` by increasing ID.
+
+    Transactions can commit out of ID order, so IDs skipped over are kept
+    as gaps and re-checked for ``gap_timeout`` seconds before being given
+    up on (a rolled-back transaction leaves a permanent gap). If the table
+    shrinks below the consumer position (e.g. after seed.py recreated the
+    schema), ``on_reset`` is called so the index can rebuild from scratch.
+
+    Durable consumers keep their position in ``change_feed_offsets``; the
+    default in-memory position suits per-process indexes that are rebuilt
+    on startup anyway.
+    """
+
+    def __init__(self, app, name: str, on_events: Callable[[List[ChangeEvent]], None],
+                 on_reset: Optional[Callable[[], None]] = None, start_after: Optional[int] = None,
+                 durable: bool = False, batch_size=None, poll_interval=None, gap_timeout=None):
+        self.app = app
+        self.name = name
+        self.on_events = on_events
+        self.on_reset = on_reset
+        self.durable = durable
+        self.batch_size = int(batch_size or os.environ.get('CHANGE_FEED_BATCH_SIZE', 500))
+        self.poll_interval = float(poll_interval or os.environ.get('CHANGE_FEED_POLL_INTERVAL', 1.0))
+        self.gap_timeout = float(gap_timeout or os.environ.get('CHANGE_FEED_GAP_TIMEOUT', 30))
+        self._gaps = {}  # event ID -> monotonic time first noticed missing
+        with app.app_context():
+            self.last_id = self._load_offset(start_after)
+        self._thread = threading.Thread(target=self._run, name=f"change-feed-{name}", daemon=True)
+        self._thread.start()
+
+    def _load_offset(self, start_after):
+        if self.durable:
+            offset = ChangeFeedOffset.query.get(self.name)
+            if offset:
+                return offset.last_event_id
+        return start_after if start_after is not None else ChangeFeedService.current_position()
+
+    def _save_offset(self):
+        if not self.durable:
+            return
+        offset = ChangeFeedOffset.query.get(self.name)
+        if offset:
+            offset.last_event_id = self.last_id
+        else:
+            db.session.add(ChangeFeedOffset(consumer=self.name, last_event_id=self.last_id))
+        db.session.commit()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    processed = self.poll_once()
+            except Exception as e:
+                processed = 0
+                logger.error(f"Change feed consumer {self.name} failed: {str(e)}")
+                logger.error(traceback.format_exc())
+            if processed < self.batch_size:
+                time.sleep(self.poll_interval)
+
+    def poll_once(self) -> int:
+        """Fetch and dispatch the next batch; returns the number of events handled."""
+        if ChangeFeedService.current_position() < self.last_id:
+            logger.warning(f"Change feed {self.name} is ahead of the table; resetting")
+            self.last_id = 0
+            self._gaps.clear()
+            if self.on_reset:
+                self.on_reset()
+            self._save_offset()
+            return 0
+
+        query = ChangeEvent.query.filter(or_(
+            ChangeEvent.id > self.last_id,
+            ChangeEvent.id.in_(list(self._gaps)) if self._gaps else False
+        )).order_by(ChangeEvent.id).limit(self.batch_size)
+        events = query.all()
+
+        now = time.monotonic()
+        expected = self.last_id + 1
+        for change in events:
+            if change.id in self._gaps:
+                del self._gaps[change.id]
+                continue
+            for missing in range(expected, change.id):
+                self._gaps.setdefault(missing, now)
+            expected = change.id + 1
+            self.last_id = change.id
+        self._gaps = {gap: seen for gap, seen in self._gaps.items() if now - seen < self.gap_timeout}
+
+        if events:
+            self.on_events(events)
+            self._save_offset()
+        return len(events)
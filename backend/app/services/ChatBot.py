@@ -2,7 +2,8 @@ import json
 import os
 import traceback
 import logging
-from threading import Timer
+import shutil
+from threading import RLock
 from langchain.schema import Document
 # from langchain.vectorstores import FAISS
 # from langchain.embeddings import HuggingFaceEmbeddings
@@ -18,20 +19,25 @@ from langgraph.prebuilt import ToolNode, tools_condition
 from langchain.chat_models import init_chat_model
 from pydantic import BaseModel, Field
 from typing import Any, Dict, List, Optional
-from sqlalchemy import event, or_
+from sqlalchemy import or_
 from sqlalchemy.orm import joinedload
 from app import db
 from app.model.Book import Book
 from app.model.Article import Article
 from app.model.ArticleMeta import ArticleMeta
-from app.model.ChatMessage import ChatMessage
+from app.model.ArticleTextChunk import ArticleTextChunk
+from app.model.ChatFeedback import ChatFeedback
+from app.model.ChatPreference import ChatPreference
 from app.model.ArticleAuthor import ArticleAuthor
 from app.model.Author import Author
 from app.services.UserService import UserService
 from app.services.RentalRequestService import RentalRequestService
 from app.services.NotificationService import NotificationService
-from app.services.EmailService import EmailService
+from app.services.EmailOutboxService import EmailOutboxService
 from app.services.BookService import BookService
+from app.services.TrendingService import TrendingService, TRENDING_PERIODS
+from app.services.IndexSyncWorker import IndexSyncWorker, entity_of
+from app.services.ChangeFeedService import ChangeFeedService, ChangeFeedConsumer
 import gc
 
 
@@ -103,47 +109,40 @@ class ChatBot:
         self.llm = init_chat_model("gpt-4o-mini", model_provider="openai")
         # self.llm = init_chat_model("grok", model_provider="xai")
         self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self._vector_store_lock = RLock()
+        self._rebuild_backlog = None  # Collects updates while a rebuild is in progress
+        self._feed_position = 0  # Change feed ID the current index reflects
         self.vector_store = self.load_content_from_db()
         self.graph = self.create_graph()
         self._id_cache = {}  # Cache for validated IDs
-        self._pending_updates = set()  # For debounced updates
-        self._update_timer = None
+        self._index_sync = IndexSyncWorker(self._process_update, name="chatbot-index-sync")
         self._initialized = True
         if app:
-            with app.app_context():
-                event.listen(Book, "after_insert", self._queue_update_book)
-                event.listen(Book, "after_update", self._queue_update_book)
-                event.listen(Book, "after_delete", self._queue_delete_book)
-                event.listen(Article, "after_insert", self._queue_update_article)
-                event.listen(Article, "after_update", self._queue_update_article)
-                event.listen(Article, "after_delete", self._queue_delete_article)
-
-    def _queue_update_book(self, mapper, connection, target):
-        self._pending_updates.add(("book", target.id))
-        self._schedule_updates()
-
-    def _queue_delete_book(self, mapper, connection, target):
-        self._pending_updates.add(("book_delete", target.id))
-        self._schedule_updates()
+            # Each process keeps its own in-memory index, so it tails the change feed from the
+            # position its index was built at rather than from a shared durable offset.
+            self._change_feed = ChangeFeedConsumer(
+                app, "chatbot-vector-store", self._on_change_events,
+                on_reset=self.rebuild_vector_store, start_after=self._feed_position
+            )
 
-    def _queue_update_article(self, mapper, connection, target):
-        self._pending_updates.add(("article", target.id))
-        self._schedule_updates()
+    def _on_change_events(self, events):
+        self._index_sync.submit(
+            (f"{change.entity_type}_delete" if change.op == "delete" else change.entity_type, change.entity_id)
+            for change in events
+        )
 
-    def _queue_delete_article(self, mapper, connection, target):
-        self._pending_updates.add(("article_delete", target.id))
-        self._schedule_updates()
+    def index_sync_metrics(self):
+        return self._index_sync.metrics()
 
-    def _schedule_updates(self):
-        if self._update_timer:
-            self._update_timer.cancel()
-        self._update_timer = Timer(5.0, self._process_updates)
-        self._update_timer.start()
+    def _process_update(self, change):
+        with self._vector_store_lock:
+            if self._rebuild_backlog is not None:
+                # Keyed by item so the replay keeps only the latest change to each
+                self._rebuild_backlog[entity_of(change)] = change
+            self._apply_updates([change])
 
-    def _process_updates(self):
+    def _apply_updates(self, updates):
         with self.app.app_context():
-            updates = self._pending_updates.copy()
-            self._pending_updates.clear()
             for update_type, item_id in updates:
                 if update_type == "book":
                     self.update_book_in_vector_store(item_id)
@@ -153,7 +152,6 @@ class ChatBot:
                     self.update_article_in_vector_store(item_id)
                 elif update_type == "article_delete":
                     self.remove_article_from_vector_store(item_id)
-        self._update_timer = None
 
     def book_to_document(self, book):
         authors_text = ", ".join([author.name for author in book.authors]) if book.authors else "Unknown"
@@ -214,14 +212,14 @@ class ChatBot:
                 logger.info(f"Added book {book_id} to vector store.")
 
     def remove_book_from_vector_store(self, book_id: int):
-        self.vector_store.delete([f"book_{book_id}"])
+        self._remove_documents(f"book_{book_id}")
         logger.info(f"Removed book {book_id} from vector store.")
 
     def update_book_in_vector_store(self, book_id: int):
         with self.app.app_context():
             row = db.session.query(Book).get(book_id)
             if row:
-                self.vector_store.delete([f"book_{book_id}"])
+                self._remove_documents(f"book_{book_id}")
                 doc = self.book_to_document(row)
                 self.vector_store.add_documents([doc])
                 logger.info(f"Updated book {book_id} in vector store.")
@@ -235,31 +233,79 @@ class ChatBot:
                 logger.info(f"Added article {article_id} to vector store.")
 
     def remove_article_from_vector_store(self, article_id: int):
-        self.vector_store.delete([f"article_{article_id}"])
+        self._remove_documents(f"article_{article_id}")
+        self._remove_article_text_chunks(article_id)
         logger.info(f"Removed article {article_id} from vector store.")
 
     def update_article_in_vector_store(self, article_id: int):
         with self.app.app_context():
             row = db.session.query(Article).get(article_id)
             if row:
-                self.vector_store.delete([f"article_{article_id}"])
+                self._remove_documents(f"article_{article_id}")
                 doc = self.article_to_document(row)
                 self.vector_store.add_documents([doc])
+                self._remove_article_text_chunks(article_id)
+                chunks = ArticleTextChunk.query.filter_by(article_id=article_id).order_by(ArticleTextChunk.chunk_index).all()
+                if chunks:
+                    docs = [self.article_chunk_to_document(chunk, row) for chunk in chunks]
+                    self.vector_store.add_documents(docs, ids=[doc.metadata["id"] for doc in docs])
                 logger.info(f"Updated article {article_id} in vector store.")
 
-    def load_content_from_db(self):
+    def article_chunk_to_document(self, chunk, article):
+        """A passage of the article's PDF text (see ArticleTextService)."""
+        content = f"""
+        Type: Article excerpt
+        Article ID: {article.id}
+        Slug: {article.slug or 'unknown'}
+        Title: {article.title or 'Unknown'}
+        Pages: {chunk.page_start}-{chunk.page_end}
+        Excerpt: {chunk.content}
+        """
+        return Document(
+            page_content=content.strip(),
+            metadata={"title": article.title or "Unknown", "id": f"article_{article.id}_chunk_{chunk.chunk_index}",
+                      "type": "article_text", "article_id": article.id}
+        )
+
+    def _remove_documents(self, metadata_id: str):
+        # Book and article documents are stored under generated IDs (and may be split
+        # into several), so find them by the ``id`` in their metadata
+        docstore = self.vector_store.docstore
+        stale = [doc_id for doc_id in self.vector_store.index_to_docstore_id.values()
+                 if getattr(docstore.search(doc_id), "metadata", {}).get("id") == metadata_id]
+        if stale:
+            self.vector_store.delete(stale)
+
+    def _remove_article_text_chunks(self, article_id: int):
+        prefix = f"article_{article_id}_chunk_"
+        stale = [doc_id for doc_id in self.vector_store.index_to_docstore_id.values() if doc_id.startswith(prefix)]
+        if stale:
+            self.vector_store.delete(stale)
+
+    def load_content_from_db(self, use_cache=True):
         cache_path = "./content_vectorstore"
         cache_index = f"{cache_path}/index.faiss"
         cache_metadata = f"{cache_path}/index.pkl"
+        cache_position = f"{cache_path}/feed_position"
         logger.info("Attempting to load FAISS vector store from cache...")
         with self.app.app_context():
             try:
+                # Changes after this point are replayed from the change feed
+                self._feed_position = ChangeFeedService.current_position()
                 # Check if cache exists
-                if os.path.exists(cache_index) and os.path.exists(cache_metadata):
+                if use_cache and os.path.exists(cache_index) and os.path.exists(cache_metadata):
                     try:
                         vector_store = FAISS.load_local(cache_path, embeddings=self.embeddings, allow_dangerous_deserialization=True)
-                        logger.info("Successfully loaded FAISS vector store from cache.")
-                        return vector_store
+                        cached_position = self._feed_position
+                        if os.path.exists(cache_position):
+                            with open(cache_position) as f:
+                                cached_position = int(f.read().strip() or 0)
+                        if ChangeFeedService.can_resume_from(cached_position):
+                            self._feed_position = cached_position
+                            logger.info("Successfully loaded FAISS vector store from cache.")
+                            return vector_store
+                        # The changes since the cache was written have been pruned from the feed
+                        logger.warning(f"Cache at change {cached_position} is older than the change feed. Rebuilding vector store...")
                     except Exception as e:
                         logger.warning(f"Failed to load cache: {str(e)}. Rebuilding vector store...")
                 else:
@@ -281,17 +327,28 @@ class ChatBot:
                                 vector_store = FAISS.from_documents(chunks, embedding=self.embeddings)
                             else:
                                 vector_store.add_documents(chunks)
-                            os.makedirs(cache_path, exist_ok=True)
-                            vector_store.save_local(cache_path)
                             offset += batch_size
                             logger.info(f"Processed {offset} {type_name}s")
                             gc.collect()
                         except Exception as e:
                             logger.error(f"Error processing {type_name} batch at offset {offset}: {str(e)}")
                             raise
+                # Passages extracted from article PDFs, keyed so they can be replaced per article
+                last_chunk_id = 0
+                while vector_store is not None:
+                    rows = db.session.query(ArticleTextChunk).options(joinedload(ArticleTextChunk.article)) \
+                        .filter(ArticleTextChunk.id > last_chunk_id).order_by(ArticleTextChunk.id).limit(batch_size).all()
+                    if not rows:
+                        break
+                    docs = [self.article_chunk_to_document(row, row.article) for row in rows]
+                    vector_store.add_documents(docs, ids=[doc.metadata["id"] for doc in docs])
+                    last_chunk_id = rows[-1].id
+                    logger.info(f"Processed article text chunks up to {last_chunk_id}")
+                    gc.collect()
                 if vector_store is None:
                     logger.warning("No content found in database.")
                     return FAISS.from_texts(["No books or articles found in library database"], embedding=self.embeddings)
+                self._save_cache(vector_store, cache_path, self._feed_position)
                 logger.info("Successfully built and saved FAISS vector store.")
                 return vector_store
             except Exception as e:
@@ -302,6 +359,40 @@ class ChatBot:
 
 
 
+    def _save_cache(self, vector_store, cache_path, feed_position):
+        """Write the index next to the cache and swap it in, so readers never see a partial cache."""
+        tmp_path = f"{cache_path}.tmp"
+        old_path = f"{cache_path}.old"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        vector_store.save_local(tmp_path)
+        with open(f"{tmp_path}/feed_position", "w") as f:
+            f.write(str(feed_position))
+        shutil.rmtree(old_path, ignore_errors=True)
+        if os.path.exists(cache_path):
+            os.rename(cache_path, old_path)
+        os.rename(tmp_path, cache_path)
+        shutil.rmtree(old_path, ignore_errors=True)
+
+    def rebuild_vector_store(self):
+        """
+        Rebuild the vector store from the database off to the side and swap it
+        in atomically. Incremental updates that arrive during the rebuild are
+        replayed on the new store after the swap.
+        """
+        with self._vector_store_lock:
+            self._rebuild_backlog = {}
+        try:
+            new_store = self.load_content_from_db(use_cache=False)
+        finally:
+            with self._vector_store_lock:
+                backlog, self._rebuild_backlog = self._rebuild_backlog, None
+        with self._vector_store_lock:
+            self.vector_store = new_store
+            if backlog:
+                logger.info(f"Replaying {len(backlog)} updates received during rebuild")
+                self._apply_updates(list(backlog.values()))
+        return True
+
     # Helper methods for formatting data
     def _format_book_data(self, book):
         try:
@@ -618,7 +709,9 @@ class ChatBot:
                         profile = UserService.get_user_profile(user_id)
                         if not profile:
                             return "No preferences found."
+                        stored = ChatPreference.query.get(user_id)
                         return json.dumps({
+                            "preferences": stored.preferences if stored else {},
                             "favorite_category": profile["stats"]["favorite_category"],
                             "books_read": profile["stats"]["books_read"],
                             "liked_articles": [a["id"] for a in profile["liked_articles"]],
@@ -626,15 +719,11 @@ class ChatBot:
                         }, indent=2)
                     
                     elif action == "set" and preferences:
-                        # Store preferences in ChatMessage for simplicity
-                        message = ChatMessage(
-                            user_id=user_id,
-                            message="User updated preferences",
-                            response=json.dumps(preferences),
-                            book_recommendations=None,
-                            article_recommendations=None
-                        )
-                        db.session.add(message)
+                        stored = ChatPreference.query.get(user_id)
+                        if stored:
+                            stored.preferences = {**(stored.preferences or {}), **preferences}
+                        else:
+                            db.session.add(ChatPreference(user_id=user_id, preferences=preferences))
                         db.session.commit()
                         return "Preferences updated successfully."
                     else:
@@ -721,7 +810,7 @@ class ChatBot:
                         type="info",
                         message=f"Your request to borrow '{request['book']['title']}' has been submitted."
                     )
-                    EmailService().send_email(
+                    EmailOutboxService.enqueue(
                         to_email=UserService.get_user_by_id(user_id).email,
                         notification_type="borrow",
                         params={"action": "borrow", "book_title": request["book"]["title"]}
@@ -855,30 +944,43 @@ class ChatBot:
         
         
         @tool()
-        def trending_items(item_type: str = "all", limit: int = 3) -> str:
+        def trending_items(item_type: str = "all", limit: int = 3, period: str = "week") -> str:
             """
             Get trending books or articles based on recent activity.
             
             Args:
                 item_type: Type of items ("books", "articles", "all").
                 limit: Maximum number of results.
+                period: How recent the activity should be ("hour", "day", "week").
             
             Returns:
                 JSON string with trending items.
             """
-            logger.info(f"Fetching trending {item_type}, limit: {limit}")
+            logger.info(f"Fetching trending {item_type} for the last {period}, limit: {limit}")
             results = {"books": [], "articles": []}
+            if period not in TRENDING_PERIODS:
+                period = "week"
             
             with self.app.app_context():
                 try:
                     if item_type in ["books", "all"]:
-                        books = BookService.get_popular_books(limit=limit)
+                        book_ids = [item_id for item_id, _ in TrendingService.top('book', period, limit)]
+                        books_by_id = {book.id: book for book in Book.query.filter(Book.id.in_(book_ids)).all()} if book_ids else {}
+                        books = [books_by_id[book_id] for book_id in book_ids if book_id in books_by_id]
+                        if not books:
+                            # Nothing rented recently; fall back to all-time popularity
+                            books = BookService.get_popular_books(limit=limit)
                         results["books"] = [self._format_book_data(book) for book in books if self._format_book_data(book)]
                     
                     if item_type in ["articles", "all"]:
-                        articles = Article.query.join(ArticleMeta).order_by(
-                            ArticleMeta.views.desc(), ArticleMeta.likes_count.desc()
-                        ).options(joinedload(Article.author), joinedload(Article.meta)).limit(limit).all()
+                        article_ids = [item_id for item_id, _ in TrendingService.top('article', period, limit)]
+                        articles_by_id = {article.id: article for article in Article.query.filter(Article.id.in_(article_ids)).options(
+                            joinedload(Article.author), joinedload(Article.meta)).all()} if article_ids else {}
+                        articles = [articles_by_id[article_id] for article_id in article_ids if article_id in articles_by_id]
+                        if not articles:
+                            articles = Article.query.join(ArticleMeta).order_by(
+                                ArticleMeta.views.desc(), ArticleMeta.likes_count.desc()
+                            ).options(joinedload(Article.author), joinedload(Article.meta)).limit(limit).all()
                         results["articles"] = [self._format_article_data(article) for article in articles if self._format_article_data(article)]
                     
                     return json.dumps(results, indent=2)
@@ -909,14 +1011,7 @@ class ChatBot:
                 try:
                     if not (1 <= rating <= 5):
                         return "Rating must be between 1 and 5."
-                    chat_message = ChatMessage(
-                        user_id=user_id,
-                        message=f"Feedback: {message}",
-                        response=f"Rating: {rating}",
-                        book_recommendations=None,
-                        article_recommendations=None
-                    )
-                    db.session.add(chat_message)
+                    db.session.add(ChatFeedback(user_id=user_id, message=message, rating=rating))
                     db.session.commit()
                     NotificationService.create_notification(
                         user_id=user_id,
@@ -1160,7 +1255,7 @@ class ChatBot:
                         "- advanced_search: Perform advanced search with specific filters\n"
                         "- borrow_book: Initiate a book borrowing request\n"
                         "- article_fulltext_search: Search articles by full text\n"
-                        "- trending_items: Get trending books or articles based on recent activity\n"
+                        "- trending_items: Get trending books or articles based on recent activity (last hour, day or week)\n"
                         "- feedback_submission: Submit user feedback on chatbot interactions\n"
                         "- event_recommendations: Recommend library events based on user interests\n\n"
                         "- cancel_borrow_request: Cancel a pending book borrow request\n"
@@ -1,9 +1,13 @@
 import json
+import base64
 import logging
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 from app import db
 from app.model import ChatMessage
+from app.services.JobService import JobService
 from flask import current_app
+from sqlalchemy import and_, or_
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -46,8 +50,8 @@ class ChatBotService:
                 message=message,
                 response=response,
                 language=language,
-                book_recommendations=json.dumps(book_recommendations) if book_recommendations else None,
-                article_recommendations=json.dumps(article_recommendations) if article_recommendations else None,
+                book_recommendations=book_recommendations or None,
+                article_recommendations=article_recommendations or None,
                 follow_up_question=follow_up_question if follow_up_question else None
             )
             db.session.add(new_chat)
@@ -58,37 +62,59 @@ class ChatBotService:
             db.session.rollback()
     
     @staticmethod
-    def get_user_chat_history(user_id: int) -> List[Dict[str, Any]]:
+    def _encode_cursor(msg) -> str:
+        raw = f"{msg.created_at.isoformat()}|{msg.id}"
+        return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+    @staticmethod
+    def _decode_cursor(cursor: str):
         try:
-            from flask import current_app
-            with current_app.app_context():
-                from app.model.ChatMessage import ChatMessage as ChatMessageClass
-                chat_messages = db.session.query(ChatMessageClass).filter_by(user_id=user_id).order_by(
-                    ChatMessageClass.created_at.desc()).all()
-                history = []
-                for msg in chat_messages:
-                    try:
-                        book_recommendations = json.loads(msg.book_recommendations) if msg.book_recommendations else []
-                        article_recommendations = json.loads(msg.article_recommendations) if msg.article_recommendations else []
-                        follow_up_question = msg.follow_up_question if msg.follow_up_question else None
-                    except (json.JSONDecodeError, TypeError):
-                        book_recommendations = []
-                        article_recommendations = []
-                        follow_up_question = None
-                    history.append({
-                        'id': msg.id,
-                        'message': msg.message,
-                        'response': msg.response,
-                        'language': msg.language,
-                        'book_recommendations': book_recommendations,
-                        'article_recommendations': article_recommendations,
-                        'follow_up_question': follow_up_question,
-                        'created_at': msg.created_at.isoformat() if hasattr(msg.created_at, 'isoformat') else str(msg.created_at)
-                    })
-                return history
-        except Exception as e:
-            logger.error(f"Error fetching chat history: {str(e)}")
-            return []
+            created_at, msg_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+            return datetime.fromisoformat(created_at), int(msg_id)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    @staticmethod
+    def get_user_chat_history(user_id: int, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Fetch one page of a user's chat history, newest first.
+
+        Uses keyset pagination over the (user_id, created_at) index, so each
+        page costs the same regardless of how long the history is.
+
+        Args:
+            user_id (int): ID of the user
+            limit (int): Maximum number of messages to return
+            cursor (str, optional): Opaque cursor returned with the previous page
+
+        Returns:
+            dict: Contains chat_history and next_cursor (None on the last page)
+
+        Raises:
+            ValueError: If the cursor cannot be decoded
+        """
+        query = ChatMessage.query.filter(ChatMessage.user_id == user_id)
+        if cursor:
+            created_at, msg_id = ChatBotService._decode_cursor(cursor)
+            query = query.filter(or_(
+                ChatMessage.created_at < created_at,
+                and_(ChatMessage.created_at == created_at, ChatMessage.id < msg_id)
+            ))
+        rows = query.order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc()).limit(limit + 1).all()
+
+        page = rows[:limit]
+        history = [{
+            'id': msg.id,
+            'message': msg.message,
+            'response': msg.response,
+            'language': msg.language,
+            'book_recommendations': msg.book_recommendations or [],
+            'article_recommendations': msg.article_recommendations or [],
+            'follow_up_question': msg.follow_up_question or None,
+            'created_at': msg.created_at.isoformat() if msg.created_at else None
+        } for msg in page]
+        next_cursor = ChatBotService._encode_cursor(page[-1]) if len(rows) > limit else None
+        return {'chat_history': history, 'next_cursor': next_cursor}
     
     @staticmethod
     def clear_user_chat_history(user_id: int) -> bool:
@@ -130,15 +156,17 @@ class ChatBotService:
             return False
     
     def refresh_vector_store(self) -> bool:
-        try:
-            if hasattr(self.chatbot, 'load_content_from_db'):
-                self.chatbot.vector_store = self.chatbot.load_content_from_db()
-                logger.debug("Vector store refreshed successfully")
-                return True
+        if not hasattr(self.chatbot, 'rebuild_vector_store'):
             return False
-        except Exception as e:
-            logger.error(f"Error refreshing vector store: {str(e)}")
-            return False    
+        self.chatbot.rebuild_vector_store()
+        logger.debug("Vector store refreshed successfully")
+        return True
+
+
+@JobService.handler('refresh_vector_store')
+def refresh_vector_store_job(payload):
+    """Rebuild the chatbot vector store in the background."""
+    return {'refreshed': ChatBotService().refresh_vector_store()}    
         
         
         
\ No newline at end of file
@@ -0,0 +1,196 @@
+import os
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.db import db
+from app.model.AccountRequest import AccountRequest
+from app.model.Book import Book
+from app.model.Category import Category
+from app.model.DashboardMetric import DashboardMetric
+from app.model.DashboardMetricBucket import DashboardMetricBucket
+from app.model.Rental import Rental
+from app.model.RentalRequest import RentalRequest
+from app.model.User import User
+from app.model.association_tables import book_category_association
+from app.services.JobService import JobService
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Days of daily buckets kept for the dashboard time series
+HISTORY_DAYS = int(os.environ.get('DASHBOARD_HISTORY_DAYS', 90))
+TOP_CATEGORIES = int(os.environ.get('DASHBOARD_TOP_CATEGORIES', 5))
+
+# Time series -> timestamp column counted per day
+SERIES_COLUMNS = {
+    'rental_requests': RentalRequest.requested_at,
+    'rentals': Rental.rented_at,
+    'returns': Rental.returned_at,
+    'new_users': User.date_joined,
+}
+
+
+class DashboardStatsService:
+    """
+    Materialized figures for the admin dashboard.
+
+    ``refresh`` (run by the dashboard_stats_refresh job) recomputes the
+    headline counts into ``dashboard_metrics`` and the daily series into
+    ``dashboard_metric_buckets``. Series buckets are refreshed incrementally:
+    only days from the previous refresh onwards are recounted, so each run
+    scans one or two days of rows through the timestamp indexes rather than
+    the whole history. ``get_stats`` only reads the two small tables.
+    """
+
+    @staticmethod
+    def _group_counts(column):
+        rows = db.session.query(column, func.count()).group_by(column).all()
+        return {key if key is not None else '': count for key, count in rows}
+
+    @classmethod
+    def _headline_metrics(cls, now):
+        metrics = {
+            'users': cls._group_counts(User.role),
+            'rental_requests': cls._group_counts(RentalRequest.status),
+            'account_requests': cls._group_counts(AccountRequest.status),
+        }
+
+        titles, copies, available = db.session.query(
+            func.count(Book.id), func.coalesce(func.sum(Book.total_books), 0),
+            func.coalesce(func.sum(Book.available_books), 0)
+        ).one()
+        metrics['books'] = {'titles': titles, 'copies': int(copies), 'available': int(available)}
+
+        active = db.session.query(func.count(Rental.id)).filter(Rental.returned_at.is_(None)).scalar()
+        overdue = db.session.query(func.count(Rental.id)).filter(
+            Rental.returned_at.is_(None), Rental.due_at < now).scalar()
+        metrics['rentals'] = {'active': active, 'overdue': overdue}
+
+        # Categories ranked by the books' maintained borrow_count, so rentals aren't rescanned
+        borrows = func.coalesce(func.sum(Book.borrow_count), 0)
+        rows = db.session.query(Category.name, borrows) \
+            .join(book_category_association, book_category_association.c.category_id == Category.id) \
+            .join(Book, Book.id == book_category_association.c.book_id) \
+            .group_by(Category.name).order_by(borrows.desc()).limit(TOP_CATEGORIES).all()
+        metrics['top_categories'] = {name: int(count) for name, count in rows}
+        return metrics
+
+    @staticmethod
+    def _daily_counts(column, since):
+        day = func.date(column)
+        rows = db.session.query(day, func.count()).filter(column >= since).group_by(day).all()
+        # SQLite returns the day as a string, other backends as a date
+        return {(value if isinstance(value, date) else date.fromisoformat(str(value)[:10])): count
+                for value, count in rows if value is not None}
+
+    @classmethod
+    def refresh(cls, full=False):
+        """
+        Recompute the headline metrics and the recent time-series buckets.
+
+        Args:
+            full (bool): Recount every bucket in the history window, e.g. after backdated edits
+
+        Returns:
+            dict: Number of metric rows and buckets written
+        """
+        now = datetime.utcnow()
+        # The headline rows are rewritten on every run, so they also record the last refresh
+        last_refresh = db.session.query(func.max(DashboardMetric.refreshed_at)).scalar()
+        oldest = (now - timedelta(days=HISTORY_DAYS)).date()
+        start = max(last_refresh.date(), oldest) if last_refresh and not full else oldest
+        since = datetime.combine(start, datetime.min.time())
+
+        metric_rows = [
+            {'metric': metric, 'dimension': str(dimension), 'value': value, 'refreshed_at': now}
+            for metric, values in cls._headline_metrics(now).items()
+            for dimension, value in values.items()
+        ]
+        bucket_rows = [
+            {'metric': metric, 'day': day, 'value': count, 'refreshed_at': now}
+            for metric, column in SERIES_COLUMNS.items()
+            for day, count in cls._daily_counts(column, since).items()
+        ]
+
+        try:
+            metrics_table = DashboardMetric.__table__
+            buckets_table = DashboardMetricBucket.__table__
+            db.session.execute(metrics_table.delete())
+            if metric_rows:
+                db.session.execute(metrics_table.insert(), metric_rows)
+            # Days before ``start`` are final; recount the rest and drop buckets past the history window
+            db.session.execute(buckets_table.delete().where(
+                (buckets_table.c.day >= start) | (buckets_table.c.day < oldest)))
+            if bucket_rows:
+                db.session.execute(buckets_table.insert(), bucket_rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.debug(f"Refreshed dashboard stats from {start}: {len(metric_rows)} metrics, {len(bucket_rows)} buckets")
+        return {'metrics': len(metric_rows), 'buckets': len(bucket_rows)}
+
+    @classmethod
+    def get_stats(cls, days=30):
+        """
+        The materialized dashboard figures.
+
+        Args:
+            days (int): Length of the returned time series, at most DASHBOARD_HISTORY_DAYS
+
+        Returns:
+            dict: Headline counts, top categories, daily series and when they were computed
+        """
+        days = max(1, min(int(days), HISTORY_DAYS))
+        rows = DashboardMetric.query.all()
+        if not rows:
+            # Nothing materialized yet (fresh install); compute once inline
+            try:
+                cls.refresh()
+            except IntegrityError:
+                # The scheduled refresh wrote the rows first; use its result
+                pass
+            rows = DashboardMetric.query.all()
+
+        metrics = {}
+        for row in rows:
+            metrics.setdefault(row.metric, {})[row.dimension] = row.value
+        refreshed_at = max(row.refreshed_at for row in rows) if rows else None
+
+        today = datetime.utcnow().date()
+        first_day = today - timedelta(days=days - 1)
+        buckets = {(row.metric, row.day): row.value for row in DashboardMetricBucket.query.filter(
+            DashboardMetricBucket.day >= first_day).all()}
+        series = {
+            metric: [{'date': (first_day + timedelta(days=offset)).isoformat(),
+                      'count': buckets.get((metric, first_day + timedelta(days=offset)), 0)}
+                     for offset in range(days)]
+            for metric in SERIES_COLUMNS
+        }
+
+        users = metrics.get('users', {})
+        books = metrics.get('books', {})
+        rentals = metrics.get('rentals', {})
+        top_categories = sorted(metrics.get('top_categories', {}).items(), key=lambda item: item[1], reverse=True)
+        return {
+            'users': {'total': sum(users.values()), 'by_role': users},
+            'books': {'titles': books.get('titles', 0), 'copies': books.get('copies', 0),
+                      'available': books.get('available', 0)},
+            'rentals': {'active': rentals.get('active', 0), 'overdue': rentals.get('overdue', 0)},
+            'rental_requests': metrics.get('rental_requests', {}),
+            'account_requests': metrics.get('account_requests', {}),
+            'top_categories': [{'name': name, 'borrows': count} for name, count in top_categories],
+            'series': series,
+            'refreshed_at': refreshed_at.isoformat() + 'Z' if refreshed_at else None,
+        }
+
+
+@JobService.handler('dashboard_stats_refresh')
+def dashboard_stats_refresh_job(payload):
+    """
+    Recompute the materialized admin dashboard figures.
+    Payload: { "full": bool (optional) }
+    """
+    return DashboardStatsService.refresh(full=bool(payload.get('full')))
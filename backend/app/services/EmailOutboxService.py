@@ -0,0 +1,261 @@
+import os
+import time
+import random
+import uuid
+import threading
+import traceback
+import logging
+from datetime import datetime, timedelta
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import and_, func, or_
+from app.db import db
+from app.model.EmailOutbox import EmailOutbox
+from app.services.RateLimitService import RateLimitService
+from app.services.EmailService import EmailService
+from app.services.EmailProviderRegistry import EmailProviderRegistry
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class EmailOutboxService:
+    """
+    Persistent outbox for outbound email.
+
+    Request handlers only insert ``email_outbox`` rows. A small pool of
+    sender threads claims due rows in batches with a conditional UPDATE,
+    delivers them over a keep-alive ``requests.Session`` with a timeout,
+    and reschedules failures with exponential backoff until
+    ``EMAIL_MAX_ATTEMPTS`` is reached. Deliveries share a token bucket per
+    provider so bursts stay within the provider's rate limit. Rows left in
+    ``sending`` by a crashed process are reclaimed after
+    ``EMAIL_CLAIM_TIMEOUT`` seconds, so delivery is at-least-once.
+    """
+    _senders = []
+    _app = None
+    _lock = threading.Lock()
+    _wakeup = threading.Event()
+
+    @staticmethod
+    def _config(name, default, cast=int):
+        return cast(os.environ.get(name, default))
+
+    @classmethod
+    def start_senders(cls, app, num_senders=None):
+        """Start the sender threads for this process (idempotent)."""
+        with cls._lock:
+            if cls._senders:
+                return
+            cls._app = app
+            num_senders = num_senders or cls._config('EMAIL_SENDERS', 2)
+            for i in range(num_senders):
+                sender = threading.Thread(target=cls._send_loop, name=f"email-sender-{i}", daemon=True)
+                sender.start()
+                cls._senders.append(sender)
+            logger.debug(f"Started {num_senders} email senders")
+
+    @classmethod
+    def enqueue(cls, to_email, notification_type, params=None, commit=True):
+        """
+        Queue one email for background delivery.
+
+        Args:
+            to_email (str): Recipient address
+            notification_type (str): EmailService notification type
+            params (dict, optional): Template parameters
+            commit (bool): Commit now; pass False to queue inside the caller's transaction
+
+        Returns:
+            dict: success, message and the outbox ID
+        """
+        email = EmailOutbox(to_email=to_email, notification_type=notification_type, params=params or {})
+        db.session.add(email)
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        cls._notify()
+        return {"success": True, "message": "Email queued", "id": email.id}
+
+    @classmethod
+    def enqueue_many(cls, emails, commit=True):
+        """
+        Queue a batch of emails with a single INSERT.
+
+        Emails may carry an ``idempotency_key``; one whose key is already in
+        the outbox is skipped, so a retried or overlapping batch never sends
+        the same email twice.
+
+        Args:
+            emails (list): Dicts with to_email, notification_type, params and optionally idempotency_key
+            commit (bool): Commit now; pass False to queue inside the caller's transaction
+
+        Returns:
+            int: Number of emails queued
+        """
+        now = datetime.utcnow()
+        rows = [{
+            'to_email': email['to_email'],
+            'notification_type': email['notification_type'],
+            'params': email.get('params') or {},
+            'idempotency_key': email.get('idempotency_key'),
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': now,
+            'created_at': now
+        } for email in emails if email.get('to_email')]
+        keys = [row['idempotency_key'] for row in rows if row['idempotency_key']]
+        if keys:
+            seen = {key for (key,) in db.session.query(EmailOutbox.idempotency_key).filter(
+                EmailOutbox.idempotency_key.in_(keys)).all()}
+            unique_rows = []
+            for row in rows:
+                if row['idempotency_key'] in seen:
+                    continue
+                if row['idempotency_key']:
+                    seen.add(row['idempotency_key'])
+                unique_rows.append(row)
+            rows = unique_rows
+        if not rows:
+            return 0
+        db.session.execute(EmailOutbox.__table__.insert(), rows)
+        if commit:
+            db.session.commit()
+        cls._notify()
+        return len(rows)
+
+    @staticmethod
+    def get_stats():
+        """
+        Count outbox rows by status.
+
+        Returns:
+            dict: status -> count, plus the age in seconds of the oldest pending email
+        """
+        counts = dict(db.session.query(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status).all())
+        oldest = db.session.query(func.min(EmailOutbox.created_at)).filter(EmailOutbox.status == 'pending').scalar()
+        stats = {status: counts.get(status, 0) for status in ('pending', 'sending', 'sent', 'failed')}
+        stats['oldest_pending_seconds'] = round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0
+        return stats
+
+    @classmethod
+    def process_batch(cls, session=None, batch_size=None):
+        """
+        Claim and deliver one batch of due emails in the current app context.
+
+        Returns:
+            int: Number of emails claimed
+        """
+        sender = cls._get_sender()
+        if sender is None:
+            return 0
+        emails = cls._claim_batch(batch_size or cls._config('EMAIL_BATCH_SIZE', 20))
+        for email in emails:
+            cls._throttle(sender.provider.name)
+            result = sender.send_email(email.to_email, email.notification_type, email.params or {}, session=session)
+            cls._record_result(email, result)
+        return len(emails)
+
+    @classmethod
+    def _notify(cls):
+        if not cls._senders:
+            from flask import current_app
+            cls.start_senders(current_app._get_current_object())
+        cls._wakeup.set()
+
+    @staticmethod
+    def _get_sender():
+        try:
+            return EmailService(EmailProviderRegistry.get_provider())
+        except ValueError as e:
+            # Leave the emails queued until the provider is configured
+            logger.error(f"Email outbox paused: {str(e)}")
+            return None
+
+    @classmethod
+    def _due_filter(cls, now):
+        stale_before = now - timedelta(seconds=cls._config('EMAIL_CLAIM_TIMEOUT', 300))
+        return or_(
+            and_(EmailOutbox.status == 'pending', EmailOutbox.next_attempt_at <= now),
+            and_(EmailOutbox.status == 'sending', EmailOutbox.claimed_at < stale_before)
+        )
+
+    @classmethod
+    def _claim_batch(cls, batch_size):
+        now = datetime.utcnow()
+        due = cls._due_filter(now)
+        ids = [row.id for row in db.session.query(EmailOutbox.id).filter(due)
+               .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id).limit(batch_size).all()]
+        if not ids:
+            db.session.commit()
+            return []
+
+        # Re-checking the due filter in the UPDATE makes the claim atomic across senders
+        token = uuid.uuid4().hex
+        EmailOutbox.query.filter(EmailOutbox.id.in_(ids), due).update({
+            EmailOutbox.status: 'sending',
+            EmailOutbox.claim_token: token,
+            EmailOutbox.claimed_at: now,
+            EmailOutbox.attempts: EmailOutbox.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        return EmailOutbox.query.filter(EmailOutbox.claim_token == token).order_by(EmailOutbox.id).all()
+
+    @classmethod
+    def _throttle(cls, provider_name):
+        backend = RateLimitService.get_instance().backend
+        key = f"email:{provider_name}"
+        capacity = cls._config('EMAIL_RATE_LIMIT_CAPACITY', 5)
+        refill_rate = cls._config('EMAIL_RATE_LIMIT_PER_SEC', 1, float)
+        while True:
+            allowed, retry_after = backend.acquire(key, capacity, refill_rate)
+            if allowed:
+                return
+            time.sleep(retry_after)
+
+    @classmethod
+    def _record_result(cls, email, result):
+        now = datetime.utcnow()
+        email.claim_token = None
+        if result['success']:
+            email.status = 'sent'
+            email.sent_at = now
+            email.last_error = None
+        elif result.get('retryable', True) and email.attempts < cls._config('EMAIL_MAX_ATTEMPTS', 5):
+            base_delay = cls._config('EMAIL_RETRY_BASE_DELAY', 30, float)
+            delay = base_delay * (2 ** (email.attempts - 1)) * (1 + random.random())
+            email.status = 'pending'
+            email.next_attempt_at = now + timedelta(seconds=delay)
+            email.last_error = result['message']
+        else:
+            email.status = 'failed'
+            email.last_error = result['message']
+            logger.error(f"Giving up on email {email.id} to {email.to_email} after {email.attempts} attempts")
+        # Commit per email so a crash mid-batch resends as little as possible
+        db.session.commit()
+
+    @classmethod
+    def _new_session(cls):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    @classmethod
+    def _send_loop(cls):
+        poll_interval = cls._config('EMAIL_POLL_INTERVAL', 5, float)
+        batch_size = cls._config('EMAIL_BATCH_SIZE', 20)
+        session = cls._new_session()
+        while True:
+            cls._wakeup.wait(timeout=poll_interval)
+            cls._wakeup.clear()
+            try:
+                with cls._app.app_context():
+                    while cls.process_batch(session, batch_size) == batch_size:
+                        pass
+            except Exception as e:
+                logger.error(f"Email sender error: {str(e)}")
+                logger.error(traceback.format_exc())
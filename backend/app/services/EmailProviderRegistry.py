@@ -0,0 +1,178 @@
+import os
+import json
+import smtplib
+import threading
+import logging
+from datetime import datetime
+from email.message import EmailMessage
+import requests
+from flask import current_app
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+ACCOUNT_NOTIFICATION_TYPES = ('registration', 'account_approved', 'account_action')
+
+
+class EmailJSProvider:
+    """Delivers through the EmailJS REST API (the production default)."""
+    name = 'emailjs'
+
+    def __init__(self):
+        self.user_id = os.environ.get('EMAILJS_USER_ID')
+        self.service_id = os.environ.get('EMAILJS_SERVICE_ID')
+        self.template_1_id = os.environ.get('EMAILJS_TEMPLATE_1_ID')  # Registration/Approval
+        self.template_2_id = os.environ.get('EMAILJS_TEMPLATE_2_ID')  # Rental/Request Actions
+        self.access_token = os.environ.get('EMAILJS_ACCESS_TOKEN')
+        # Overridable so the sender can be pointed at a local stand-in
+        self.url = os.environ.get('EMAILJS_API_URL', "https://api.emailjs.com/api/v1.0/email/send")
+        self.timeout = float(os.environ.get('EMAIL_SEND_TIMEOUT', 10))
+        self.from_email = os.environ.get('EMAIL_FROM', 'no-reply@yourdomain.com')
+
+        if not all([self.user_id, self.service_id, self.access_token]):
+            logger.error("Missing required EmailJS credentials: user_id, service_id, or access_token")
+            raise ValueError("Missing required EmailJS credentials")
+
+    def send(self, to_email, notification_type, template_params, session=None):
+        template_id = self.template_1_id if notification_type in ACCOUNT_NOTIFICATION_TYPES else self.template_2_id
+        payload = {
+            "service_id": self.service_id,
+            "template_id": template_id,
+            "user_id": self.user_id,
+            "accessToken": self.access_token,
+            "template_params": {
+                "to_email": self.from_email,
+                "email": to_email,
+                **template_params
+            }
+        }
+        try:
+            logger.debug("Sending email with payload: %s", payload)
+            response = (session or requests).post(self.url, json=payload, timeout=self.timeout)
+            response.raise_for_status()
+            logger.info("Email sent successfully to %s", to_email)
+            return {"success": True, "message": "Email sent successfully", "retryable": False}
+        except requests.exceptions.RequestException as e:
+            error_message = f"Failed to send email: {str(e)}"
+            retryable = True
+            if hasattr(e, 'response') and e.response is not None:
+                error_message += f" - Response: {e.response.text}"
+                # Client errors other than throttling are permanent
+                retryable = e.response.status_code == 429 or e.response.status_code >= 500
+            logger.error(error_message)
+            return {"success": False, "message": error_message, "retryable": retryable}
+
+
+class SMTPProvider:
+    """Delivers a plain-text rendering of the template parameters over SMTP."""
+    name = 'smtp'
+
+    def __init__(self):
+        self.host = os.environ.get('SMTP_HOST')
+        self.port = int(os.environ.get('SMTP_PORT', 587))
+        self.username = os.environ.get('SMTP_USERNAME')
+        self.password = os.environ.get('SMTP_PASSWORD')
+        self.use_tls = os.environ.get('SMTP_USE_TLS', 'true').lower() == 'true'
+        self.timeout = float(os.environ.get('EMAIL_SEND_TIMEOUT', 10))
+        self.from_email = os.environ.get('EMAIL_FROM', 'no-reply@yourdomain.com')
+
+        if not self.host:
+            raise ValueError("Missing required SMTP_HOST")
+
+    def send(self, to_email, notification_type, template_params, session=None):
+        message = EmailMessage()
+        message['From'] = self.from_email
+        message['To'] = to_email
+        message['Subject'] = template_params.get('statusText') or f"Library update: {template_params.get('action', notification_type)}"
+        message.set_content("\n".join(f"{key}: {value}" for key, value in template_params.items()
+                                      if not key.startswith(('header', 'accent', 'show'))))
+        try:
+            with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+                if self.use_tls:
+                    smtp.starttls()
+                if self.username:
+                    smtp.login(self.username, self.password)
+                smtp.send_message(message)
+            logger.info("Email sent successfully to %s", to_email)
+            return {"success": True, "message": "Email sent successfully", "retryable": False}
+        except smtplib.SMTPResponseException as e:
+            logger.error("Failed to send email to %s: %s", to_email, str(e))
+            # 5xx replies are permanent rejections
+            return {"success": False, "message": f"Failed to send email: {str(e)}", "retryable": e.smtp_code < 500}
+        except (smtplib.SMTPException, OSError) as e:
+            logger.error("Failed to send email to %s: %s", to_email, str(e))
+            return {"success": False, "message": f"Failed to send email: {str(e)}", "retryable": True}
+
+
+class ConsoleProvider:
+    """Logs emails, or appends them as JSON lines to EMAIL_SINK_PATH; for development and tests."""
+    name = 'console'
+
+    def __init__(self):
+        self.path = os.environ.get('EMAIL_SINK_PATH')
+        self._lock = threading.Lock()
+
+    def send(self, to_email, notification_type, template_params, session=None):
+        record = {
+            'to_email': to_email,
+            'notification_type': notification_type,
+            'params': template_params,
+            'sent_at': datetime.utcnow().isoformat()
+        }
+        if self.path:
+            with self._lock, open(self.path, 'a') as sink:
+                sink.write(json.dumps(record) + "\n")
+        else:
+            logger.info("Email (console provider): %s", json.dumps(record))
+        return {"success": True, "message": "Email written to sink", "retryable": False}
+
+
+class EmailProviderRegistry:
+    """
+    App-scoped email provider, chosen by EMAIL_PROVIDER and built on first use.
+
+    Nothing is read or validated at import or app creation time, so the app
+    starts offline and without credentials; a misconfigured provider only
+    surfaces (as ValueError) when an email is actually delivered. Extra
+    backends can be added with ``register``.
+    """
+    _factories = {
+        EmailJSProvider.name: EmailJSProvider,
+        SMTPProvider.name: SMTPProvider,
+        ConsoleProvider.name: ConsoleProvider,
+    }
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, name, factory):
+        """Make ``factory`` (a zero-argument callable) available as EMAIL_PROVIDER=name."""
+        cls._factories[name] = factory
+
+    @staticmethod
+    def init_app(app):
+        app.config.setdefault('EMAIL_PROVIDER', os.getenv('EMAIL_PROVIDER', EmailJSProvider.name))
+        app.extensions['email_provider'] = None
+
+    @classmethod
+    def get_provider(cls, app=None):
+        """
+        Return the app's provider, building it on first use.
+
+        Raises:
+            ValueError: If the provider is unknown or its configuration is incomplete
+        """
+        app = app or current_app._get_current_object()
+        provider = app.extensions.get('email_provider')
+        if provider is not None:
+            return provider
+        with cls._lock:
+            provider = app.extensions.get('email_provider')
+            if provider is None:
+                name = app.config.get('EMAIL_PROVIDER', EmailJSProvider.name)
+                factory = cls._factories.get(name)
+                if factory is None:
+                    raise ValueError(f"Unknown email provider: {name}")
+                provider = app.extensions['email_provider'] = factory()
+                logger.debug(f"Email provider '{name}' initialized")
+        return provider
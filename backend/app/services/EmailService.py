@@ -1,29 +1,23 @@
-import os
-import requests
-from app.db import db
+from app.services.JobService import JobService
+from app.services.EmailProviderRegistry import EmailProviderRegistry, ACCOUNT_NOTIFICATION_TYPES
 import logging
-import dotenv
 
 # Configure logging for debugging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 class EmailService:
-    def __init__(self):
-        # Load environment variables from .env file
-        dotenv.load_dotenv()
-        self.user_id = os.environ.get('EMAILJS_USER_ID')
-        self.service_id = os.environ.get('EMAILJS_SERVICE_ID')
-        self.template_1_id = os.environ.get('EMAILJS_TEMPLATE_1_ID')  # Registration/Approval
-        self.template_2_id = os.environ.get('EMAILJS_TEMPLATE_2_ID')  # Rental/Request Actions
-        self.access_token = os.environ.get('EMAILJS_ACCESS_TOKEN')  # Load access token
-        self.url = "https://api.emailjs.com/api/v1.0/email/send"
-        self.from_email = os.environ.get('EMAIL_FROM', 'no-reply@yourdomain.com')
+    """
+    Renders notification templates and hands them to the app's email
+    provider (see EmailProviderRegistry). Constructing it is free; nothing
+    is configured until the first email is delivered.
+    """
+    def __init__(self, provider=None):
+        self._provider = provider
 
-        # Validate required environment variables
-        if not all([self.user_id, self.service_id, self.access_token]):
-            logger.error("Missing required EmailJS credentials: user_id, service_id, or access_token")
-            raise ValueError("Missing required EmailJS credentials")
+    @property
+    def provider(self):
+        return self._provider or EmailProviderRegistry.get_provider()
 
     def transform_action(self, action):
         """Transform action verbs into past tense and capitalize them."""
@@ -36,17 +30,28 @@ class EmailService:
             "borrow": "Borrowed",
             "return": "Returned",
             "deadline": "Due Soon",
+            "overdue": "Overdue",
             "remove": "Removed"
         }
         # Return the transformed action if in the map, otherwise capitalize the original
         return action_map.get(action.lower(), action.capitalize())
 
-    def send_email(self, to_email, notification_type, params):
+    def send_email(self, to_email, notification_type, params, session=None):
+        """
+        Deliver one email through the configured provider.
+
+        Request handlers should not call this directly; they queue the email
+        with EmailOutboxService, whose sender threads call it with a pooled
+        keep-alive ``session``.
+
+        Returns:
+            dict: success, message and retryable (False for errors that will
+                not go away on retry, such as a rejected template)
+        """
         # Determine which template to use
         # Template 1: All account-related actions (registration, approval, rejection, etc.)
         # Template 2: Something else (like rental/borrowing actions, etc.)
-        using_account_template = notification_type in ['registration', 'account_approved', 'account_action']
-        template_id = self.template_1_id if using_account_template else self.template_2_id
+        using_account_template = notification_type in ACCOUNT_NOTIFICATION_TYPES
         
         # Transform the action if it exists in params
         transformed_params = params.copy()
@@ -133,6 +138,22 @@ class EmailService:
                     'accentColorDark': '#dc2626',
                     'statusText': 'Request Rejected'
                 })
+            elif action == 'deadline':
+                transformed_params.update({
+                    'headerColor': '#d97706',  # Amber
+                    'headerColorDark': '#b45309',
+                    'accentColor': '#f59e0b',
+                    'accentColorDark': '#d97706',
+                    'statusText': 'Return Due Soon'
+                })
+            elif action == 'overdue':
+                transformed_params.update({
+                    'headerColor': '#b91c1c',  # Red
+                    'headerColorDark': '#991b1b',
+                    'accentColor': '#ef4444',
+                    'accentColorDark': '#dc2626',
+                    'statusText': 'Return Overdue'
+                })
             elif action == 'approve' or action == 'approved':
                 transformed_params.update({
                     'headerColor': '#047857',  # Green
@@ -151,28 +172,15 @@ class EmailService:
                     'statusText': 'Status Update'
                 })
         
-        # Create payload
-        payload = {
-            "service_id": self.service_id,
-            "template_id": template_id,
-            "user_id": self.user_id,
-            "accessToken": self.access_token,
-            "template_params": {
-                "to_email": self.from_email,
-                "email": to_email,
-                **transformed_params
-            }
-        }
-        
-        try:
-            logger.debug("Sending email with payload: %s", payload)  # Log the payload for debugging
-            response = requests.post(self.url, json=payload)
-            response.raise_for_status()
-            logger.info("Email sent successfully to %s", to_email)
-            return {"success": True, "message": "Email sent successfully"}
-        except requests.exceptions.RequestException as e:
-            error_message = f"Failed to send email: {str(e)}"
-            if hasattr(e, 'response') and e.response is not None:
-                error_message += f" - Response: {e.response.text}"
-            logger.error(error_message)
-            return {"success": False, "message": error_message}
\ No newline at end of file
+        return self.provider.send(to_email, notification_type, transformed_params, session=session)
+
+@JobService.handler('bulk_email')
+def bulk_email_job(payload):
+    """
+    Queue a batch of emails on the outbox.
+    Payload: { "emails": [{ "to_email": str, "notification_type": str, "params": dict }] }
+    """
+    from app.services.EmailOutboxService import EmailOutboxService
+
+    queued = EmailOutboxService.enqueue_many(payload.get('emails', []))
+    return {'queued': queued}
@@ -0,0 +1,145 @@
+import os
+import time
+import queue
+import threading
+import traceback
+import logging
+from typing import Callable, Dict, Iterable, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def entity_of(change: Tuple[str, int]) -> Tuple[str, int]:
+    """The item a change is about: ('book_delete', 3) and ('book', 3) share ('book', 3)."""
+    change_type, item_id = change
+    if change_type.endswith('_delete'):
+        change_type = change_type[:-len('_delete')]
+    return change_type, item_id
+
+
+class IndexSyncWorker:
+    """
+    Single long-lived thread that applies search index updates in batches.
+
+    Producers call ``submit`` from any thread; the worker drains the queue
+    into a batch until it holds ``max_batch_size`` distinct items or the
+    oldest change has waited ``max_wait`` seconds, then hands the changes to
+    ``apply_fn`` one at a time. Only the last change to an item inside a
+    batch is applied, so an update followed by a delete ends deleted. A
+    change whose ``apply_fn`` raises is retried with exponential backoff
+    (INDEX_SYNC_RETRY_DELAY, up to INDEX_SYNC_MAX_ATTEMPTS tries) unless a
+    newer change to the same item supersedes it.
+    """
+
+    def __init__(self, apply_fn: Callable[[Tuple[str, int]], None], name="index-sync",
+                 max_batch_size=None, max_wait=None, retry_delay=None, max_attempts=None):
+        self.apply_fn = apply_fn
+        self.max_batch_size = int(max_batch_size or os.environ.get('INDEX_SYNC_MAX_BATCH', 200))
+        self.max_wait = float(max_wait or os.environ.get('INDEX_SYNC_MAX_WAIT', 2.0))
+        self.retry_delay = float(retry_delay or os.environ.get('INDEX_SYNC_RETRY_DELAY', 1.0))
+        self.max_attempts = int(max_attempts or os.environ.get('INDEX_SYNC_MAX_ATTEMPTS', 5))
+        self._queue = queue.Queue()
+        # item -> (due, change, enqueued_at, attempts); only touched by the worker thread
+        self._retries = {}
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            'submitted': 0,
+            'applied': 0,
+            'batches': 0,
+            'failed': 0,
+            'dropped': 0,
+            'retry_pending': 0,
+            'last_batch_size': 0,
+            'last_lag_seconds': 0.0,
+            'max_lag_seconds': 0.0,
+        }
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, changes: Iterable[Tuple[str, int]]) -> None:
+        """Queue changes, each a (change_type, item_id) tuple."""
+        now = time.monotonic()
+        count = 0
+        for change in changes:
+            self._queue.put((change, now))
+            count += 1
+        if count:
+            with self._metrics_lock:
+                self._metrics['submitted'] += count
+
+    def metrics(self) -> Dict[str, float]:
+        with self._metrics_lock:
+            snapshot = dict(self._metrics)
+        snapshot['queue_depth'] = self._queue.qsize()
+        return snapshot
+
+    def _take_due_retries(self, batch, now):
+        for entity, (due, change, enqueued_at, attempts) in list(self._retries.items()):
+            if due <= now and len(batch) < self.max_batch_size:
+                del self._retries[entity]
+                batch[entity] = (change, enqueued_at, attempts)
+
+    def _collect_batch(self) -> Dict[Tuple[str, int], Tuple[Tuple[str, int], float, int]]:
+        """item -> (latest change, when the item's oldest pending change was queued, attempts so far)"""
+        batch = {}
+        self._take_due_retries(batch, time.monotonic())
+        deadline = None
+        while len(batch) < self.max_batch_size:
+            if deadline is None and batch:
+                deadline = min(enqueued_at for _, enqueued_at, _ in batch.values()) + self.max_wait
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+            elif self._retries:
+                timeout = min(due for due, _, _, _ in self._retries.values()) - time.monotonic()
+            else:
+                timeout = None
+            if timeout is not None and timeout <= 0:
+                if batch:
+                    break
+                self._take_due_retries(batch, time.monotonic())
+                continue
+            try:
+                change, enqueued_at = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                if batch:
+                    break
+                self._take_due_retries(batch, time.monotonic())
+                continue
+            entity = entity_of(change)
+            # A newer change supersedes a failed one still waiting for its retry
+            self._retries.pop(entity, None)
+            previous = batch.get(entity)
+            batch[entity] = (change, previous[1] if previous else enqueued_at, 0)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            applied = failed = dropped = 0
+            for entity, (change, enqueued_at, attempts) in batch.items():
+                try:
+                    self.apply_fn(change)
+                    applied += 1
+                except Exception as e:
+                    failed += 1
+                    attempts += 1
+                    logger.error(f"Index sync of {change} failed (attempt {attempts}): {str(e)}")
+                    logger.debug(traceback.format_exc())
+                    if attempts >= self.max_attempts:
+                        dropped += 1
+                        logger.error(f"Giving up on index sync of {change} after {attempts} attempts")
+                    else:
+                        due = time.monotonic() + self.retry_delay * 2 ** (attempts - 1)
+                        self._retries[entity] = (due, change, enqueued_at, attempts)
+            lag = time.monotonic() - min(enqueued_at for _, enqueued_at, _ in batch.values())
+            with self._metrics_lock:
+                self._metrics['batches'] += 1
+                self._metrics['last_batch_size'] = len(batch)
+                self._metrics['last_lag_seconds'] = round(lag, 3)
+                self._metrics['max_lag_seconds'] = round(max(self._metrics['max_lag_seconds'], lag), 3)
+                self._metrics['applied'] += applied
+                self._metrics['failed'] += failed
+                self._metrics['dropped'] += dropped
+                self._metrics['retry_pending'] = len(self._retries)
@@ -0,0 +1,91 @@
+import time
+import random
+import logging
+import threading
+from functools import wraps
+from sqlalchemy.exc import OperationalError
+from app.db import db
+from app.model.Book import Book
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+_retry_state = threading.local()
+
+
+def retry_on_conflict(attempts=3, base_delay=0.05):
+    """
+    Retry a unit of work that failed on a transient database conflict
+    (deadlock, lock wait timeout, serialization failure, locked SQLite file).
+
+    The session is rolled back before each retry, so the wrapped function
+    must be safe to run again from the start. When decorated functions are
+    nested, only the outermost one retries, since a rollback discards the
+    whole transaction.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_retry_state, 'active', False):
+                return fn(*args, **kwargs)
+            for attempt in range(1, attempts + 1):
+                _retry_state.active = True
+                try:
+                    return fn(*args, **kwargs)
+                except OperationalError as e:
+                    db.session.rollback()
+                    if attempt == attempts:
+                        logger.error("Giving up on %s after %s attempts: %s", fn.__name__, attempts, str(e))
+                        raise ValueError("The library is busy, please try again")
+                    delay = base_delay * (2 ** (attempt - 1)) * (1 + random.random())
+                    logger.warning("Conflict in %s (attempt %s), retrying in %.3fs", fn.__name__, attempt, delay)
+                    time.sleep(delay)
+                finally:
+                    _retry_state.active = False
+        return wrapper
+    return decorator
+
+
+class InventoryService:
+    """
+    Book availability changes expressed as conditional atomic UPDATEs.
+
+    The database evaluates the availability check and the decrement in one
+    statement, so concurrent checkouts can never take the same copy twice
+    and no table lock is needed. Neither method commits; the caller owns
+    the transaction.
+    """
+
+    @staticmethod
+    def checkout_copies(book_id, count=1):
+        """
+        Take ``count`` copies of a book and bump its borrow count.
+
+        Raises:
+            ValueError: If the book does not exist or not enough copies are available
+        """
+        updated = Book.query.filter(
+            Book.id == book_id,
+            Book.available_books >= count
+        ).update({
+            Book.available_books: Book.available_books - count,
+            Book.borrow_count: db.func.coalesce(Book.borrow_count, 0) + count
+        })
+        if updated != 1:
+            if not Book.query.filter(Book.id == book_id).count():
+                raise ValueError("Book not found")
+            raise ValueError("No copies available for this book")
+
+    @staticmethod
+    def release_copies(book_id, count=1):
+        """
+        Return ``count`` copies of a book to the shelf.
+
+        Returns:
+            bool: False if the book no longer exists
+        """
+        updated = Book.query.filter(Book.id == book_id).update({
+            Book.available_books: Book.available_books + count
+        })
+        return updated == 1
@@ -0,0 +1,296 @@
+import os
+import time
+import queue
+import threading
+import traceback
+import logging
+from datetime import datetime, timedelta
+from math import ceil
+from sqlalchemy import func
+from app.db import db
+from app.model.Job import Job
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class JobService:
+    """
+    Lightweight in-process job queue backed by the ``jobs`` table.
+
+    Jobs are persisted on enqueue, handed to local worker threads through an
+    in-memory queue and claimed with a conditional UPDATE, so several
+    processes can share the table without running a job twice. Workers also
+    poll the table, which picks up jobs enqueued by other processes or left
+    behind by a restart. A running job is leased: its process refreshes
+    ``heartbeat_at`` every JOB_HEARTBEAT_INTERVAL seconds, and a job whose
+    lease is older than JOB_LEASE_TIMEOUT (its worker crashed or the
+    process was killed) is requeued, or failed after JOB_MAX_ATTEMPTS.
+    """
+    _handlers = {}
+    _queue = queue.Queue()
+    _workers = []
+    _app = None
+    _lock = threading.Lock()
+    _schedules = {}
+    _running = set()  # IDs of jobs this process is running
+
+    @classmethod
+    def handler(cls, job_type):
+        """
+        Register a function as the handler for ``job_type``.
+
+        The handler receives the job payload (dict) and runs inside an app
+        context; its JSON-serializable return value is stored as the result.
+        """
+        def decorator(fn):
+            cls._handlers[job_type] = fn
+            return fn
+        return decorator
+
+    @classmethod
+    def registered_types(cls):
+        return sorted(cls._handlers.keys())
+
+    @classmethod
+    def start_workers(cls, app, num_workers=None):
+        """Start the worker threads for this process (idempotent)."""
+        with cls._lock:
+            if cls._workers:
+                return
+            cls._app = app
+            num_workers = num_workers or int(os.environ.get('JOB_WORKERS', 2))
+            for i in range(num_workers):
+                worker = threading.Thread(target=cls._work, name=f"job-worker-{i}", daemon=True)
+                worker.start()
+                cls._workers.append(worker)
+            threading.Thread(target=cls._heartbeat_loop, name="job-heartbeat", daemon=True).start()
+            logger.debug(f"Started {num_workers} job workers")
+
+    @classmethod
+    def enqueue(cls, job_type, payload=None, created_by=None):
+        """
+        Persist a new job and schedule it on a local worker.
+
+        Args:
+            job_type (str): Registered job type
+            payload (dict, optional): Arguments for the handler
+            created_by (int, optional): ID of the user who requested the job
+
+        Returns:
+            Job: The queued job
+
+        Raises:
+            ValueError: If no handler is registered for ``job_type``
+        """
+        if job_type not in cls._handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job = Job(type=job_type, payload=payload or {}, created_by=created_by)
+        db.session.add(job)
+        db.session.commit()
+
+        if not cls._workers:
+            from flask import current_app
+            cls.start_workers(current_app._get_current_object())
+        cls._queue.put(job.id)
+        return job
+
+    @classmethod
+    def schedule_every(cls, job_type, interval, payload=None, initial_delay=None):
+        """
+        Enqueue ``job_type`` every ``interval`` seconds from a timer thread
+        (idempotent per job type). A run is skipped while an earlier one is
+        still queued or running, so slow jobs never pile up. The first run
+        comes after ``initial_delay`` seconds (default: the shorter of
+        ``interval`` and JOB_SCHEDULE_INITIAL_DELAY).
+
+        Requires start_workers to have been called first.
+        """
+        with cls._lock:
+            if job_type in cls._schedules:
+                return
+            if cls._app is None:
+                raise ValueError("start_workers must be called before scheduling jobs")
+            if initial_delay is None:
+                initial_delay = min(interval, float(os.environ.get('JOB_SCHEDULE_INITIAL_DELAY', 30)))
+            timer = threading.Thread(target=cls._schedule_loop, args=(job_type, float(interval), payload,
+                                     float(initial_delay)),
+                                     name=f"job-schedule-{job_type}", daemon=True)
+            cls._schedules[job_type] = timer
+            timer.start()
+            logger.debug(f"Scheduled {job_type} every {interval}s")
+
+    @classmethod
+    def _schedule_loop(cls, job_type, interval, payload, delay):
+        while True:
+            time.sleep(delay)
+            delay = interval
+            try:
+                with cls._app.app_context():
+                    active = Job.query.filter(Job.type == job_type, Job.status.in_(('queued', 'running'))).count()
+                    if not active:
+                        cls.enqueue(job_type, payload)
+            except Exception as e:
+                logger.error(f"Failed to schedule {job_type}: {str(e)}")
+
+    @staticmethod
+    def get_job(job_id):
+        job = Job.query.get(job_id)
+        if not job:
+            raise ValueError("Job not found")
+        return job
+
+    @staticmethod
+    def get_jobs(page=1, per_page=10, status=None, job_type=None):
+        """
+        Fetch jobs with pagination, newest first.
+
+        Returns:
+            dict: Contains jobs, total_count and total_pages
+        """
+        query = Job.query
+        if status:
+            query = query.filter(Job.status == status)
+        if job_type:
+            query = query.filter(Job.type == job_type)
+        total_count = query.count()
+        jobs = query.order_by(Job.created_at.desc()).offset((page - 1) * per_page).limit(per_page).all()
+        return {
+            'jobs': [job.to_dict() for job in jobs],
+            'total_count': total_count,
+            'total_pages': max(1, ceil(total_count / per_page))
+        }
+
+    @classmethod
+    def _claim(cls, job_id):
+        """Atomically move a queued job to running; False if someone else got it."""
+        now = datetime.utcnow()
+        claimed = Job.query.filter(Job.id == job_id, Job.status == 'queued').update({
+            Job.status: 'running',
+            Job.started_at: now,
+            Job.heartbeat_at: now,
+            Job.attempts: Job.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed == 1:
+            with cls._lock:
+                cls._running.add(job_id)
+        return claimed == 1
+
+    @classmethod
+    def reclaim_stale_jobs(cls):
+        """
+        Requeue running jobs whose lease expired, failing those out of attempts.
+
+        Returns:
+            int: Number of jobs reclaimed
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=float(os.environ.get('JOB_LEASE_TIMEOUT', 300)))
+        max_attempts = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+        stale = Job.query.filter(Job.status == 'running',
+                                 func.coalesce(Job.heartbeat_at, Job.started_at) < cutoff)
+        failed = stale.filter(Job.attempts >= max_attempts).update({
+            Job.status: 'failed',
+            Job.error: 'Worker lost (lease expired)',
+            Job.finished_at: datetime.utcnow()
+        }, synchronize_session=False)
+        requeued = stale.filter(Job.attempts < max_attempts).update(
+            {Job.status: 'queued'}, synchronize_session=False)
+        db.session.commit()
+        if failed or requeued:
+            logger.warning(f"Reclaimed stale jobs: {requeued} requeued, {failed} failed")
+        return failed + requeued
+
+    @staticmethod
+    def prune_finished(retention_days=None):
+        """
+        Delete succeeded and failed jobs older than JOB_RETENTION_DAYS.
+
+        Returns:
+            int: Number of jobs deleted
+        """
+        retention_days = float(retention_days if retention_days is not None else os.environ.get('JOB_RETENTION_DAYS', 7))
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        deleted = Job.query.filter(Job.status.in_(('succeeded', 'failed')), Job.created_at < cutoff) \
+            .delete(synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Pruned {deleted} finished jobs older than {retention_days} days")
+        return deleted
+
+    @classmethod
+    def _heartbeat_loop(cls):
+        interval = float(os.environ.get('JOB_HEARTBEAT_INTERVAL', 30))
+        while True:
+            try:
+                with cls._app.app_context():
+                    with cls._lock:
+                        running = list(cls._running)
+                    if running:
+                        Job.query.filter(Job.id.in_(running), Job.status == 'running').update(
+                            {Job.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+                        db.session.commit()
+                    cls.reclaim_stale_jobs()
+            except Exception as e:
+                logger.error(f"Job heartbeat error: {str(e)}")
+            time.sleep(interval)
+
+    @classmethod
+    def _next_persisted_job_id(cls):
+        job = Job.query.filter(Job.status == 'queued').order_by(Job.created_at).first()
+        return job.id if job else None
+
+    @classmethod
+    def _work(cls):
+        poll_interval = float(os.environ.get('JOB_POLL_INTERVAL', 5))
+        while True:
+            try:
+                job_id = cls._queue.get(timeout=poll_interval)
+            except queue.Empty:
+                job_id = None
+            try:
+                with cls._app.app_context():
+                    if job_id is None:
+                        job_id = cls._next_persisted_job_id()
+                        if job_id is None:
+                            continue
+                    if cls._claim(job_id):
+                        try:
+                            cls._run(job_id)
+                        finally:
+                            with cls._lock:
+                                cls._running.discard(job_id)
+            except Exception as e:
+                logger.error(f"Job worker error: {str(e)}")
+
+    @classmethod
+    def _run(cls, job_id):
+        job = Job.query.get(job_id)
+        handler = cls._handlers.get(job.type)
+        logger.info(f"Running job {job.id} ({job.type})")
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for job type {job.type}")
+            result = handler(job.payload or {})
+            job = Job.query.get(job_id)
+            job.status = 'succeeded'
+            job.result = result
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            job = Job.query.get(job_id)
+            job.status = 'failed'
+            job.error = str(e)
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+
+@JobService.handler('job_prune')
+def job_prune_job(payload):
+    """
+    Delete old finished jobs so scheduled runs don't grow the table forever.
+    Payload: { "retention_days": float (optional) }
+    """
+    return {'deleted': JobService.prune_finished(payload.get('retention_days'))}
@@ -1,5 +1,27 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import and_, func, literal, or_, select
 from app.model.Notification import Notification
+from app.model.NotificationArchive import NotificationArchive
+from app.model.Broadcast import Broadcast
+from app.model.BroadcastReceipt import BroadcastReceipt
+from app.model.User import User
 from app.db import db
+from app.services.NotificationStream import NotificationStream
+from app.services.JobService import JobService
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Explicit recipient lists are inserted this many users per statement
+FANOUT_CHUNK_SIZE = int(os.environ.get('NOTIFICATION_FANOUT_CHUNK', 1000))
+# Role/all-user audiences at least this large get one shared broadcast row by default
+BROADCAST_THRESHOLD = int(os.environ.get('NOTIFICATION_BROADCAST_THRESHOLD', 5000))
+# Read notifications older than this many days are moved to notifications_archive
+RETENTION_DAYS = int(os.environ.get('NOTIFICATION_RETENTION_DAYS', 30))
+ARCHIVE_CHUNK_SIZE = int(os.environ.get('NOTIFICATION_ARCHIVE_CHUNK', 1000))
 
 class NotificationService:
     @staticmethod
@@ -21,7 +43,9 @@ class NotificationService:
             message=message
         )
         db.session.add(notification)
+        NotificationService._adjust_unread(User.id == user_id, 1)
         db.session.commit()
+        NotificationStream.get_instance().publish_to_user(user_id, 'notification', notification.to_dict())
         return notification
     
     @staticmethod
@@ -65,8 +89,15 @@ class NotificationService:
         """
         notification = Notification.query.get(notification_id)
         if notification:
-            notification.read = True
+            # Conditional so a repeated or concurrent read only decrements once
+            flipped = Notification.query.filter(
+                Notification.id == notification_id, Notification.read.is_(False)
+            ).update({Notification.read: True}, synchronize_session=False)
+            if flipped:
+                NotificationService._adjust_unread(User.id == notification.user_id, -1)
             db.session.commit()
+            if flipped:
+                NotificationService.publish_unread_count(notification.user_id)
         return notification
     
     @staticmethod
@@ -80,11 +111,16 @@ class NotificationService:
         Returns:
             int: Number of notifications marked as read
         """
-        notifications = Notification.query.filter_by(user_id=user_id, read=False).all()
-        count = len(notifications)
-        for notification in notifications:
-            notification.read = True
+        count = Notification.query.filter(
+            Notification.user_id == user_id, Notification.read.is_(False)
+        ).update({Notification.read: True}, synchronize_session=False)
+        # Relative, so a notification inserted concurrently stays counted
+        NotificationService._adjust_unread(User.id == user_id, -count)
+        user = User.query.get(user_id)
+        if user:
+            count += NotificationService._mark_broadcasts_read(user)
         db.session.commit()
+        NotificationService.publish_unread_count(user_id)
         return count
     
     @staticmethod
@@ -100,10 +136,267 @@ class NotificationService:
         """
         notification = Notification.query.get(notification_id)
         if notification:
+            user_id, was_unread = notification.user_id, not notification.read
             db.session.delete(notification)
+            if was_unread:
+                NotificationService._adjust_unread(User.id == user_id, -1)
             db.session.commit()
+            if was_unread:
+                NotificationService.publish_unread_count(user_id)
             return True
         return False
-    
-    
-    
\ No newline at end of file
+
+    @staticmethod
+    def fan_out(type, message, user_ids=None, role=None, broadcast=None, created_by=None):
+        """
+        Send one notification to many users in a single transaction.
+
+        Role and all-user audiences are written with one INSERT ... SELECT
+        over users; explicit user lists are inserted the same way in chunks
+        of NOTIFICATION_FANOUT_CHUNK. When ``broadcast`` is set (the default
+        for role/all-user audiences of at least NOTIFICATION_BROADCAST_THRESHOLD
+        users) a single shared Broadcast row is written instead and read state
+        is kept per user in broadcast_receipts.
+
+        Args:
+            type (str): Notification type
+            message (str): Notification message
+            user_ids (list, optional): Explicit recipients; unknown IDs are skipped
+            role (str, optional): Only notify users with this role (ignored with user_ids)
+            broadcast (bool, optional): Force (True) or forbid (False) a shared broadcast row
+            created_by (int, optional): ID of the admin sending a broadcast
+
+        Returns:
+            dict: mode ("fan_out" or "broadcast") and number of recipients
+
+        Raises:
+            ValueError: If a broadcast is requested for an explicit user list
+        """
+        if user_ids is not None:
+            if broadcast:
+                raise ValueError("Broadcasts target a role or all users, not a user list")
+            ids = list(dict.fromkeys(int(uid) for uid in user_ids))
+            recipients = 0
+            for start in range(0, len(ids), FANOUT_CHUNK_SIZE):
+                chunk = User.id.in_(ids[start:start + FANOUT_CHUNK_SIZE])
+                recipients += NotificationService._insert_for_users(type, message, chunk)
+                NotificationService._adjust_unread(chunk, 1)
+            db.session.commit()
+            stream = NotificationStream.get_instance()
+            for uid in ids:
+                stream.publish_to_user(uid, 'notification', {'type': type, 'message': message})
+            return {'mode': 'fan_out', 'recipients': recipients}
+
+        audience = User.role == role if role else None
+        if broadcast is not False:
+            count_query = db.session.query(func.count(User.id))
+            if audience is not None:
+                count_query = count_query.filter(audience)
+            recipients = count_query.scalar()
+            if broadcast or recipients >= BROADCAST_THRESHOLD:
+                broadcast_row = Broadcast(type=type, message=message, audience_role=role, created_by=created_by)
+                db.session.add(broadcast_row)
+                db.session.commit()
+                # Everyone sees the same row, so clients can render it without refetching
+                NotificationService._publish_to_audience(role, broadcast_row.to_dict())
+                return {'mode': 'broadcast', 'recipients': recipients}
+
+        recipients = NotificationService._insert_for_users(type, message, audience)
+        NotificationService._adjust_unread(audience, 1)
+        db.session.commit()
+        NotificationService._publish_to_audience(role, {'type': type, 'message': message, 'broadcast': False})
+        return {'mode': 'fan_out', 'recipients': recipients}
+
+    @staticmethod
+    def _publish_to_audience(role, data):
+        channel = f"role:{role}" if role else "all"
+        NotificationStream.get_instance().publish(channel, 'notification', data)
+
+    @staticmethod
+    def publish_unread_count(user_id):
+        """Push the user's current unread count to their open streams (e.g. other tabs)."""
+        NotificationStream.get_instance().publish_to_user(
+            user_id, 'unread_count', {'unread_count': NotificationService.count_unread(user_id)})
+
+    @staticmethod
+    def create_many(notifications):
+        """
+        Add one notification per item in the caller's transaction (no commit).
+
+        Args:
+            notifications (list): Dicts with user_id, type and message
+        """
+        now = datetime.utcnow()
+        rows = [{**item, 'read': False, 'created_at': now} for item in notifications]
+        if not rows:
+            return
+        db.session.execute(Notification.__table__.insert(), rows)
+        per_user = {}
+        for row in rows:
+            per_user[row['user_id']] = per_user.get(row['user_id'], 0) + 1
+        for delta in set(per_user.values()):
+            NotificationService._adjust_unread(
+                User.id.in_([uid for uid, count in per_user.items() if count == delta]), delta)
+
+    @staticmethod
+    def _adjust_unread(condition, delta):
+        """Shift the unread counter of every user matching ``condition`` in one UPDATE."""
+        query = User.query
+        if condition is not None:
+            query = query.filter(condition)
+        query.update({User.unread_notifications: User.unread_notifications + delta}, synchronize_session=False)
+
+    @staticmethod
+    def _insert_for_users(type, message, condition=None):
+        """INSERT ... SELECT one notification per user matching ``condition``; returns rows written."""
+        rows = select(User.id, literal(type), literal(message), literal(False), literal(datetime.utcnow()))
+        if condition is not None:
+            rows = rows.where(condition)
+        result = db.session.execute(Notification.__table__.insert().from_select(
+            ['user_id', 'type', 'message', 'read', 'created_at'], rows))
+        return result.rowcount
+
+    @staticmethod
+    def _broadcasts_for(user, unread_only=False):
+        """
+        Broadcasts visible to ``user``: addressed to everyone or the user's role,
+        sent after the user joined and not dismissed. Yields (Broadcast, read) rows.
+        """
+        receipt = and_(BroadcastReceipt.broadcast_id == Broadcast.id, BroadcastReceipt.user_id == user.id)
+        query = db.session.query(Broadcast, BroadcastReceipt.user_id.isnot(None)).outerjoin(BroadcastReceipt, receipt).filter(
+            or_(Broadcast.audience_role.is_(None), Broadcast.audience_role == user.role),
+            or_(BroadcastReceipt.dismissed.is_(None), BroadcastReceipt.dismissed.is_(False))
+        )
+        if user.date_joined:
+            query = query.filter(Broadcast.created_at >= user.date_joined)
+        if unread_only:
+            query = query.filter(BroadcastReceipt.user_id.is_(None))
+        return query
+
+    @staticmethod
+    def get_user_feed(user_id, limit=None, unread_only=False):
+        """
+        Get a user's personal notifications merged with the broadcasts they can see.
+
+        Returns:
+            list: Notification dictionaries, newest first
+        """
+        user = User.query.get(user_id)
+        if not user:
+            return []
+        notifications = NotificationService.get_user_notifications(user_id, limit=limit, unread_only=unread_only)
+        broadcasts = NotificationService._broadcasts_for(user, unread_only).order_by(Broadcast.created_at.desc())
+        if limit:
+            broadcasts = broadcasts.limit(limit)
+
+        feed = [(notification.created_at, notification.to_dict()) for notification in notifications]
+        feed += [(broadcast.created_at, broadcast.to_dict(read=read)) for broadcast, read in broadcasts.all()]
+        feed.sort(key=lambda item: item[0], reverse=True)
+        return [item for _, item in (feed[:limit] if limit else feed)]
+
+    @staticmethod
+    def count_unread(user_id):
+        """
+        Count a user's unread personal notifications and broadcasts.
+
+        Returns:
+            int: Number of unread items
+        """
+        user = User.query.get(user_id)
+        if not user:
+            return 0
+        personal = max(user.unread_notifications or 0, 0)
+        return personal + NotificationService._broadcasts_for(user, unread_only=True).count()
+
+    @staticmethod
+    def mark_broadcast_read(user_id, broadcast_id, dismiss=False):
+        """
+        Record that a user has read (or dismissed) a broadcast.
+
+        Returns:
+            Broadcast: The broadcast, or None if the user cannot see it
+        """
+        user = User.query.get(user_id)
+        if not user:
+            return None
+        visible = NotificationService._broadcasts_for(user).filter(Broadcast.id == broadcast_id).first()
+        if not visible:
+            return None
+        receipt = BroadcastReceipt.query.get((broadcast_id, user.id))
+        if receipt is None:
+            receipt = BroadcastReceipt(broadcast_id=broadcast_id, user_id=user.id, dismissed=dismiss)
+            db.session.add(receipt)
+        elif dismiss:
+            receipt.dismissed = True
+        db.session.commit()
+        NotificationService.publish_unread_count(user.id)
+        return visible[0]
+
+    @staticmethod
+    def _mark_broadcasts_read(user):
+        """Insert receipts for every unread broadcast the user can see; returns how many."""
+        unread = NotificationService._broadcasts_for(user, unread_only=True).with_entities(
+            Broadcast.id, literal(user.id), literal(datetime.utcnow()), literal(False))
+        result = db.session.execute(BroadcastReceipt.__table__.insert().from_select(
+            ['broadcast_id', 'user_id', 'read_at', 'dismissed'], unread))
+        return result.rowcount
+
+    @staticmethod
+    def reconcile_unread_counters():
+        """
+        Recompute every user's unread counter from the notifications table,
+        repairing any drift (e.g. rows written outside NotificationService).
+
+        Returns:
+            int: Number of counters that were corrected
+        """
+        actual = select(func.count(Notification.id)).where(
+            Notification.user_id == User.id, Notification.read.is_(False)
+        ).scalar_subquery()
+        corrected = User.query.filter(User.unread_notifications != actual).update(
+            {User.unread_notifications: actual}, synchronize_session=False)
+        db.session.commit()
+        return corrected
+
+    @staticmethod
+    def archive_read_notifications(retention_days=None, chunk_size=None):
+        """
+        Move read notifications older than the retention period into
+        notifications_archive, one chunk per transaction, so the hot table
+        only holds recent and unread rows.
+
+        Returns:
+            int: Number of notifications archived
+        """
+        retention_days = RETENTION_DAYS if retention_days is None else retention_days
+        chunk_size = chunk_size or ARCHIVE_CHUNK_SIZE
+        cutoff = datetime.utcnow() - timedelta(days=retention_days)
+        archived = 0
+        while True:
+            ids = [row.id for row in db.session.query(Notification.id).filter(
+                Notification.read.is_(True), Notification.created_at < cutoff
+            ).order_by(Notification.id).limit(chunk_size).all()]
+            if not ids:
+                break
+            db.session.execute(NotificationArchive.__table__.insert().from_select(
+                ['id', 'user_id', 'type', 'message', 'read', 'created_at', 'archived_at'],
+                select(Notification.id, Notification.user_id, Notification.type, Notification.message,
+                       Notification.read, Notification.created_at, literal(datetime.utcnow()))
+                .where(Notification.id.in_(ids))
+            ))
+            Notification.query.filter(Notification.id.in_(ids)).delete(synchronize_session=False)
+            db.session.commit()
+            archived += len(ids)
+        logger.info(f"Archived {archived} read notifications older than {retention_days} days")
+        return archived
+
+
+@JobService.handler('notification_maintenance')
+def notification_maintenance_job(payload):
+    """
+    Archive old read notifications and repair unread counters.
+    Payload: { "retention_days": int (optional) }
+    """
+    archived = NotificationService.archive_read_notifications(payload.get('retention_days'))
+    corrected = NotificationService.reconcile_unread_counters()
+    return {'archived': archived, 'counters_corrected': corrected}
@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import queue
+import itertools
+import threading
+import traceback
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Shared backend is optional
+    redis = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# An event is (event_id, channel, event_type, data)
+Event = Tuple[int, str, str, dict]
+
+
+class InMemoryPubSubBackend:
+    """Event IDs and replay buffers for a single process."""
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._buffers: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self.deliver = None  # set by NotificationStream
+
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        with self._lock:
+            event_id = self._last_id = next(self._ids)
+            event = (event_id, channel, event_type, data)
+            self._buffers.setdefault(channel, deque(maxlen=self.buffer_size)).append(event)
+        self.deliver(event)
+
+    def last_event_id(self) -> int:
+        return self._last_id
+
+    def recent(self, channel: str) -> List[Event]:
+        with self._lock:
+            return list(self._buffers.get(channel, ()))
+
+
+class RedisPubSubBackend:
+    """
+    Shares events between workers: IDs come from INCR, each channel keeps its
+    recent events in a capped list for replay, and one listener thread per
+    process relays the Redis pub/sub stream to local subscribers.
+    """
+    _PREFIX = "notifications"
+
+    def __init__(self, url, buffer_size):
+        self.client = redis.Redis.from_url(url)
+        self.buffer_size = buffer_size
+        self.deliver = None  # set by NotificationStream
+        self._listener = threading.Thread(target=self._listen, name="notification-stream-redis", daemon=True)
+        self._listener.start()
+
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        event_id = self.client.incr(f"{self._PREFIX}:event_id")
+        message = json.dumps([event_id, channel, event_type, data])
+        buffer_key = f"{self._PREFIX}:buffer:{channel}"
+        pipe = self.client.pipeline()
+        pipe.lpush(buffer_key, message)
+        pipe.ltrim(buffer_key, 0, self.buffer_size - 1)
+        pipe.publish(f"{self._PREFIX}:events", message)
+        pipe.execute()
+
+    def last_event_id(self) -> int:
+        return int(self.client.get(f"{self._PREFIX}:event_id") or 0)
+
+    def recent(self, channel: str) -> List[Event]:
+        messages = self.client.lrange(f"{self._PREFIX}:buffer:{channel}", 0, -1)
+        return [tuple(json.loads(message)) for message in reversed(messages)]
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(f"{self._PREFIX}:events")
+                for message in pubsub.listen():
+                    self.deliver(tuple(json.loads(message['data'])))
+            except Exception as e:
+                logger.error(f"Notification stream listener failed: {str(e)}")
+                logger.error(traceback.format_exc())
+                time.sleep(1)
+
+
+class Subscription:
+    """One connected client: a bounded queue of events for its channels."""
+
+    def __init__(self, channels: Iterable[str], max_queue: int):
+        self.channels = set(channels)
+        self.events = queue.Queue(maxsize=max_queue)
+        self.overflowed = False
+
+    def get(self, timeout: float) -> Optional[Event]:
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class NotificationStream:
+    """
+    Pub/sub that pushes notification events to connected SSE clients.
+
+    Events are published to channels (``user:<id>``, ``role:<role>`` or
+    ``all``) and carry increasing IDs. Each channel keeps its most recent
+    events so a client reconnecting with Last-Event-ID can be replayed what
+    it missed; when the gap is older than the buffer the client is told to
+    resync instead. By default events stay inside this process; setting
+    NOTIFICATION_STREAM_REDIS_URL shares them across workers.
+    """
+    private_instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, redis_url=None, buffer_size=None, max_queue=None):
+        self.buffer_size = int(buffer_size or os.environ.get('NOTIFICATION_STREAM_BUFFER', 100))
+        self.max_queue = int(max_queue or os.environ.get('NOTIFICATION_STREAM_MAX_QUEUE', 100))
+
+        redis_url = redis_url or os.environ.get('NOTIFICATION_STREAM_REDIS_URL')
+        if redis_url and redis is not None:
+            self.backend = RedisPubSubBackend(redis_url, self.buffer_size)
+            logger.debug("Using Redis notification stream backend")
+        else:
+            if redis_url:
+                logger.warning("NOTIFICATION_STREAM_REDIS_URL is set but redis is not installed; using in-process pub/sub")
+            self.backend = InMemoryPubSubBackend(self.buffer_size)
+        self.backend.deliver = self._deliver
+
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "NotificationStream":
+        if cls.private_instance is None:
+            with cls._instance_lock:
+                if cls.private_instance is None:
+                    cls.private_instance = cls()
+        return cls.private_instance
+
+    @staticmethod
+    def channels_for(user) -> List[str]:
+        return [f"user:{user.id}", f"role:{user.role}", "all"]
+
+    def publish(self, channel: str, event_type: str, data: dict) -> None:
+        """Publish an event; never raises, so callers can publish after committing."""
+        try:
+            self.backend.publish(channel, event_type, data)
+        except Exception as e:
+            logger.error(f"Failed to publish {event_type} to {channel}: {str(e)}")
+
+    def publish_to_user(self, user_id, event_type: str, data: dict) -> None:
+        self.publish(f"user:{user_id}", event_type, data)
+
+    def subscribe(self, channels: Iterable[str]) -> Subscription:
+        subscription = Subscription(channels, self.max_queue)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def replay(self, channels: Iterable[str], last_event_id: int) -> Optional[List[Event]]:
+        """
+        Events on ``channels`` newer than ``last_event_id``, oldest first.
+
+        Returns:
+            list: The missed events, or None if some may have fallen out of
+                the buffer (or the IDs were reset) and the client must resync
+        """
+        if last_event_id > self.backend.last_event_id():
+            return None
+        missed = []
+        for channel in channels:
+            recent = self.backend.recent(channel)
+            if len(recent) >= self.buffer_size and recent[0][0] > last_event_id + 1:
+                return None
+            missed.extend(event for event in recent if event[0] > last_event_id)
+        return sorted(missed, key=lambda event: event[0])
+
+    def connected_clients(self) -> int:
+        with self._lock:
+            return len(self._subscriptions)
+
+    def _deliver(self, event: Event) -> None:
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if event[1] in s.channels]
+        for subscription in subscriptions:
+            try:
+                subscription.events.put_nowait(event)
+            except queue.Full:
+                # A client this far behind gets a resync instead of a backlog
+                subscription.overflowed = True
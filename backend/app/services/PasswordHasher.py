@@ -0,0 +1,212 @@
+import os
+import time
+import threading
+import multiprocessing
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from flask_bcrypt import Bcrypt
+from app.services.RateLimitService import RateLimitExceeded
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+_bcrypt = Bcrypt()
+
+
+def pool_context(rebuild, preload):
+    """
+    Multiprocessing context for a worker pool.
+
+    The first pool is forked: it is cheap and safe because it is started
+    before the server has other threads (see PasswordHasher.start). A pool
+    rebuilt after a crash starts inside the threaded server, where a fork
+    can copy a lock another thread holds, so it comes from a forkserver
+    instead (spawn where there is none). Both import the server's __main__
+    module, which is why app.py keeps its startup under a __main__ guard.
+
+    Args:
+        rebuild (bool): Whether this replaces a pool that broke or was killed
+        preload (str): Module the workers need, usually the caller's __name__
+    """
+    methods = multiprocessing.get_all_start_methods()
+    if not rebuild:
+        # Spawned workers would re-run the server's __main__ module
+        return multiprocessing.get_context('fork' if 'fork' in methods else None)
+    if 'forkserver' in methods:
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(['__main__', preload])
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+# Run inside the pool processes; they return their own run time so the
+# caller can split latency into queue wait and hashing
+def _hash_password(password, rounds):
+    started = time.perf_counter()
+    pw_hash = _bcrypt.generate_password_hash(password, rounds).decode('utf-8')
+    return pw_hash, time.perf_counter() - started
+
+
+def _check_password(pw_hash, password):
+    started = time.perf_counter()
+    matches = _bcrypt.check_password_hash(pw_hash, password)
+    return matches, time.perf_counter() - started
+
+
+class PasswordHasher:
+    """
+    Bcrypt hashing and verification on a dedicated, bounded process pool.
+
+    Hashing is CPU-bound, so a burst of logins would otherwise tie up every
+    request thread. Calls are handed to PASSWORD_HASH_WORKERS processes;
+    at most PASSWORD_HASH_MAX_QUEUE more may wait, and a caller that cannot
+    get a slot within PASSWORD_HASH_QUEUE_TIMEOUT seconds is shed with
+    RateLimitExceeded instead of piling up. New hashes use BCRYPT_LOG_ROUNDS
+    and ``needs_rehash`` tells login to upgrade hashes made at another cost.
+    PASSWORD_HASH_WORKERS=0 hashes on the calling thread.
+    """
+    private_instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, workers=None, max_queue=None, queue_timeout=None, rounds=None):
+        self.workers = int(workers if workers is not None else os.environ.get('PASSWORD_HASH_WORKERS', min(2, os.cpu_count() or 1)))
+        self.max_queue = int(max_queue if max_queue is not None else os.environ.get('PASSWORD_HASH_MAX_QUEUE', 64))
+        self.queue_timeout = float(queue_timeout if queue_timeout is not None else os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+        self.rounds = int(rounds or os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._rebuilt = False  # Pools after the first must not be forked (see pool_context)
+        self._slots = threading.BoundedSemaphore(max(self.workers, 1) + self.max_queue)
+        self._metrics_lock = threading.Lock()
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._work_total = 0.0
+
+    @classmethod
+    def get_instance(cls) -> "PasswordHasher":
+        if cls.private_instance is None:
+            with cls._instance_lock:
+                if cls.private_instance is None:
+                    cls.private_instance = cls()
+        return cls.private_instance
+
+    def start(self):
+        """
+        Start the worker processes now rather than on the first call.
+
+        Call this before starting other threads: the workers are forked where
+        the platform allows it, and forking is only safe while the process is
+        still single-threaded.
+        """
+        if self.workers > 0:
+            self._get_executor().submit(int).result()
+
+    def hash(self, password):
+        """
+        Hash a password at the configured cost.
+
+        Returns:
+            str: The bcrypt hash
+
+        Raises:
+            RateLimitExceeded: If the pool and its queue are full
+        """
+        pw_hash, _ = self._run(_hash_password, password, self.rounds)
+        return pw_hash
+
+    def verify(self, pw_hash, password):
+        """
+        Check a password against a bcrypt hash.
+
+        Returns:
+            bool: Whether the password matches
+
+        Raises:
+            RateLimitExceeded: If the pool and its queue are full
+        """
+        matches, _ = self._run(_check_password, pw_hash, password)
+        return matches
+
+    def needs_rehash(self, pw_hash):
+        """Whether ``pw_hash`` was made with a cost other than BCRYPT_LOG_ROUNDS."""
+        try:
+            return int(pw_hash.split('$')[2]) != self.rounds
+        except (AttributeError, IndexError, ValueError):
+            return True
+
+    def get_stats(self):
+        """
+        Pool configuration, current queue depth and latency averages.
+
+        Returns:
+            dict: Counters plus average queue wait and hashing time in milliseconds
+        """
+        with self._metrics_lock:
+            completed = self._completed
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'rounds': self.rounds,
+                'in_flight': self._in_flight,
+                'queued': max(self._in_flight - self.workers, 0),
+                'peak_in_flight': self._peak_in_flight,
+                'completed': completed,
+                'rejected': self._rejected,
+                'avg_wait_ms': round(self._wait_total / completed * 1000, 1) if completed else 0,
+                'avg_hash_ms': round(self._work_total / completed * 1000, 1) if completed else 0,
+            }
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    context = pool_context(self._rebuilt, __name__)
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                    logger.debug(f"Started password hasher with {self.workers} workers at cost {self.rounds}")
+        return self._executor
+
+    def _reset_executor(self, executor):
+        with self._executor_lock:
+            if self._executor is executor:
+                self._executor = None
+                self._rebuilt = True
+        executor.shutdown(wait=False)
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            with self._metrics_lock:
+                self._rejected += 1
+            logger.warning("Password hasher saturated; shedding request")
+            raise RateLimitExceeded("Too many sign-ins in progress, please retry shortly", self.queue_timeout)
+
+        with self._metrics_lock:
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        started = time.perf_counter()
+        try:
+            if self.workers > 0:
+                executor = self._get_executor()
+                try:
+                    result, work_time = executor.submit(fn, *args).result()
+                except BrokenProcessPool:
+                    # A worker died (e.g. OOM-killed); start a fresh pool for the next caller
+                    self._reset_executor(executor)
+                    raise
+            else:
+                result, work_time = fn(*args)
+        finally:
+            with self._metrics_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+        with self._metrics_lock:
+            self._completed += 1
+            self._work_total += work_time
+            self._wait_total += max(time.perf_counter() - started - work_time, 0)
+        return result, work_time
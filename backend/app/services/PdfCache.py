@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+import logging
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from app.services.RateLimitService import SingleFlight
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class CachedPdf:
+    """A PDF in the cache: where it is and what to send as validators."""
+
+    def __init__(self, path, digest, size, last_modified):
+        self.path = path
+        self.digest = digest
+        self.size = size
+        self.last_modified = last_modified
+
+
+class PdfCache:
+    """
+    Content-addressed disk cache for remote article PDFs.
+
+    Each PDF is stored once under the SHA-256 of its bytes
+    (``objects/ab/abcd...pdf``); a small JSON entry per source URL points
+    at the object and keeps the upstream validators. Entries younger than
+    PDF_CACHE_TTL are served without contacting the origin; older ones are
+    revalidated with a conditional GET. Objects are touched on every hit
+    and the least recently used are evicted once the cache grows past
+    PDF_CACHE_MAX_BYTES. Concurrent misses for the same URL share one
+    download, and files only appear in the cache through an atomic rename,
+    so several processes can share the directory.
+    """
+    private_instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, root=None, max_bytes=None, max_pdf_bytes=None, ttl=None):
+        self.root = root or os.environ.get('PDF_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'lms-pdf-cache')
+        self.max_bytes = int(max_bytes or os.environ.get('PDF_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+        self.max_pdf_bytes = int(max_pdf_bytes or os.environ.get('PDF_MAX_BYTES', 100 * 1024 ** 2))
+        self.ttl = float(ttl if ttl is not None else os.environ.get('PDF_CACHE_TTL', 7 * 24 * 3600))
+        self.timeout = (float(os.environ.get('PDF_FETCH_CONNECT_TIMEOUT', 5)),
+                        float(os.environ.get('PDF_FETCH_READ_TIMEOUT', 30)))
+        for subdir in ('objects', 'urls', 'tmp'):
+            os.makedirs(os.path.join(self.root, subdir), exist_ok=True)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=int(os.environ.get('PDF_FETCH_POOL_SIZE', 16)))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = 'SmartElectronicLibrary-PdfCache/1.0'
+
+        self.single_flight = SingleFlight()
+        self._evict_lock = threading.Lock()
+        self._approx_size = None
+
+    @classmethod
+    def get_instance(cls) -> "PdfCache":
+        if cls.private_instance is None:
+            with cls._instance_lock:
+                if cls.private_instance is None:
+                    cls.private_instance = cls()
+        return cls.private_instance
+
+    def get(self, url):
+        """
+        Return the cached PDF for ``url``, downloading or revalidating it first if needed.
+
+        Args:
+            url (str): http(s) URL of the PDF
+
+        Returns:
+            CachedPdf: The local copy
+
+        Raises:
+            ValueError: If the URL is not http(s), or the response is not a PDF or is too large
+            requests.exceptions.RequestException: If the origin cannot be reached
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+            raise ValueError("Only http(s) PDF URLs can be proxied")
+
+        entry = self._read_entry(url)
+        if entry and self._object_exists(entry) and time.time() - entry['checked_at'] < self.ttl:
+            return self._hit(entry)
+
+        entry, _ = self.single_flight.do(self._url_key(url), lambda: self._refresh(url))
+        return self._hit(entry)
+
+    def get_stats(self):
+        """
+        Objects and bytes currently on disk.
+
+        Returns:
+            dict: objects, bytes and max_bytes
+        """
+        objects = self._scan_objects()
+        return {
+            'objects': len(objects),
+            'bytes': sum(size for _, size, _ in objects),
+            'max_bytes': self.max_bytes,
+        }
+
+    def _url_key(self, url):
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, url):
+        return os.path.join(self.root, 'urls', f"{self._url_key(url)}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, 'objects', digest[:2], f"{digest}.pdf")
+
+    def _object_exists(self, entry):
+        return os.path.exists(self._object_path(entry['digest']))
+
+    def _read_entry(self, url):
+        try:
+            with open(self._entry_path(url)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_entry(self, url, entry):
+        tmp_path = os.path.join(self.root, 'tmp', uuid.uuid4().hex)
+        with open(tmp_path, 'w') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._entry_path(url))
+
+    def _hit(self, entry):
+        path = self._object_path(entry['digest'])
+        try:
+            # The object's mtime doubles as its last-access time for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass
+        last_modified = datetime.fromtimestamp(entry['stored_at'], tz=timezone.utc)
+        return CachedPdf(path, entry['digest'], entry['size'], last_modified)
+
+    def _refresh(self, url):
+        # Another caller may have refreshed the entry while this one waited
+        latest = self._read_entry(url)
+        if latest and self._object_exists(latest) and time.time() - latest['checked_at'] < self.ttl:
+            return latest
+        if latest and not self._object_exists(latest):
+            latest = None
+
+        headers = {}
+        if latest:
+            if latest.get('etag'):
+                headers['If-None-Match'] = latest['etag']
+            if latest.get('last_modified'):
+                headers['If-Modified-Since'] = latest['last_modified']
+
+        logger.debug(f"Fetching PDF from {url}")
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304 and latest:
+                latest['checked_at'] = time.time()
+                self._write_entry(url, latest)
+                return latest
+            response.raise_for_status()
+            digest, size = self._store(response)
+
+        now = time.time()
+        entry = {
+            'url': url,
+            'digest': digest,
+            'size': size,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'stored_at': self._upstream_mtime(response) or now,
+            'checked_at': now,
+        }
+        if latest and latest['digest'] == digest:
+            entry['stored_at'] = latest['stored_at']
+        self._write_entry(url, entry)
+        self._evict_if_needed(size)
+        return entry
+
+    def _store(self, response):
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > self.max_pdf_bytes:
+            raise ValueError("PDF is too large to proxy")
+
+        sha = hashlib.sha256()
+        size = 0
+        tmp_path = os.path.join(self.root, 'tmp', uuid.uuid4().hex)
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if size == 0 and not chunk.lstrip().startswith(b'%PDF'):
+                        raise ValueError("URL did not return a PDF")
+                    size += len(chunk)
+                    if size > self.max_pdf_bytes:
+                        raise ValueError("PDF is too large to proxy")
+                    sha.update(chunk)
+                    f.write(chunk)
+            if size == 0:
+                raise ValueError("URL did not return a PDF")
+
+            digest = sha.hexdigest()
+            path = self._object_path(digest)
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return digest, size
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _upstream_mtime(response):
+        header = response.headers.get('Last-Modified')
+        if not header:
+            return None
+        try:
+            return parsedate_to_datetime(header).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def _scan_objects(self):
+        objects = []
+        objects_root = os.path.join(self.root, 'objects')
+        for shard in os.listdir(objects_root):
+            shard_path = os.path.join(objects_root, shard)
+            if not os.path.isdir(shard_path):
+                continue
+            for name in os.listdir(shard_path):
+                path = os.path.join(shard_path, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                objects.append((path, stat.st_size, stat.st_mtime))
+        return objects
+
+    def _evict_if_needed(self, added_bytes):
+        with self._evict_lock:
+            # Only rescan the directory when the running estimate crosses the limit
+            if self._approx_size is not None:
+                self._approx_size += added_bytes
+                if self._approx_size <= self.max_bytes:
+                    return
+
+            objects = self._scan_objects()
+            total = sum(size for _, size, _ in objects)
+            if total > self.max_bytes:
+                # Evict down to 90% so every new download doesn't trigger another scan
+                target = self.max_bytes * 0.9
+                for path, size, _ in sorted(objects, key=lambda obj: obj[2]):
+                    if total <= target:
+                        break
+                    try:
+                        os.remove(path)
+                        total -= size
+                        logger.debug(f"Evicted cached PDF {os.path.basename(path)}")
+                    except OSError:
+                        continue
+            self._approx_size = total
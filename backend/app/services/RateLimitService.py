@@ -0,0 +1,218 @@
+import os
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Shared backend is optional
+    redis = None
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a caller has to be shed instead of queued."""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = max(1, int(round(retry_after)))
+
+
+class InMemoryTokenBucketBackend:
+    """Per-process token buckets keyed by an arbitrary string."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str, capacity: int, refill_rate: float) -> Tuple[bool, float]:
+        """
+        Take one token from the bucket for ``key``.
+
+        Returns:
+            tuple: (allowed, seconds until the next token is available)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (float(capacity), now))
+            tokens = min(float(capacity), tokens + (now - updated_at) * refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return True, 0.0
+            self._buckets[key] = (tokens, now)
+            return False, (1 - tokens) / refill_rate if refill_rate > 0 else 60.0
+
+
+class RedisTokenBucketBackend:
+    """Token buckets shared by every worker through Redis."""
+
+    _SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + (now - ts) * rate)
+    local allowed = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, url: str):
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self._SCRIPT)
+
+    def acquire(self, key: str, capacity: int, refill_rate: float) -> Tuple[bool, float]:
+        allowed, tokens = self._script(keys=[f"ratelimit:{key}"], args=[capacity, refill_rate, time.time()])
+        if int(allowed):
+            return True, 0.0
+        return False, (1 - float(tokens)) / refill_rate if refill_rate > 0 else 60.0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls sharing a key so the work runs only once."""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls: Dict[str, "SingleFlight._Call"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` unless a call with the same key is already in flight, in
+        which case wait for it and share its outcome.
+
+        Returns:
+            tuple: (result, shared) where shared is True for coalesced callers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+class RateLimitService:
+    """
+    Load shedding for expensive endpoints: a token bucket per user, bounded
+    per-user and global concurrency, and single-flight coalescing of
+    duplicate requests.
+    """
+    private_instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, capacity=None, refill_rate=None, max_concurrent_per_user=None,
+                 max_concurrent=None, redis_url=None):
+        self.capacity = int(capacity or os.environ.get('CHATBOT_RATE_LIMIT_CAPACITY', 5))
+        self.refill_rate = float(refill_rate or os.environ.get('CHATBOT_RATE_LIMIT_REFILL_PER_SEC', 0.2))
+        self.max_concurrent_per_user = int(
+            max_concurrent_per_user or os.environ.get('CHATBOT_MAX_CONCURRENT_PER_USER', 1))
+        self.max_concurrent = int(max_concurrent or os.environ.get('CHATBOT_MAX_CONCURRENT', 8))
+
+        redis_url = redis_url or os.environ.get('RATE_LIMIT_REDIS_URL')
+        if redis_url and redis is not None:
+            self.backend = RedisTokenBucketBackend(redis_url)
+            logger.debug("Using Redis token bucket backend")
+        else:
+            if redis_url:
+                logger.warning("RATE_LIMIT_REDIS_URL is set but redis is not installed; using in-process buckets")
+            self.backend = InMemoryTokenBucketBackend()
+
+        self.single_flight = SingleFlight()
+        self._global_slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._user_slots: Dict[str, int] = {}
+        self._user_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "RateLimitService":
+        if cls.private_instance is None:
+            with cls._instance_lock:
+                if cls.private_instance is None:
+                    cls.private_instance = cls()
+        return cls.private_instance
+
+    def _acquire_user_slot(self, user_key: str) -> bool:
+        with self._user_lock:
+            in_flight = self._user_slots.get(user_key, 0)
+            if in_flight >= self.max_concurrent_per_user:
+                return False
+            self._user_slots[user_key] = in_flight + 1
+            return True
+
+    def _release_user_slot(self, user_key: str) -> None:
+        with self._user_lock:
+            in_flight = self._user_slots.get(user_key, 1) - 1
+            if in_flight <= 0:
+                self._user_slots.pop(user_key, None)
+            else:
+                self._user_slots[user_key] = in_flight
+
+    def run(self, user_key: str, fn: Callable[[], Any], coalesce_key: Optional[str] = None) -> Tuple[Any, bool]:
+        """
+        Run ``fn`` for ``user_key`` if the limits allow it.
+
+        Args:
+            user_key (str): Identity the bucket and concurrency slot belong to
+            fn (callable): The work to perform
+            coalesce_key (str, optional): Requests with the same key that are
+                already in flight share a single execution
+
+        Returns:
+            tuple: (result, shared)
+
+        Raises:
+            RateLimitExceeded: If the request must be shed
+        """
+        def limited():
+            allowed, retry_after = self.backend.acquire(user_key, self.capacity, self.refill_rate)
+            if not allowed:
+                raise RateLimitExceeded("Too many requests, please slow down", retry_after)
+
+            if not self._acquire_user_slot(user_key):
+                raise RateLimitExceeded("A previous message is still being processed", 1)
+            try:
+                if not self._global_slots.acquire(blocking=False):
+                    raise RateLimitExceeded("The service is busy, please try again shortly", 2)
+                try:
+                    return fn()
+                finally:
+                    self._global_slots.release()
+            finally:
+                self._release_user_slot(user_key)
+
+        if coalesce_key is None:
+            return limited(), False
+        return self.single_flight.do(coalesce_key, limited)
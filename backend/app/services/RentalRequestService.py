@@ -1,10 +1,16 @@
 from app.model import RentalRequest, User, Book, Rental
 from app.db import db
-from app.services.RentalService import RentalService
-from sqlalchemy.exc import IntegrityError
+from app.services.RentalService import RentalService, LOAN_PERIOD_DAYS
+from app.services.UserStatsCache import UserStatsCache
+from app.services.InventoryService import InventoryService, retry_on_conflict
+from app.services.JobService import JobService
+from app.services.TrendingService import TrendingService
+from sqlalchemy.exc import IntegrityError, OperationalError
 from sqlalchemy import or_
-from datetime import datetime
+from sqlalchemy.orm import joinedload
+from datetime import datetime, timedelta
 from math import ceil
+from collections import Counter
 
 class RentalRequestService:
     @staticmethod
@@ -162,6 +168,7 @@ class RentalRequestService:
         return request.to_dict()
 
     @staticmethod
+    @retry_on_conflict()
     def approve_request(request_id):
         """
         Approves a rental request, creates a rental, and updates book availability.
@@ -181,32 +188,151 @@ class RentalRequestService:
         if request.status != "pending":
             raise ValueError("Request is not pending")
 
-        book = Book.query.get(request.book_id)
-        if not book:
-            raise ValueError("Book not found")
-        if book.available_books <= 0:
-            raise ValueError("No copies available for this book")
-
         try:
-            # Start transaction
-            request.status = "approved"
-            
-            # Create rental using RentalService
-            rental = RentalService.create_rental(request.user_id, request.book_id, update_book=True)
-            
-            # Update book availability
-            # book.available_books -= 1
-            # book.borrow_count += 1
+            # Claim the request atomically so two admins cannot both approve it
+            claimed = RentalRequest.query.filter(
+                RentalRequest.id == request_id,
+                RentalRequest.status == "pending"
+            ).update({RentalRequest.status: "approved"})
+            if claimed != 1:
+                raise ValueError("Request is not pending")
+
+            # Takes the copy with a conditional UPDATE in the same transaction
+            RentalService.create_rental(request.user_id, request.book_id, update_book=True, commit=False)
 
             db.session.commit()
+            db.session.refresh(request)
             return request.to_dict()
         except (IntegrityError, ValueError) as e:
             db.session.rollback()
             raise ValueError(f"Failed to approve request: {str(e)}")
+        except OperationalError:
+            db.session.rollback()
+            raise
         except Exception as e:
             db.session.rollback()
             raise ValueError("Internal server error")
 
+    @staticmethod
+    @retry_on_conflict()
+    def batch_process(request_ids, action):
+        """
+        Approves or rejects many rental requests in a single transaction.
+
+        Approvals are allocated per book in request order against the copies
+        available, and inventory is taken with one conditional UPDATE per
+        book. Requests that cannot be processed are reported and left as
+        they are. Notifications and emails are queued as a background job.
+
+        Args:
+            request_ids (list): IDs of the rental requests
+            action (str): 'approve' or 'reject'
+
+        Returns:
+            dict: Contains processed (list of request dicts), failed (list of
+                {id, error}) and notification_job_id
+
+        Raises:
+            ValueError: If the action is invalid or no IDs are given
+        """
+        if action not in ('approve', 'reject'):
+            raise ValueError("Action must be 'approve' or 'reject'")
+        request_ids = list(dict.fromkeys(int(request_id) for request_id in request_ids))
+        if not request_ids:
+            raise ValueError("No request IDs provided")
+
+        requests = RentalRequest.query.options(
+            joinedload(RentalRequest.book), joinedload(RentalRequest.user)
+        ).filter(RentalRequest.id.in_(request_ids)).with_for_update(of=RentalRequest).all()
+        found = {request.id: request for request in requests}
+
+        failed = []
+        candidates = []
+        for request_id in request_ids:
+            request = found.get(request_id)
+            if not request:
+                failed.append({'id': request_id, 'error': "Rental request not found"})
+            elif request.status != "pending":
+                failed.append({'id': request_id, 'error': "Request is not pending"})
+            else:
+                candidates.append(request)
+
+        if action == 'approve':
+            candidates.sort(key=lambda request: request.requested_at or datetime.min)
+            book_ids = {request.book_id for request in candidates}
+            user_ids = {request.user_id for request in candidates}
+            available = dict(
+                db.session.query(Book.id, Book.available_books)
+                .filter(Book.id.in_(book_ids)).with_for_update().all()
+            ) if book_ids else {}
+            active = set(
+                db.session.query(Rental.user_id, Rental.book_id).filter(
+                    Rental.returned_at.is_(None),
+                    Rental.user_id.in_(user_ids),
+                    Rental.book_id.in_(book_ids)
+                ).all()
+            ) if candidates else set()
+
+            approved = []
+            taken = {}
+            for request in candidates:
+                key = (request.user_id, request.book_id)
+                if request.book_id not in available:
+                    failed.append({'id': request.id, 'error': "Book not found"})
+                elif key in active:
+                    failed.append({'id': request.id, 'error': "User already has an active rental for this book"})
+                elif (available[request.book_id] or 0) - taken.get(request.book_id, 0) <= 0:
+                    failed.append({'id': request.id, 'error': "No copies available for this book"})
+                else:
+                    taken[request.book_id] = taken.get(request.book_id, 0) + 1
+                    active.add(key)
+                    approved.append(request)
+            candidates = approved
+
+            try:
+                for book_id, count in taken.items():
+                    InventoryService.checkout_copies(book_id, count)
+                if candidates:
+                    now = datetime.utcnow()
+                    db.session.execute(Rental.__table__.insert(), [
+                        {'user_id': request.user_id, 'book_id': request.book_id, 'rented_at': now,
+                         'due_at': now + timedelta(days=LOAN_PERIOD_DAYS)}
+                        for request in candidates
+                    ])
+                    TrendingService.record('book', Counter(request.book_id for request in candidates), at=now)
+            except ValueError:
+                db.session.rollback()
+                raise
+
+        status = "approved" if action == 'approve' else "rejected"
+        processed_ids = [request.id for request in candidates]
+        try:
+            if processed_ids:
+                RentalRequest.query.filter(
+                    RentalRequest.id.in_(processed_ids),
+                    RentalRequest.status == "pending"
+                ).update({RentalRequest.status: status}, synchronize_session='fetch')
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            raise ValueError(f"Failed to {action} requests")
+        if action == 'approve':
+            # Rentals were inserted with a Core statement, which the cache listeners don't see
+            UserStatsCache.invalidate(*{request.user_id for request in candidates})
+
+        notifications = [{
+            'user_id': request.user_id,
+            'book_title': request.book.title if request.book else 'Unknown',
+            'action': action
+        } for request in candidates]
+        job = JobService.enqueue('rental_request_notifications', {'notifications': notifications}) if notifications else None
+
+        return {
+            'processed': [request.to_dict() for request in candidates],
+            'failed': failed,
+            'notification_job_id': job.id if job else None
+        }
+
     @staticmethod
     def reject_request(request_id):
         """
@@ -288,4 +414,48 @@ class RentalRequestService:
             .distinct()
             .all()
         )
-        return [book.to_dict() for book in books]
\ No newline at end of file
+        return [book.to_dict() for book in books]
+
+@JobService.handler('rental_request_notifications')
+def rental_request_notifications_job(payload):
+    """
+    Notify users about processed rental requests and queue their emails.
+    Payload: { "notifications": [{ "user_id": int, "book_title": str, "action": "approve"|"reject" }] }
+    """
+    from app.services.NotificationService import NotificationService
+    from app.services.EmailOutboxService import EmailOutboxService
+    from app.services.NotificationStream import NotificationStream
+
+    items = payload.get('notifications', [])
+    users = {user.id: user for user in User.query.filter(User.id.in_({item['user_id'] for item in items})).all()}
+    templates = {
+        'approve': ('borrow-accepted', 'Your request to borrow "{title}" has been approved.'),
+        'reject': ('borrow-rejected', 'Your request to borrow "{title}" has been rejected. Reason: Book currently unavailable.')
+    }
+
+    NotificationService.create_many([{
+        'user_id': item['user_id'],
+        'type': templates[item['action']][0],
+        'message': templates[item['action']][1].format(title=item['book_title'])
+    } for item in items if item['user_id'] in users])
+
+    # Queued in the same transaction, so a retried job never emails twice
+    queued = EmailOutboxService.enqueue_many([{
+        'to_email': users[item['user_id']].email,
+        'notification_type': 'request_action',
+        'params': {
+            'userName': users[item['user_id']].name,
+            'bookTitle': item['book_title'],
+            'action': item['action']
+        }
+    } for item in items if item['user_id'] in users], commit=False)
+    db.session.commit()
+
+    stream = NotificationStream.get_instance()
+    for item in items:
+        if item['user_id'] in users:
+            stream.publish_to_user(item['user_id'], 'notification', {
+                'type': templates[item['action']][0],
+                'message': templates[item['action']][1].format(title=item['book_title'])
+            })
+    return {'notified': len(items), 'emails_queued': queued}
@@ -1,14 +1,42 @@
+import os
+import logging
 from app.model import Rental, Book, User
 from app.db import db
-from datetime import datetime
+from datetime import datetime, timedelta
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import or_
+from sqlalchemy import and_, bindparam, or_, case, update
+from sqlalchemy.orm import joinedload
+from collections import Counter
+from app.model.EmailOutbox import EmailOutbox
+from app.services.InventoryService import InventoryService, retry_on_conflict
+from app.services.TrendingService import TrendingService
+from app.services.JobService import JobService
+from app.services.NotificationService import NotificationService
+from app.services.EmailOutboxService import EmailOutboxService
+from app.services.NotificationStream import NotificationStream
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# New rentals are due back after this many days
+LOAN_PERIOD_DAYS = int(os.environ.get('RENTAL_LOAN_DAYS', 14))
+# Borrowers are reminded this many hours before the due date
+REMINDER_HOURS = int(os.environ.get('RENTAL_REMINDER_HOURS', 48))
+# Overdue borrowers are reminded again every this many days
+OVERDUE_REPEAT_DAYS = int(os.environ.get('RENTAL_OVERDUE_REPEAT_DAYS', 3))
+SCAN_CHUNK_SIZE = int(os.environ.get('RENTAL_SCAN_CHUNK', 1000))
 
 class RentalService:
     @staticmethod
-    def create_rental(user_id, book_id, update_book=False):
+    @retry_on_conflict()
+    def create_rental(user_id, book_id, update_book=False, commit=True):
         """
         Creates a new rental for a user and book.
+
+        With update_book, a copy is taken with a conditional atomic UPDATE, so
+        concurrent rentals cannot oversell the last copy. Pass commit=False to
+        make the rental part of the caller's transaction.
         """
         user = User.query.get(user_id)
         if not user:
@@ -17,7 +45,7 @@ class RentalService:
         book = Book.query.get(book_id)
         if not book:
             raise ValueError("Book not found")
-        if book.available_books <= 0:
+        if not update_book and book.available_books <= 0:
             raise ValueError("No copies available for this book")
 
         existing_rental = Rental.query.filter_by(
@@ -26,13 +54,18 @@ class RentalService:
         if existing_rental:
             raise ValueError("User already has an active rental for this book")
 
-        rental = Rental(user_id=user_id, book_id=book_id)
-        db.session.add(rental)
-
         if update_book:
-            book.available_books -= 1
-            book.borrow_count += 1
+            InventoryService.checkout_copies(book_id)
 
+        now = datetime.utcnow()
+        rental = Rental(user_id=user_id, book_id=book_id, rented_at=now,
+                        due_at=now + timedelta(days=LOAN_PERIOD_DAYS))
+        db.session.add(rental)
+        TrendingService.record('book', {book_id: 1})
+
+        if not commit:
+            db.session.flush()
+            return rental
         try:
             db.session.commit()
             return rental
@@ -41,6 +74,7 @@ class RentalService:
             raise ValueError("Failed to create rental")
 
     @staticmethod
+    @retry_on_conflict()
     def return_book(rental_id):
         """
         Marks a rental as returned and updates book availability.
@@ -48,16 +82,19 @@ class RentalService:
         rental = Rental.query.get(rental_id)
         if not rental:
             raise ValueError("Rental not found")
-        if rental.returned_at:
-            raise ValueError("Rental already returned")
-
-        book = Book.query.get(rental.book_id)
-        if not book:
-            raise ValueError("Book not found")
 
         try:
-            rental.returned_at = datetime.utcnow()
-            book.available_books += 1
+            # Only one concurrent return of the same rental may put the copy back
+            returned = Rental.query.filter(
+                Rental.id == rental_id,
+                Rental.returned_at.is_(None)
+            ).update({Rental.returned_at: datetime.utcnow()})
+            if returned != 1:
+                db.session.rollback()
+                raise ValueError("Rental already returned")
+            if not InventoryService.release_copies(rental.book_id):
+                db.session.rollback()
+                raise ValueError("Book not found")
             db.session.commit()
             return rental
         except IntegrityError:
@@ -65,6 +102,7 @@ class RentalService:
             raise ValueError("Failed to return rental")
 
     @staticmethod
+    @retry_on_conflict()
     def update_rental(rental_id, data):
         """
         Updates a rental's details.
@@ -77,6 +115,7 @@ class RentalService:
         book_id = data.get('book_id')
         rented_at = data.get('rented_at')
         returned_at = data.get('returned_at')
+        due_at = data.get('due_at')
 
         old_book_id = rental.book_id
         was_returned = rental.returned_at is not None
@@ -92,22 +131,26 @@ class RentalService:
                 book = Book.query.get(book_id)
                 if not book:
                     raise ValueError("Book not found")
-                if book.available_books <= 0 and not was_returned:
-                    raise ValueError("No copies available for this book")
+                if not was_returned:
+                    # Move the copy from the old book to the new one
+                    InventoryService.checkout_copies(book_id)
+                    InventoryService.release_copies(old_book_id)
                 rental.book_id = book_id
-                # Update old and new book counts
-                old_book = Book.query.get(old_book_id)
-                if old_book and not was_returned:
-                    old_book.available_books += 1
-                if book and not was_returned:
-                    book.available_books -= 1
-                    book.borrow_count += 1
 
             if rented_at:
                 try:
                     rental.rented_at = datetime.fromisoformat(rented_at.replace('Z', '+00:00'))
                 except ValueError:
                     raise ValueError("Invalid rented_at format")
+                if not due_at:
+                    # Keep the loan period when only the start date is corrected
+                    rental.due_at = rental.rented_at + timedelta(days=LOAN_PERIOD_DAYS)
+
+            if due_at:
+                try:
+                    rental.due_at = datetime.fromisoformat(due_at.replace('Z', '+00:00'))
+                except ValueError:
+                    raise ValueError("Invalid due_at format")
 
             if 'returned_at' in data:
                 if returned_at:
@@ -115,20 +158,25 @@ class RentalService:
                         rental.returned_at = datetime.fromisoformat(returned_at.replace('Z', '+00:00'))
                     except ValueError:
                         raise ValueError("Invalid returned_at format")
-                else:
                     if not was_returned:
-                        book = Book.query.get(rental.book_id)
-                        if book:
-                            book.available_books += 1
+                        InventoryService.release_copies(rental.book_id)
+                else:
+                    if was_returned:
+                        # Reopening a returned rental takes a copy off the shelf again
+                        InventoryService.checkout_copies(rental.book_id)
                     rental.returned_at = None
 
             db.session.commit()
             return rental
+        except ValueError:
+            db.session.rollback()
+            raise
         except IntegrityError:
             db.session.rollback()
             raise ValueError("Failed to update rental")
 
     @staticmethod
+    @retry_on_conflict()
     def delete_rental(rental_id):
         """
         Deletes a rental and updates book availability if active.
@@ -137,10 +185,9 @@ class RentalService:
         if not rental:
             raise ValueError("Rental not found")
 
-        book = Book.query.get(rental.book_id)
         try:
-            if not rental.returned_at and book:
-                book.available_books += 1
+            if not rental.returned_at:
+                InventoryService.release_copies(rental.book_id)
             db.session.delete(rental)
             db.session.commit()
             return {"message": "Rental deleted successfully"}
@@ -149,23 +196,49 @@ class RentalService:
             raise ValueError("Failed to delete rental")
 
     @staticmethod
+    @retry_on_conflict()
     def bulk_delete_rentals(rental_ids):
         """
         Deletes multiple rentals and updates book availability.
+
+        Runs one SELECT of the affected rentals with their user and book, one
+        grouped UPDATE restoring copies per book and one DELETE ... WHERE id IN.
+        The rentals are locked as they are read, so a concurrent return can't
+        release the same copy between the read and the stock update.
+
+        Returns:
+            dict: message, deleted_count and notifications, the user/book
+                details of each deleted rental captured before deletion
         """
         if not rental_ids:
             raise ValueError("No rental IDs provided")
 
+        rentals = Rental.query.options(
+            joinedload(Rental.user), joinedload(Rental.book)
+        ).filter(Rental.id.in_(rental_ids)).order_by(Rental.id).with_for_update(of=Rental).all()
+
+        notifications = [{
+            'rental_id': rental.id,
+            'user_id': rental.user_id,
+            'email': rental.user.email,
+            'name': rental.user.name,
+            'book_title': rental.book.title
+        } for rental in rentals if rental.user and rental.book]
+        copies_by_book = Counter(rental.book_id for rental in rentals if rental.returned_at is None and rental.book_id)
+
         try:
-            for rental_id in rental_ids:
-                rental = Rental.query.get(rental_id)
-                if rental:
-                    book = Book.query.get(rental.book_id)
-                    if not rental.returned_at and book:
-                        book.available_books += 1
-                    db.session.delete(rental)
+            if copies_by_book:
+                Book.query.filter(Book.id.in_(list(copies_by_book))).update({
+                    Book.available_books: Book.available_books + case(dict(copies_by_book), value=Book.id, else_=0)
+                }, synchronize_session=False)
+            deleted = Rental.query.filter(Rental.id.in_([rental.id for rental in rentals])).delete(
+                synchronize_session=False) if rentals else 0
             db.session.commit()
-            return {"message": f"Deleted {len(rental_ids)} rentals"}
+            return {
+                "message": f"Deleted {deleted} rentals",
+                "deleted_count": deleted,
+                "notifications": notifications
+            }
         except IntegrityError:
             db.session.rollback()
             raise ValueError("Failed to delete rentals")
@@ -252,4 +325,143 @@ class RentalService:
         Fetches all active (unreturned) rentals.
         """
         rentals = Rental.query.filter(Rental.returned_at.is_(None)).all()
-        return [rental.to_dict() for rental in rentals]
\ No newline at end of file
+        return [rental.to_dict() for rental in rentals]
+
+    @staticmethod
+    def backfill_due_dates(chunk_size=None):
+        """
+        Give active rentals created before due dates existed one, rented_at plus the loan period.
+
+        Returns:
+            int: Number of rentals updated
+        """
+        chunk_size = chunk_size or SCAN_CHUNK_SIZE
+        set_due = update(Rental.__table__).where(Rental.__table__.c.id == bindparam('b_id')).values(
+            due_at=bindparam('b_due_at'))
+        now = datetime.utcnow()
+        filled = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(Rental.id, Rental.rented_at).filter(
+                Rental.returned_at.is_(None), Rental.due_at.is_(None), Rental.id > last_id
+            ).order_by(Rental.id).limit(chunk_size).all()
+            if not rows:
+                break
+            db.session.execute(set_due, [
+                {'b_id': row.id, 'b_due_at': (row.rented_at or now) + timedelta(days=LOAN_PERIOD_DAYS)}
+                for row in rows])
+            db.session.commit()
+            filled += len(rows)
+            last_id = rows[-1].id
+        return filled
+
+    @staticmethod
+    def scan_due_rentals(now=None, chunk_size=None):
+        """
+        Remind borrowers of rentals that are almost due or overdue.
+
+        Active rentals are walked through the (returned_at, due_at) index in
+        keyset chunks of RENTAL_SCAN_CHUNK, one transaction per chunk, so the
+        scan never holds more than one chunk in memory. Each reminder has an
+        idempotency key (rental, due date and, for overdue rentals, which
+        OVERDUE_REPEAT_DAYS period it is in); rentals whose key is already in
+        the email outbox are skipped, so overlapping or repeated scans never
+        notify twice.
+
+        Returns:
+            dict: Number of due-soon and overdue reminders sent, and due dates backfilled
+        """
+        now = now or datetime.utcnow()
+        chunk_size = chunk_size or SCAN_CHUNK_SIZE
+        backfilled = RentalService.backfill_due_dates(chunk_size)
+        due_soon = RentalService._remind(now, now + timedelta(hours=REMINDER_HOURS), 'deadline', now, chunk_size)
+        overdue = RentalService._remind(None, now, 'overdue', now, chunk_size)
+        logger.info(f"Rental due scan: {due_soon} due-soon and {overdue} overdue reminders")
+        return {'due_soon': due_soon, 'overdue': overdue, 'due_dates_backfilled': backfilled}
+
+    @staticmethod
+    def _reminder_key(row, action, now):
+        key = f"rental-{row.id}-{action}-{row.due_at:%Y%m%d%H%M}"
+        if action == 'overdue':
+            key += f"-{(now - row.due_at).days // max(OVERDUE_REPEAT_DAYS, 1)}"
+        return key
+
+    @staticmethod
+    def _remind(due_from, due_before, action, now, chunk_size):
+        notification_type = 'due-soon' if action == 'deadline' else 'overdue'
+        query = db.session.query(
+            Rental.id, Rental.user_id, Rental.due_at, User.name, User.email, Book.title
+        ).join(User, User.id == Rental.user_id).join(Book, Book.id == Rental.book_id).filter(
+            Rental.returned_at.is_(None), Rental.due_at < due_before)
+        if due_from is not None:
+            query = query.filter(Rental.due_at >= due_from)
+
+        sent = 0
+        last = None
+        while True:
+            chunk_query = query
+            if last is not None:
+                chunk_query = chunk_query.filter(or_(
+                    Rental.due_at > last[0], and_(Rental.due_at == last[0], Rental.id > last[1])))
+            rows = chunk_query.order_by(Rental.due_at, Rental.id).limit(chunk_size).all()
+            if not rows:
+                break
+            last = (rows[-1].due_at, rows[-1].id)
+
+            keys = {row.id: RentalService._reminder_key(row, action, now) for row in rows}
+            fresh = []
+            for attempt in range(2):
+                seen = {key for (key,) in db.session.query(EmailOutbox.idempotency_key).filter(
+                    EmailOutbox.idempotency_key.in_(list(keys.values()))).all()}
+                fresh = [row for row in rows if keys[row.id] not in seen]
+                if not fresh:
+                    break
+
+                messages = {}
+                for row in fresh:
+                    due_date = row.due_at.strftime('%b %d, %Y')
+                    if action == 'deadline':
+                        messages[row.id] = f'"{row.title}" is due back on {due_date}.'
+                    else:
+                        messages[row.id] = f'"{row.title}" was due back on {due_date}. Please return it as soon as possible.'
+                try:
+                    NotificationService.create_many([{
+                        'user_id': row.user_id, 'type': notification_type, 'message': messages[row.id]
+                    } for row in fresh])
+                    EmailOutboxService.enqueue_many([{
+                        'to_email': row.email,
+                        'notification_type': 'rental_reminder',
+                        'params': {
+                            'userName': row.name,
+                            'bookTitle': row.title,
+                            'dueDate': row.due_at.strftime('%Y-%m-%d'),
+                            'action': action
+                        },
+                        'idempotency_key': keys[row.id]
+                    } for row in fresh], commit=False)
+                    db.session.commit()
+                    break
+                except IntegrityError:
+                    db.session.rollback()
+                    if attempt:
+                        raise
+                    # An overlapping scan queued some of these first; re-check what is still unsent
+                    fresh = []
+                except Exception:
+                    db.session.rollback()
+                    raise
+
+            stream = NotificationStream.get_instance()
+            for row in fresh:
+                stream.publish_to_user(row.user_id, 'notification', {'type': notification_type, 'message': messages[row.id]})
+            sent += len(fresh)
+        return sent
+
+
+@JobService.handler('rental_due_scan')
+def rental_due_scan_job(payload):
+    """
+    Send due-soon and overdue reminders for active rentals.
+    Payload: {}
+    """
+    return RentalService.scan_due_rentals()
@@ -0,0 +1,170 @@
+import os
+import math
+import logging
+from datetime import datetime
+from sqlalchemy import and_, bindparam, select, update
+from sqlalchemy.exc import IntegrityError
+from app.db import db
+from app.model.TrendingScore import TrendingScore
+from app.services.JobService import JobService
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Trending periods and their half-lives in seconds
+TRENDING_PERIODS = {
+    'hour': 3600,
+    'day': 24 * 3600,
+    'week': 7 * 24 * 3600,
+}
+ITEM_TYPES = ('book', 'article')
+# Scores are stored relative to this fixed landmark (forward decay)
+LANDMARK = datetime(2024, 1, 1)
+
+
+def _logaddexp(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TrendingService:
+    """
+    Recency-weighted popularity of books and articles.
+
+    Every event adds ``exp(rate * (t - LANDMARK))`` to an item's score for
+    each period, where ``rate`` comes from the period's half-life. Because
+    the landmark is fixed, decaying all scores to "now" scales them by the
+    same factor, so rows rank by the stored value without rewriting them.
+    Scores are kept as natural logs so they never overflow. Events are
+    applied incrementally inside the caller's transaction (rentals when
+    they are created, article views when ArticleViewBuffer flushes), and
+    ``top`` reads the ranking straight from the (item_type, period, score)
+    index. ``prune`` drops items whose decayed score has faded away.
+    """
+
+    @staticmethod
+    def _rate(period):
+        return math.log(2) / TRENDING_PERIODS[period]
+
+    @staticmethod
+    def _elapsed(at):
+        return (at - LANDMARK).total_seconds()
+
+    @classmethod
+    def record(cls, item_type, counts, at=None):
+        """
+        Add events to the trending scores in the current transaction (the caller commits).
+
+        Args:
+            item_type (str): 'book' or 'article'
+            counts (dict): item id -> number of events
+            at (datetime): When the events happened (defaults to now)
+        """
+        counts = {int(item_id): count for item_id, count in counts.items() if count > 0}
+        if not counts:
+            return
+        at = at or datetime.utcnow()
+        elapsed = cls._elapsed(at)
+        entries = {}
+        for item_id, count in counts.items():
+            for period in TRENDING_PERIODS:
+                contribution = math.log(count) + cls._rate(period) * elapsed
+                entries[(item_id, period)] = (contribution, count)
+        cls._apply(item_type, entries, at)
+
+    @classmethod
+    def _apply(cls, item_type, entries, at, retry=True):
+        table = TrendingScore.__table__
+        item_ids = list({item_id for item_id, _ in entries})
+        existing = {(row.item_id, row.period): row for row in db.session.execute(
+            select(table.c.item_id, table.c.period, table.c.score, table.c.events)
+            .where(table.c.item_type == item_type, table.c.item_id.in_(item_ids))
+            .order_by(table.c.item_id, table.c.period)  # consistent lock order between writers
+            .with_for_update())}
+
+        updates, inserts = [], []
+        for (item_id, period), (contribution, count) in entries.items():
+            row = existing.get((item_id, period))
+            if row is None:
+                inserts.append({'item_type': item_type, 'item_id': item_id, 'period': period,
+                                'score': contribution, 'events': count, 'last_event_at': at})
+            else:
+                updates.append({'b_item_id': item_id, 'b_period': period,
+                                'b_score': _logaddexp(row.score, contribution),
+                                'b_events': row.events + count, 'b_last_event_at': at})
+
+        if updates:
+            db.session.execute(
+                update(table).where(and_(
+                    table.c.item_type == item_type,
+                    table.c.item_id == bindparam('b_item_id'),
+                    table.c.period == bindparam('b_period')
+                )).values(score=bindparam('b_score'), events=bindparam('b_events'),
+                          last_event_at=bindparam('b_last_event_at')),
+                updates)
+        if inserts:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(table.insert(), inserts)
+            except IntegrityError:
+                if not retry:
+                    raise
+                # Another transaction created some of these rows first; add to them instead
+                cls._apply(item_type, {(row['item_id'], row['period']): entries[(row['item_id'], row['period'])]
+                                       for row in inserts}, at, retry=False)
+
+    @classmethod
+    def top(cls, item_type, period='week', limit=10):
+        """
+        The highest-scoring items for a period.
+
+        Args:
+            item_type (str): 'book' or 'article'
+            period (str): 'hour', 'day' or 'week'
+            limit (int): Maximum number of items
+
+        Returns:
+            list: (item_id, score) pairs, best first; score is the decayed event count as of now
+
+        Raises:
+            ValueError: If the period is unknown
+        """
+        if period not in TRENDING_PERIODS:
+            raise ValueError(f"Unknown trending period: {period}")
+        now = cls._rate(period) * cls._elapsed(datetime.utcnow())
+        rows = db.session.query(TrendingScore.item_id, TrendingScore.score).filter(
+            TrendingScore.item_type == item_type, TrendingScore.period == period
+        ).order_by(TrendingScore.score.desc()).limit(limit).all()
+        return [(row.item_id, math.exp(row.score - now)) for row in rows]
+
+    @classmethod
+    def prune(cls, min_score=None):
+        """
+        Delete scores that have decayed below ``min_score`` (TRENDING_MIN_SCORE).
+
+        Returns:
+            int: Number of rows deleted
+        """
+        min_score = float(min_score if min_score is not None else os.environ.get('TRENDING_MIN_SCORE', 0.05))
+        elapsed = cls._elapsed(datetime.utcnow())
+        deleted = 0
+        for item_type in ITEM_TYPES:
+            for period in TRENDING_PERIODS:
+                threshold = math.log(min_score) + cls._rate(period) * elapsed
+                deleted += TrendingScore.query.filter(
+                    TrendingScore.item_type == item_type, TrendingScore.period == period,
+                    TrendingScore.score < threshold
+                ).delete(synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Pruned {deleted} faded trending scores")
+        return deleted
+
+
+@JobService.handler('trending_prune')
+def trending_prune_job(payload):
+    """
+    Drop trending scores that have decayed to nothing.
+    Payload: { "min_score": float (optional) }
+    """
+    return {'deleted': TrendingService.prune(payload.get('min_score'))}
@@ -0,0 +1,121 @@
+import os
+import time
+import threading
+import logging
+from collections import namedtuple
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.db import db
+from app.model.User import User
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Detached, read-only view of a user row; safe to share between requests
+CachedUser = namedtuple('CachedUser', ['id', 'name', 'email', 'role'])
+
+
+class UserCache:
+    """
+    Per-process cache of JWT identity -> user snapshot.
+
+    Entries are dropped after a commit that updates or deletes the user
+    (ORM flushes and bulk update/delete statements are picked up by session
+    listeners, like UserStatsCache), and expire after USER_CACHE_TTL seconds
+    so a role change made by another worker is seen within that window.
+    """
+    _entries = {}
+    _lock = threading.Lock()
+    _installed = False
+
+    @classmethod
+    def init_app(cls, app):
+        if cls._installed:
+            return
+        event.listen(Session, "after_flush", cls._collect_flush)
+        event.listen(Session, "do_orm_execute", cls._collect_bulk_statement)
+        event.listen(Session, "after_commit", cls._invalidate_collected)
+        event.listen(Session, "after_rollback", cls._discard_collected)
+        cls._installed = True
+
+    @staticmethod
+    def _ttl():
+        return float(os.environ.get('USER_CACHE_TTL', 30))
+
+    @classmethod
+    def get(cls, user_id):
+        """
+        Return a snapshot of the user, loading it on a miss.
+
+        Args:
+            user_id (int|str): User ID, e.g. the JWT identity
+
+        Returns:
+            CachedUser: The user, or None if it does not exist
+        """
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        now = time.monotonic()
+        with cls._lock:
+            entry = cls._entries.get(user_id)
+            if entry is not None and entry[1] >= now:
+                return entry[0]
+
+        row = db.session.execute(
+            select(User.id, User.name, User.email, User.role).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        with cls._lock:
+            cls._entries[user_id] = (user, now + cls._ttl())
+        return user
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        with cls._lock:
+            for user_id in user_ids:
+                cls._entries.pop(int(user_id), None)
+
+    @staticmethod
+    def _pending(session):
+        return session.info.setdefault('cached_dirty_users', set())
+
+    @classmethod
+    def _collect_flush(cls, session, flush_context):
+        for obj in session.dirty.union(session.deleted):
+            if isinstance(obj, User) and obj.id is not None:
+                cls._pending(session).add(int(obj.id))
+
+    @classmethod
+    def _collect_bulk_statement(cls, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is None or mapper.class_ is not User:
+            return
+        # Counter updates (e.g. unread_notifications) don't touch cached columns
+        if orm_execute_state.is_update:
+            values = getattr(orm_execute_state.statement, '_values', None) or {}
+            columns = {getattr(key, 'key', key) for key in values}
+            if columns and not columns & set(CachedUser._fields):
+                return
+        query = select(User.id)
+        whereclause = orm_execute_state.statement.whereclause
+        if whereclause is not None:
+            query = query.where(whereclause)
+        user_ids = orm_execute_state.session.execute(query).scalars().all()
+        cls._pending(orm_execute_state.session).update(int(uid) for uid in user_ids)
+
+    @classmethod
+    def _invalidate_collected(cls, session):
+        user_ids = session.info.pop('cached_dirty_users', None)
+        if user_ids:
+            cls.invalidate(*user_ids)
+
+    @classmethod
+    def _discard_collected(cls, session):
+        session.info.pop('cached_dirty_users', None)
@@ -5,9 +5,15 @@ from app.model.AccountRequest import AccountRequest
 from app.model.Article import Article
 from app.model.ArticleLike import ArticleLike
 from app.model.ArticleBookmark import ArticleBookmark
+from app.model.Rental import Rental
+from app.model.Category import Category
+from app.model.association_tables import book_category_association
+from app.services.UserStatsCache import UserStatsCache
+from app.serializers.UserSerializer import UserSerializer
 from app.db import db
 from datetime import datetime
-from sqlalchemy import or_
+from sqlalchemy import or_, func, select
+from sqlalchemy.orm import joinedload
 import math
 
 class UserService:
@@ -16,7 +22,7 @@ class UserService:
         return User.query.all()
         
     @staticmethod
-    def get_paginated_users(page=1, per_page=10, search='', role=None):
+    def get_paginated_users(page=1, per_page=10, search='', role=None, fields=None):
         """
         Get paginated users with optional filtering.
         
@@ -25,6 +31,8 @@ class UserService:
             per_page (int): Number of items per page
             search (str): Search query for name or email
             role (str): Filter by user role
+            fields (list, optional): UserSerializer fields the caller will emit;
+                only the columns and relations they need are loaded
             
         Returns:
             tuple: (users, total_count, total_pages)
@@ -56,12 +64,16 @@ class UserService:
         
         # Get paginated results
         offset = (page - 1) * per_page
+        if fields:
+            query = UserSerializer.plan(query, fields)
         users = query.order_by(User.id).offset(offset).limit(per_page).all()
         
         return users, total_count, total_pages
 
     @staticmethod
-    def get_user_by_id(user_id):
+    def get_user_by_id(user_id, fields=None):
+        if fields:
+            return UserSerializer.plan(User.query, fields).filter(User.id == user_id).first()
         return User.query.get(user_id)
 
     @staticmethod
@@ -87,6 +99,7 @@ class UserService:
         if role:
             user.role = role
         db.session.commit()
+        UserStatsCache.invalidate(user_id)
         return user
 
     @staticmethod
@@ -101,6 +114,7 @@ class UserService:
             
         db.session.delete(user)
         db.session.commit()
+        UserStatsCache.invalidate(user_id)
         return True
 
     @staticmethod
@@ -214,6 +228,11 @@ class UserService:
     def get_user_profile(user_id):
         """
         Get comprehensive user profile information including statistics and article interactions.
+
+        Counts come from one aggregate query, the favorite category from one
+        GROUP BY, and the article previews are limited to 5 in SQL. The result
+        is cached per user (see UserStatsCache) until the user's rentals,
+        likes or bookmarks change.
         
         Args:
             user_id (int): User ID
@@ -221,41 +240,42 @@ class UserService:
         Returns:
             dict: User profile information including stats and article interactions
         """
-        
+        cached = UserStatsCache.get(user_id)
+        if cached is not None:
+            return cached
+
         user = User.query.get(user_id)
         if not user:
             return None
         
         # Calculate days active
         days_active = (datetime.utcnow() - user.date_joined).days
-        
-        # Get liked articles
-        liked_articles = db.session.query(Article).join(
-            ArticleLike, Article.id == ArticleLike.article_id
-        ).filter(ArticleLike.user_id == user_id).all()
-        
-        # Get bookmarked articles
-        bookmarked_articles = db.session.query(Article).join(
-            ArticleBookmark, Article.id == ArticleBookmark.article_id
-        ).filter(ArticleBookmark.user_id == user_id).all()
-        
-        # Determine favorite category based on rental history
-        favorite_category = None
-        if user.rentals:
-            # Get all categories from user's rentals
-            category_counts = {}
-            for rental in user.rentals:
-                for category in rental.book.categories:
-                    if category.name in category_counts:
-                        category_counts[category.name] += 1
-                    else:
-                        category_counts[category.name] = 1
-            
-            # Find the most frequent category
-            if category_counts:
-                favorite_category = max(category_counts.items(), key=lambda x: x[1])[0]
-        
-        return {
+
+        def count_of(model, *criteria):
+            return select(func.count()).select_from(model).where(model.user_id == user_id, *criteria).scalar_subquery()
+
+        books_read, currently_reading, liked_count, bookmarked_count = db.session.query(
+            count_of(Rental, Rental.returned_at.isnot(None)),
+            count_of(Rental, Rental.returned_at.is_(None)),
+            count_of(ArticleLike),
+            count_of(ArticleBookmark)
+        ).one()
+
+        # Favorite category based on rental history
+        favorite = db.session.query(Category.name).join(
+            book_category_association, book_category_association.c.category_id == Category.id
+        ).join(
+            Rental, Rental.book_id == book_category_association.c.book_id
+        ).filter(Rental.user_id == user_id).group_by(Category.id, Category.name).order_by(
+            func.count(Rental.id).desc(), Category.name
+        ).first()
+
+        def preview(interaction):
+            return db.session.query(Article).join(interaction, Article.id == interaction.article_id).options(
+                joinedload(Article.author), joinedload(Article.meta)
+            ).filter(interaction.user_id == user_id).order_by(interaction.created_at.desc()).limit(5).all()
+
+        profile = {
             'user': {
                 'id': user.id,
                 'name': user.name,
@@ -265,14 +285,14 @@ class UserService:
             },
             'stats': {
                 'days_active': days_active,
-                'favorite_category': favorite_category,
-                'books_read': len([r for r in user.rentals if r.returned_at is not None]),
-                'currently_reading': len([r for r in user.rentals if r.returned_at is None]),
-                'liked_articles_count': len(liked_articles),
-                'bookmarked_articles_count': len(bookmarked_articles)
+                'favorite_category': favorite[0] if favorite else None,
+                'books_read': books_read,
+                'currently_reading': currently_reading,
+                'liked_articles_count': liked_count,
+                'bookmarked_articles_count': bookmarked_count
             },
-            'liked_articles': [article.to_dict() for article in liked_articles[:5]],  # Limit to 5 for preview
-            'bookmarked_articles': [article.to_dict() for article in bookmarked_articles[:5]]
+            'liked_articles': [article.to_dict() for article in preview(ArticleLike)],  # Limit to 5 for preview
+            'bookmarked_articles': [article.to_dict() for article in preview(ArticleBookmark)]
         }
-
-
+        UserStatsCache.set(user_id, profile)
+        return profile
@@ -0,0 +1,115 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.model.Rental import Rental
+from app.model.ArticleLike import ArticleLike
+from app.model.ArticleBookmark import ArticleBookmark
+
+# Configure logging
+logging.basicConfig(level=logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+# Writes to these models change a user's profile statistics
+TRACKED_MODELS = (Rental, ArticleLike, ArticleBookmark)
+
+
+class UserStatsCache:
+    """
+    Per-user cache of profile statistics.
+
+    Entries are dropped after a commit that writes a rental, like or
+    bookmark for the user (ORM flushes and bulk update/delete statements
+    are picked up by session listeners; Core inserts must call
+    ``invalidate``), and expire after PROFILE_STATS_TTL seconds so other
+    worker processes never serve stale stats for long. At most
+    PROFILE_STATS_CACHE_SIZE users are kept; the least recently used go first.
+    """
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+    _installed = False
+
+    @classmethod
+    def init_app(cls, app):
+        if cls._installed:
+            return
+        event.listen(Session, "after_flush", cls._collect_flush)
+        event.listen(Session, "do_orm_execute", cls._collect_bulk_statement)
+        event.listen(Session, "after_commit", cls._invalidate_collected)
+        event.listen(Session, "after_rollback", cls._discard_collected)
+        cls._installed = True
+
+    @staticmethod
+    def _ttl():
+        return float(os.environ.get('PROFILE_STATS_TTL', 60))
+
+    @staticmethod
+    def _max_size():
+        return int(os.environ.get('PROFILE_STATS_CACHE_SIZE', 10000))
+
+    @classmethod
+    def get(cls, user_id):
+        user_id = int(user_id)
+        with cls._lock:
+            entry = cls._entries.get(user_id)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del cls._entries[user_id]
+                return None
+            cls._entries.move_to_end(user_id)
+            return value
+
+    @classmethod
+    def set(cls, user_id, value):
+        user_id = int(user_id)
+        with cls._lock:
+            cls._entries[user_id] = (value, time.monotonic() + cls._ttl())
+            cls._entries.move_to_end(user_id)
+            while len(cls._entries) > cls._max_size():
+                cls._entries.popitem(last=False)
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        with cls._lock:
+            for user_id in user_ids:
+                cls._entries.pop(int(user_id), None)
+
+    @staticmethod
+    def _pending(session):
+        return session.info.setdefault('stats_dirty_users', set())
+
+    @classmethod
+    def _collect_flush(cls, session, flush_context):
+        for obj in set(session.new) | set(session.dirty) | set(session.deleted):
+            if isinstance(obj, TRACKED_MODELS) and obj.user_id is not None:
+                cls._pending(session).add(int(obj.user_id))
+
+    @classmethod
+    def _collect_bulk_statement(cls, orm_execute_state):
+        if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+            return
+        mapper = orm_execute_state.bind_mapper
+        if mapper is None or mapper.class_ not in TRACKED_MODELS:
+            return
+        model = mapper.class_
+        query = select(model.user_id)
+        whereclause = orm_execute_state.statement.whereclause
+        if whereclause is not None:
+            query = query.where(whereclause)
+        user_ids = orm_execute_state.session.execute(query).scalars().all()
+        cls._pending(orm_execute_state.session).update(int(uid) for uid in user_ids if uid is not None)
+
+    @classmethod
+    def _invalidate_collected(cls, session):
+        user_ids = session.info.pop('stats_dirty_users', None)
+        if user_ids:
+            cls.invalidate(*user_ids)
+
+    @classmethod
+    def _discard_collected(cls, session):
+        session.info.pop('stats_dirty_users', None)
@@ -0,0 +1,71 @@
+import os
+import time
+import tempfile
+
+# Point the app at a throwaway database before it is created
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'article_text.db')}")
+
+from app import create_app
+from app.db import db
+from app.model.Article import Article
+from app.model.ArticleAuthor import ArticleAuthor
+from app.model.ArticleText import ArticleText
+from app.services import ArticleTextService as article_text
+from app.services.ArticleTextService import ArticleTextService, MAX_ATTEMPTS
+from app.services.PdfCache import CachedPdf, PdfCache
+
+
+def _hang(path, max_pages):
+    """Stands in for pypdf stuck in a loop on a malformed PDF."""
+    time.sleep(3600)
+
+
+class StandInCache:
+    def get(self, url):
+        return CachedPdf(os.path.join(_db_dir, 'hostile.pdf'), 'digest', 0, None)
+
+
+def test_hanging_extraction_times_out_and_fails_the_article(monkeypatch):
+    monkeypatch.setattr(article_text, '_extract_pages', _hang)
+    monkeypatch.setattr(article_text, 'EXTRACT_TIMEOUT', 1)
+    monkeypatch.setattr(ArticleTextService, '_executor', None)
+    monkeypatch.setattr(PdfCache, 'get_instance', classmethod(lambda cls: StandInCache()))
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        author = ArticleAuthor(name="Author")
+        db.session.add(author)
+        db.session.commit()
+        article = Article(title="Hostile", slug="hostile", category="Test", author_id=author.id,
+                          summary="A PDF that never finishes parsing", pdf_url="https://example.com/hostile.pdf")
+        db.session.add(article)
+        db.session.commit()
+
+        executor = ArticleTextService._get_executor()
+        executor.submit(int).result()
+        workers = list(executor._processes.values())
+        started = time.monotonic()
+        outcome = ArticleTextService.process_article(article.id)
+        elapsed = time.monotonic() - started
+        print(f"Outcome: {outcome} after {elapsed:.1f}s")
+
+        state = ArticleText.query.get(article.id)
+        assert outcome == 'failed'
+        assert elapsed < 30
+        assert state.status == 'failed'
+        assert 'longer than' in state.last_error
+        # Not retried on the schedule: the same PDF would hang again
+        assert state.attempts >= MAX_ATTEMPTS
+        # The stuck worker was killed and the pool replaced
+        assert ArticleTextService._executor is not executor
+        for process in workers:
+            process.join(5)
+            assert not process.is_alive()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,90 @@
+import os
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Point the app at a throwaway database and a local EmailJS stand-in before it is created
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'outbox.db')}")
+os.environ.update({
+    'EMAILJS_USER_ID': 'test-user',
+    'EMAILJS_SERVICE_ID': 'test-service',
+    'EMAILJS_ACCESS_TOKEN': 'test-token',
+    'EMAIL_RETRY_BASE_DELAY': '0',
+    'EMAIL_RATE_LIMIT_CAPACITY': '100',
+    'EMAIL_RATE_LIMIT_PER_SEC': '100',
+})
+
+from app import create_app
+from app.db import db
+from app.model import EmailOutbox
+from app.services.EmailOutboxService import EmailOutboxService
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Accepts every email, except: the first attempt for flaky@ fails with 503, bounce@ always gets 400."""
+    received = []
+    attempts = {}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        to_email = body['template_params']['email']
+        StandInHandler.attempts[to_email] = StandInHandler.attempts.get(to_email, 0) + 1
+        if to_email.startswith('bounce@'):
+            status = 400
+        elif to_email.startswith('flaky@') and StandInHandler.attempts[to_email] == 1:
+            status = 503
+        else:
+            status = 200
+            StandInHandler.received.append(to_email)
+        self.send_response(status)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'OK')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_outbox_delivers_retries_and_gives_up(monkeypatch):
+    server = HTTPServer(('127.0.0.1', 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv('EMAILJS_API_URL', f"http://127.0.0.1:{server.server_port}/send")
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Mark the senders as started so the test drives delivery itself
+        monkeypatch.setattr(EmailOutboxService, '_senders', [threading.current_thread()])
+
+        queued = EmailOutboxService.enqueue_many([
+            {'to_email': f"reader{i}@example.com", 'notification_type': 'rental', 'params': {'action': 'borrow'}}
+            for i in range(10)
+        ] + [
+            {'to_email': 'flaky@example.com', 'notification_type': 'rental', 'params': {'action': 'return'}},
+            {'to_email': 'bounce@example.com', 'notification_type': 'rental', 'params': {'action': 'return'}},
+        ])
+        assert queued == 12
+
+        session = EmailOutboxService._new_session()
+        while EmailOutboxService.process_batch(session, batch_size=5):
+            pass
+
+        stats = EmailOutboxService.get_stats()
+        print(f"Outbox: {stats}, attempts: {StandInHandler.attempts}")
+
+        assert stats['sent'] == 11
+        assert stats['failed'] == 1
+        assert stats['pending'] == 0
+        assert StandInHandler.attempts['flaky@example.com'] == 2
+        assert StandInHandler.attempts['bounce@example.com'] == 1
+        assert EmailOutbox.query.filter_by(to_email='bounce@example.com').one().status == 'failed'
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__, '-q'])
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import threading
+
+# Point the app at a throwaway database before it is created
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_db_dir, 'inventory.db')}")
+
+from app import create_app
+from app.db import db
+from app.model import Book, User, Rental
+from app.services.RentalService import RentalService
+
+COPIES = 5
+BORROWERS = 50
+
+
+def test_no_oversell_under_concurrency():
+    app = create_app()
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        book = Book(title="Contended Book", total_books=COPIES, available_books=COPIES, borrow_count=0)
+        db.session.add(book)
+        users = [User(name=f"Student {i}", email=f"student{i}@example.com", password_hash="x") for i in range(BORROWERS)]
+        db.session.add_all(users)
+        db.session.commit()
+        book_id = book.id
+        user_ids = [user.id for user in users]
+
+    barrier = threading.Barrier(BORROWERS)
+    outcomes = []
+    outcomes_lock = threading.Lock()
+
+    def borrow(user_id):
+        with app.app_context():
+            barrier.wait()
+            try:
+                RentalService.create_rental(user_id, book_id, update_book=True)
+                outcome = 'rented'
+            except ValueError as e:
+                outcome = str(e)
+            with outcomes_lock:
+                outcomes.append(outcome)
+
+    threads = [threading.Thread(target=borrow, args=(user_id,)) for user_id in user_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        book = Book.query.get(book_id)
+        rentals = Rental.query.filter_by(book_id=book_id).count()
+        print(f"Outcomes: {outcomes.count('rented')} rented, {len(outcomes) - outcomes.count('rented')} refused")
+        print(f"available_books={book.available_books} borrow_count={book.borrow_count} rentals={rentals}")
+
+        assert outcomes.count('rented') == COPIES
+        assert rentals == COPIES
+        assert book.available_books == 0
+        assert book.borrow_count == COPIES
+
+
+if __name__ == '__main__':
+    test_no_oversell_under_concurrency()
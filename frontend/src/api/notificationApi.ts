@@ -6,6 +6,7 @@ export interface Notification {
   message: string;
   read: boolean;
   created_at: string;  // ISO date string
+  broadcast?: boolean;
 }
 
 const API_BASE_URL = '/api';
@@ -52,6 +53,12 @@ export const notificationApi = {
         return response.data;
     },
     
+    // EventSource cannot send an Authorization header, so the token goes in the query string
+    streamUrl: () => {
+        const token = getAuthToken();
+        return `${API_BASE_URL}/notifications/stream?token=${encodeURIComponent(token ?? '')}`;
+    },
+
     markAllAsRead: async () => {
         const response = await axios.put(
         `${API_BASE_URL}/notifications/mark-all-read`, 
@@ -253,6 +253,8 @@ const Chatbot: React.FC = () => {
       if (axios.isAxiosError(error) && error.response?.status === 401) {
         toast.error(translations[language].authError);
         setIsOpen(false);
+      } else if (axios.isAxiosError(error) && error.response?.status === 429) {
+        toast.error(error.response.data?.error || 'Too many messages. Please wait a moment and try again.');
       } else {
         toast.error('Failed to get a response. Please try again.');
       }
@@ -48,6 +48,10 @@ const NotificationDropdown: React.FC<NotificationDropdownProps> = ({ onClose })
         return <X className="w-5 h-5 text-red-500" />;
       case 'info':
         return <AlertCircle className="w-5 h-5 text-blue-500" />;
+      case 'due-soon':
+        return <AlertCircle className="w-5 h-5 text-amber-500" />;
+      case 'overdue':
+        return <AlertCircle className="w-5 h-5 text-red-500" />;
       default:
         return <Bell className="w-5 h-5 text-gray-400" />;
     }
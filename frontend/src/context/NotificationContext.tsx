@@ -1,8 +1,8 @@
-import React, { createContext, useState, useEffect, useContext, useCallback } from 'react';
+import React, { createContext, useState, useEffect, useContext, useCallback, useRef } from 'react';
 import { notificationApi, Notification } from '../api/notificationApi';
 
 // Define notification types
-export type NotificationType = 'welcome' | 'borrow-accepted' | 'borrow-rejected' | 'info';
+export type NotificationType = 'welcome' | 'borrow-accepted' | 'borrow-rejected' | 'info' | 'due-soon' | 'overdue';
 
 // Define the context interface
 interface NotificationContextType {
@@ -20,6 +20,10 @@ interface NotificationContextType {
 // Create the context
 const NotificationContext = createContext<NotificationContextType | undefined>(undefined);
 
+// Delay before reloading the list after an ID-less pushed notification: a fixed minimum plus random jitter
+const LIST_REFRESH_MIN_DELAY_MS = 2000;
+const LIST_REFRESH_JITTER_MS = 15000;
+
 // Check if user is authenticated
 const isUserAuthenticated = () => {
     return !!localStorage.getItem('token');
@@ -128,33 +132,94 @@ export const NotificationProvider: React.FC<{ children: React.ReactNode }> = ({
         return () => window.removeEventListener('storage', handleStorageChange);
     }, [fetchNotifications]);
 
-    // Function to fetch only the unread count
-    const fetchUnreadCount = useCallback(async () => {
-        if (!isUserAuthenticated()) {
-        return;
-        }
-        
-        try {
-        const count = await notificationApi.getUnreadCount();
-        setUnreadCount(count);
-        } catch (err) {
-        console.error('Failed to fetch unread count:', err);
-        }
+    // Keep the latest fetcher for the stream handlers without reconnecting on filter changes
+    const fetchNotificationsRef = useRef(fetchNotifications);
+    useEffect(() => {
+        fetchNotificationsRef.current = fetchNotifications;
+    }, [fetchNotifications]);
+
+    const showAllNotificationsRef = useRef(showAllNotifications);
+    useEffect(() => {
+        showAllNotificationsRef.current = showAllNotifications;
+    }, [showAllNotifications]);
+
+    // Pushed notifications without an ID (fan-outs, reminders) need the list reloaded to be
+    // markable. One reload per burst, at a random delay, so a broadcast to many connected
+    // clients doesn't bring them all back to the API at the same moment.
+    const listRefreshTimer = useRef<ReturnType<typeof setTimeout> | undefined>(undefined);
+    const scheduleListRefresh = useCallback(() => {
+        if (listRefreshTimer.current) return;
+        const delay = LIST_REFRESH_MIN_DELAY_MS + Math.random() * LIST_REFRESH_JITTER_MS;
+        listRefreshTimer.current = setTimeout(async () => {
+            listRefreshTimer.current = undefined;
+            if (!isUserAuthenticated()) return;
+            try {
+                // Only the list: the unread count is kept current by the stream itself
+                setNotifications(await notificationApi.getNotifications(!showAllNotificationsRef.current));
+            } catch (err) {
+                console.error('Failed to refresh notifications:', err);
+            }
+        }, delay);
     }, []);
 
-    // Polling for unread count every 10 seconds (more frequent than full notification fetch)
+    // Push channel: the server streams notification and unread-count events,
+    // replacing the old 5-second unread-count polling
     useEffect(() => {
-        if (!isUserAuthenticated()) return;
-        
-        // Fetch immediately on mount
-        fetchUnreadCount();
-        
-        const interval = setInterval(() => {
-            fetchUnreadCount();
-        }, 5000); // Check more frequently for unread count
+        if (!isUserAuthenticated() || typeof EventSource === 'undefined') return;
+
+        let source: EventSource | null = null;
+        let reconnectTimer: ReturnType<typeof setTimeout> | undefined;
+
+        const connect = () => {
+            if (!isUserAuthenticated()) return;
+            source = new EventSource(notificationApi.streamUrl());
 
-        return () => clearInterval(interval);
-    }, [fetchUnreadCount]);
+            source.addEventListener('unread_count', (event) => {
+                const data = JSON.parse((event as MessageEvent).data);
+                setUnreadCount(data.unread_count);
+            });
+
+            source.addEventListener('notification', (event) => {
+                const data = JSON.parse((event as MessageEvent).data) as Partial<Notification>;
+                setUnreadCount(prev => prev + 1);
+                if (data.id === undefined) {
+                    scheduleListRefresh();
+                    return;
+                }
+                const notification: Notification = {
+                    id: String(data.id),
+                    type: data.type as Notification['type'],
+                    message: data.message ?? '',
+                    read: false,
+                    created_at: data.created_at ?? new Date().toISOString(),
+                    broadcast: data.broadcast,
+                };
+                setNotifications(prev => [notification, ...prev.filter(item => String(item.id) !== notification.id)]);
+            });
+
+            source.addEventListener('sync', () => {
+                fetchNotificationsRef.current();
+            });
+
+            source.onerror = () => {
+                // The browser retries dropped connections itself (sending Last-Event-ID);
+                // a rejected one (e.g. expired token) is closed and retried here
+                if (source && source.readyState === EventSource.CLOSED) {
+                    source = null;
+                    reconnectTimer = setTimeout(connect, 10000);
+                }
+            };
+        };
+
+        connect();
+
+        return () => {
+            if (reconnectTimer) clearTimeout(reconnectTimer);
+            if (listRefreshTimer.current) clearTimeout(listRefreshTimer.current);
+            listRefreshTimer.current = undefined;
+            source?.close();
+        };
+    }, [scheduleListRefresh]);
 
     // Provide the context values
     return (
@@ -78,7 +78,7 @@ const ArticleDetailsPage: React.FC = () => {
     const [scale, setScale] = useState<number>(1.0);
     const [pdfError, setPdfError] = useState<string | null>(null);
     const [isPdfLoading, setIsPdfLoading] = useState<boolean>(true);
-    const [pdfBlobUrl, setPdfBlobUrl] = useState<string | null>(null);
+    const [pdfSource, setPdfSource] = useState<{ url: string; httpHeaders: Record<string, string> } | null>(null);
 
     // Summary modal state
     const [isSummaryModalOpen, setIsSummaryModalOpen] = useState<boolean>(false);
@@ -179,38 +179,17 @@ const ArticleDetailsPage: React.FC = () => {
         fetchArticle();
     }, [slug, isAuthenticated, isAuthLoading, navigate]);
 
-    // Fetch and create PDF blob URL
+    // Point the viewer at the caching proxy; pdf.js fetches pages lazily with Range requests
+    // and sends the token on each of them, since the proxy requires a login
     useEffect(() => {
-        const fetchPdf = async () => {
-            if (!article?.pdfUrl) return;
-
-            setIsPdfLoading(true);
-            setPdfError(null);
-
-            try {
-                const response = await fetch(`http://localhost:5050/proxy-pdf?url=${encodeURIComponent(article.pdfUrl)}`, {
-                    method: 'GET',
-                    headers: { 'Accept': 'application/pdf' }
-                });
-                if (!response.ok) throw new Error(`Failed to fetch PDF: ${response.statusText}`);
-
-                const blob = await response.blob();
-                const blobUrl = window.URL.createObjectURL(blob);
-                setPdfBlobUrl(blobUrl);
-            } catch (error: any) {
-                console.error('Error fetching PDF:', error);
-                setPdfError(`Failed to load PDF: ${error.message}`);
-            } finally {
-                setIsPdfLoading(false);
-            }
-        };
-
-        fetchPdf();
-
-        return () => {
-            if (pdfBlobUrl) window.URL.revokeObjectURL(pdfBlobUrl);
-        };
-    }, [article]);
+        if (!article?.pdfUrl) return;
+        setIsPdfLoading(true);
+        setPdfError(null);
+        setPdfSource({
+            url: `http://localhost:5050/proxy-pdf?url=${encodeURIComponent(article.pdfUrl)}`,
+            httpHeaders: { Authorization: `Bearer ${localStorage.getItem('token')}` },
+        });
+    }, [article?.pdfUrl]);
 
     const handleBack = () => navigate('/articles');
 
@@ -227,9 +206,9 @@ const ArticleDetailsPage: React.FC = () => {
 
         try {
             const token = localStorage.getItem('token');
-            const response = await axios.post(`/api/articles/${article.id}/like`, {}, {
-                headers: { Authorization: `Bearer ${token}` }
-            });
+            const url = `/api/articles/${article.id}/like`;
+            const config = { headers: { Authorization: `Bearer ${token}` } };
+            const response = await (wasLiked ? axios.delete(url, config) : axios.put(url, {}, config));
 
             if (response.status !== 200) throw new Error('Failed to toggle like');
             toast.success(wasLiked ? 'Article unliked' : 'Article liked', { position: 'bottom-center', autoClose: 3000 });
@@ -259,9 +238,9 @@ const ArticleDetailsPage: React.FC = () => {
 
         try {
             const token = localStorage.getItem('token');
-            const response = await axios.post(`/api/articles/${article.id}/bookmark`, {}, {
-                headers: { Authorization: `Bearer ${token}` }
-            });
+            const url = `/api/articles/${article.id}/bookmark`;
+            const config = { headers: { Authorization: `Bearer ${token}` } };
+            const response = await (wasBookmarked ? axios.delete(url, config) : axios.put(url, {}, config));
 
             if (response.status !== 200) throw new Error('Failed to toggle bookmark');
             toast.success(wasBookmarked ? 'Bookmark removed' : 'Article bookmarked', { position: 'bottom-center', autoClose: 3000 });
@@ -772,10 +751,11 @@ const ArticleDetailsPage: React.FC = () => {
                                                     </button>
                                                 </div>
                                             )}
-                                            {pdfBlobUrl && !isPdfLoading && !pdfError && (
+                                            {pdfSource && !pdfError && (
                                                 <div className="flex justify-center">
                                                     <Document
-                                                        file={pdfBlobUrl}
+                                                        file={pdfSource}
+                                                        loading=""
                                                         onLoadSuccess={onDocumentLoadSuccess}
                                                         onLoadError={onDocumentLoadError}
                                                         className="flex justify-center"
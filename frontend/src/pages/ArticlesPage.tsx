@@ -2,7 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
 import { motion } from 'framer-motion';
-import { Search, BookOpen, Filter, X, Tag, ChevronLeft, ChevronRight, ChevronsLeft, ChevronsRight } from 'lucide-react';
+import { Search, BookOpen, Filter, X, Tag, Clock, ArrowUpDown, ChevronLeft, ChevronRight, ChevronsLeft, ChevronsRight } from 'lucide-react';
 import BackgroundWrapper from '@/components/ui/BackgroundWrapper';
 import { useAuth } from '../context/AuthContext';
 import { toast } from 'react-toastify';
@@ -32,8 +32,27 @@ interface ArticleMeta {
   views: number;
   likes: number;
   bookmarks: number;
+  pageCount?: number | null;
+  wordCount?: number | null;
 }
 
+// Sort keys and read-time ranges understood by GET /api/articles
+const SORT_OPTIONS = [
+  { value: '', label: 'Discover' },
+  { value: 'read_time', label: 'Shortest read' },
+  { value: '-read_time', label: 'Longest read' },
+  { value: 'page_count', label: 'Fewest pages' },
+  { value: '-views', label: 'Most viewed' },
+  { value: '-created_at', label: 'Newest' },
+];
+
+const LENGTH_OPTIONS = [
+  { value: '', label: 'Any length', min: undefined, max: undefined },
+  { value: 'short', label: 'Under 10 min', min: undefined, max: 9 },
+  { value: 'medium', label: '10–30 min', min: 10, max: 30 },
+  { value: 'long', label: 'Over 30 min', min: 31, max: undefined },
+];
+
 // Combined type for article with meta
 interface ArticleWithMeta extends Article {
   meta: ArticleMeta;
@@ -55,6 +74,8 @@ const ArticlesPage: React.FC = () => {
   const [searchQuery, setSearchQuery] = useState<string>('');
   const [selectedCategory, setSelectedCategory] = useState<string>('');
   const [selectedTag, setSelectedTag] = useState<string>(initialTag);
+  const [sortBy, setSortBy] = useState<string>('');
+  const [lengthFilter, setLengthFilter] = useState<string>('');
   const [showFilters, setShowFilters] = useState<boolean>(false);
   const [categories, setCategories] = useState<string[]>([]);
   const [allTags, setAllTags] = useState<string[]>([]);
@@ -93,6 +114,10 @@ const ArticlesPage: React.FC = () => {
         if (searchQuery) params.search = searchQuery;
         if (selectedCategory) params.category = selectedCategory;
         if (selectedTag) params.tag = selectedTag;
+        if (sortBy) params.sort = sortBy;
+        const length = LENGTH_OPTIONS.find(option => option.value === lengthFilter);
+        if (length?.min !== undefined) params.min_read_time = length.min;
+        if (length?.max !== undefined) params.max_read_time = length.max;
 
         const response = await axios.get<ArticlesResponse>('/api/articles', {
           headers: {
@@ -137,7 +162,7 @@ const ArticlesPage: React.FC = () => {
     };
 
     fetchArticles();
-  }, [isAuthenticated, isAuthLoading, navigate, currentPage, searchQuery, selectedCategory, selectedTag, initialTag]);
+  }, [isAuthenticated, isAuthLoading, navigate, currentPage, searchQuery, selectedCategory, selectedTag, sortBy, lengthFilter, initialTag]);
 
   useEffect(() => {
     setSelectedTag(initialTag);
@@ -158,9 +183,21 @@ const ArticlesPage: React.FC = () => {
     setCurrentPage(1); // Reset to first page on filter change
   };
 
+  const handleSortChange = (value: string) => {
+    setSortBy(value);
+    setCurrentPage(1); // Reset to first page on filter change
+  };
+
+  const handleLengthChange = (value: string) => {
+    setLengthFilter(value === lengthFilter ? '' : value);
+    setCurrentPage(1); // Reset to first page on filter change
+  };
+
   const clearFilters = () => {
     setSelectedCategory('');
     setSelectedTag('');
+    setSortBy('');
+    setLengthFilter('');
     setSearchQuery('');
     setCurrentPage(1); // Reset to first page
   };
@@ -178,11 +215,9 @@ const ArticlesPage: React.FC = () => {
     try {
       const token = localStorage.getItem('token');
       const isLiked = likedArticles.has(articleId);
-      await axios.post(
-        `/api/articles/${articleId}/like`,
-        {},
-        { headers: { Authorization: `Bearer ${token}` } }
-      );
+      const url = `/api/articles/${articleId}/like`;
+      const config = { headers: { Authorization: `Bearer ${token}` } };
+      await (isLiked ? axios.delete(url, config) : axios.put(url, {}, config));
 
       // Show toast notification
       toast.success(isLiked ? 'Article unliked' : 'Article liked', {
@@ -218,11 +253,9 @@ const ArticlesPage: React.FC = () => {
     try {
       const token = localStorage.getItem('token');
       const isBookmarked = bookmarkedArticles.has(articleId);
-      await axios.post(
-        `/api/articles/${articleId}/bookmark`,
-        {},
-        { headers: { Authorization: `Bearer ${token}` } }
-      );
+      const url = `/api/articles/${articleId}/bookmark`;
+      const config = { headers: { Authorization: `Bearer ${token}` } };
+      await (isBookmarked ? axios.delete(url, config) : axios.put(url, {}, config));
 
       // Show toast notification
       toast.success(isBookmarked ? 'Bookmark removed' : 'Article bookmarked', {
@@ -379,6 +412,48 @@ const ArticlesPage: React.FC = () => {
             </button>
           </div>
 
+          {/* Sort */}
+          <div className="mb-8">
+            <h4 className="text-md font-semibold text-white mb-4 flex items-center">
+              <ArrowUpDown className="h-4 w-4 mr-2 text-amber-500" />
+              Sort By
+            </h4>
+            <select
+              value={sortBy}
+              onChange={(e) => handleSortChange(e.target.value)}
+              className="w-full px-3 py-2 rounded-lg bg-gray-800 text-gray-300 border border-gray-700 focus:outline-none focus:border-amber-500"
+            >
+              {SORT_OPTIONS.map((option) => (
+                <option key={option.value} value={option.value}>
+                  {option.label}
+                </option>
+              ))}
+            </select>
+          </div>
+
+          {/* Length */}
+          <div className="mb-8">
+            <h4 className="text-md font-semibold text-white mb-4 flex items-center">
+              <Clock className="h-4 w-4 mr-2 text-amber-500" />
+              Reading Time
+            </h4>
+            <div className="space-y-2">
+              {LENGTH_OPTIONS.filter(option => option.value).map((option) => (
+                <button
+                  key={option.value}
+                  onClick={() => handleLengthChange(option.value)}
+                  className={`block w-full text-left px-3 py-2 rounded-lg transition-colors duration-200 ${
+                    lengthFilter === option.value
+                      ? 'bg-amber-500/20 text-amber-400'
+                      : 'text-gray-300 hover:bg-gray-800'
+                  }`}
+                >
+                  {option.label}
+                </button>
+              ))}
+            </div>
+          </div>
+
           {/* Categories */}
           <div className="mb-8">
             <h4 className="text-md font-semibold text-white mb-4 flex items-center">
@@ -447,7 +522,7 @@ const ArticlesPage: React.FC = () => {
         )}
 
         {/* Current Filters Display */}
-        {(selectedCategory || selectedTag) && (
+        {(selectedCategory || selectedTag || lengthFilter) && (
           <motion.div
             initial={{ opacity: 0, y: 10 }}
             animate={{ opacity: 1, y: 0 }}
@@ -467,6 +542,18 @@ const ArticlesPage: React.FC = () => {
               </span>
             )}
 
+            {lengthFilter && (
+              <span className="inline-flex items-center px-3 py-1 rounded-full bg-amber-500/20 text-amber-300 text-sm">
+                {LENGTH_OPTIONS.find(option => option.value === lengthFilter)?.label}
+                <button
+                  onClick={() => setLengthFilter('')}
+                  className="ml-2 text-amber-300 hover:text-amber-100"
+                >
+                  <X size={14} />
+                </button>
+              </span>
+            )}
+
             {selectedTag && (
               <span
                 className="inline-flex items-center px-3 py-1 rounded-full bg-gray-800 text-gray-200 text-sm"
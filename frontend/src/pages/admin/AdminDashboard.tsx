@@ -139,6 +139,7 @@ const AdminDashboard = () => {
   const [loadingBooks, setLoadingBooks] = useState<boolean>(true);
   const [loadingAccountRequests, setLoadingAccountRequests] =
     useState<boolean>(true); // New loading state
+  const [loadingStats, setLoadingStats] = useState<boolean>(true);
 
   // Error states
   const [errorBorrowRequests, setErrorBorrowRequests] = useState<string | null>(
@@ -157,30 +158,30 @@ const AdminDashboard = () => {
     totalBooks: 0,
   });
 
-  // Fetch the number of users
+  // Fetch the headline numbers from the materialized dashboard stats
   useEffect(() => {
-      const fetchUsers = async () => {
+      const fetchStats = async () => {
           try {
               const token = localStorage.getItem('token');
               if (!token) throw new Error('No authentication token found');
-              const response = await axios.get('/api/users', {
+              const response = await axios.get('/api/admin/stats', {
                   headers: {
                       Authorization: `Bearer ${token}`,
                       'Content-Type': 'application/json',
                   },
               });
-              setStats((prev) => ({
-                  ...prev,
-                  totalUsers: response.data.length,
-              }));
+              setStats({
+                  borrowedBooks: response.data.rentals.active,
+                  totalUsers: response.data.users.total,
+                  totalBooks: response.data.books.titles,
+              });
           } catch (error) {
-              console.error('Error fetching users:', error);
-              setErrorRentals(
-                  error instanceof Error ? error.message : 'An unknown error occurred'
-              );
+              console.error('Error fetching dashboard stats:', error);
+          } finally {
+              setLoadingStats(false);
           }
       };
-      fetchUsers();
+      fetchStats();
   }, []);
 
   // Fetch borrow requests
@@ -223,10 +224,6 @@ const AdminDashboard = () => {
                 },
             });
             setRentals(response.data.rentals);
-            setStats((prev) => ({
-                ...prev,
-                borrowedBooks: response.data.rentals.filter((rental: Rental) => !rental.returned_at).length,
-            }));
         } catch (error) {
             console.error('Error fetching rentals:', error);
             setErrorRentals(
@@ -256,10 +253,6 @@ const AdminDashboard = () => {
                 throw new Error('Invalid response format');
             }
             setBooks(response.data.books);
-            setStats((prev) => ({
-                ...prev,
-                totalBooks: response.data.total_count || response.data.books.length,
-            }));
         } catch (error) {
             console.error('Error fetching books:', error);
             setErrorBooks(
@@ -344,10 +337,10 @@ const AdminDashboard = () => {
             </div>
             <div className="flex items-end justify-between">
               <h3 className="text-3xl font-bold text-gray-100">
-                {loadingRentals ? "..." : stats.borrowedBooks}
+                {loadingStats ? "..." : stats.borrowedBooks}
               </h3>
               <div className="text-xs text-gray-400">
-                From total of {stats.totalBooks || "..."} books
+                From total of {loadingStats ? "..." : stats.totalBooks} books
               </div>
             </div>
           </div>
@@ -369,7 +362,7 @@ const AdminDashboard = () => {
             </div>
             <div className="flex items-end justify-between">
               <h3 className="text-3xl font-bold text-gray-100">
-                {stats.totalUsers || "..."}
+                {loadingStats ? "..." : stats.totalUsers}
               </h3>
               <div className="text-xs text-gray-400">
                 {loadingAccountRequests ? "..." : accountRequests.length} new
@@ -395,7 +388,7 @@ const AdminDashboard = () => {
             </div>
             <div className="flex items-end justify-between">
               <h3 className="text-3xl font-bold text-gray-100">
-                {loadingBooks ? "..." : stats.totalBooks}
+                {loadingStats ? "..." : stats.totalBooks}
               </h3>
               <div className="text-xs text-gray-400">
                 {recentlyAddedBooks.length} recently added
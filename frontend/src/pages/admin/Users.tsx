@@ -10,42 +10,13 @@ import axios from 'axios';
 import { toast } from 'react-toastify';
 import Pagination from '@/components/common/Pagination';
 
-interface Rental {
-  id: number;
-  book_id: number;
-  rented_at: string;
-  returned_at: string | null;
-  book: {
-    id: number;
-    title: string;
-    authors: string[];
-    categories: string[];
-    cover_url: string;
-  };
-}
-
-interface RentalRequest {
-  id: number;
-  book_id: number;
-  requested_at: string;
-  status: string;
-  book: {
-    id: number;
-    title: string;
-    authors: string[];
-    categories: string[];
-    cover_url: string;
-  };
-}
-
 interface User {
   id: number;
   name: string;
   email: string;
   role: string;
   date_joined: string;
-  rentals: Rental[];
-  rental_requests: RentalRequest[];
+  active_rentals: number;
 }
 
 interface PaginationData {
@@ -246,7 +217,7 @@ const UsersTable: React.FC = () => {
 
   // Get active rentals count (books currently borrowed)
   const getActiveRentals = (user: User) => {
-    return user.rentals.filter(rental => rental.returned_at === null).length;
+    return user.active_rentals;
   };
 
   // Format date to a readable format